@@ -0,0 +1,73 @@
+"""
+멀티 워커 서버 설정 (gunicorn + UvicornWorker)
+SERVER_WORKERS가 1보다 크면 server.py가 이 설정으로 gunicorn을 실행합니다.
+
+    gunicorn -c agent/gunicorn_conf.py agent.server:app
+
+- master가 fork 전에 설정(Secrets Manager)과 무거운 모듈(boto3, strands 등)을 미리 로드해
+  워커는 copy-on-write로 공유합니다. 앱(스레드, 커넥션 풀을 만드는 모듈)은 워커마다 로드합니다.
+- UvicornWorker는 uvloop / httptools가 설치되어 있으면 자동으로 사용합니다 (uvicorn[standard]).
+- /metrics는 METRICS_DIR의 워커별 스냅샷을 합산해서 출력합니다.
+
+환경변수:
+    SERVER_WORKERS          워커 수 (auto = vCPU 수)
+    PORT                    bind 포트 (기본 8080)
+    GUNICORN_TIMEOUT        워커 응답 없음 timeout (초, 기본 300 - LLM 호출 고려)
+    GUNICORN_MAX_REQUESTS   워커 재시작 주기 (요청 수, 기본 0 = 비활성)
+    METRICS_DIR             워커별 메트릭 스냅샷 디렉터리 (기본 /tmp/agent-metrics)
+"""
+import os
+import shutil
+import sys
+import time
+
+# agent 패키지 import 경로 (server.py와 동일하게 저장소 루트 기준)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.utils.workers import get_worker_count
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = get_worker_count()
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = False
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "300"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "75"))
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+accesslog = "-" if os.environ.get("ACCESS_LOG", "false").lower() in ("1", "true", "yes") else None
+loglevel = os.environ.get("LOG_LEVEL", "info").lower()
+
+
+def on_starting(server):
+    """master 시작 시 (fork 전): 메트릭 디렉터리 초기화, 설정과 공통 모듈 preload"""
+    # fork된 워커가 상속하므로 utils.metrics가 멀티 워커 모드로 동작
+    metrics_dir = os.environ.setdefault("METRICS_DIR", "/tmp/agent-metrics")
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    # 스레드나 커넥션을 만들지 않는 모듈만 preload (fork 후 상속되어도 안전)
+    import boto3  # noqa: F401
+    import httpx  # noqa: F401
+    import pydantic  # noqa: F401
+    import strands  # noqa: F401
+
+    from agent.utils.secrets import get_config
+
+    # 설정은 프로세스 캐시에 남아 워커가 그대로 사용 (워커마다 Secrets Manager 호출 안 함)
+    get_config()
+    server.log.info(
+        "Preloaded config and modules in %.0fms, starting %d workers", (time.perf_counter() - start) * 1000, workers
+    )
+
+
+def post_fork(server, worker):
+    server.log.info("Worker spawned (pid: %s)", worker.pid)
+
+
+def child_exit(server, worker):
+    """종료된 워커의 메트릭 스냅샷 삭제"""
+    from agent.utils.metrics import remove_worker_snapshot
+
+    remove_worker_snapshot(worker.pid)
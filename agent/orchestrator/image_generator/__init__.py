@@ -4,13 +4,15 @@ Image Generator Agent for Strands AI
 
 사용 모델:
 - 프롬프트 생성: Claude Sonnet 4.5
-- 이미지 생성: Amazon Nova Canvas (1024x1280, 4:5 비율)
+- 이미지 생성: Amazon Nova Canvas (4:5 비율, 미리보기 512x640 / 최종 1024x1280)
 """
 
 from .agent import (
     image_generator_agent,
     run_image_generator,
+    run_image_generator_async,
     generate_image_from_text,
+    render_image_to_history,
     upload_image_to_s3,
     build_prompt_from_text,
     health_check
@@ -20,7 +22,9 @@ __version__ = "1.0.0"
 __all__ = [
     "image_generator_agent",
     "run_image_generator",
+    "run_image_generator_async",
     "generate_image_from_text",
+    "render_image_to_history",
     "upload_image_to_s3",
     "build_prompt_from_text",
     "health_check"
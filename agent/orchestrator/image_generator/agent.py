@@ -8,22 +8,14 @@ import asyncio
 from typing import Dict, Any
 
 from strands import Agent, tool
-from strands.models import BedrockModel
 
-from .tools import ImageGeneratorTools
-from agent.utils.secrets import get_config
+from .tools import ImageGeneratorTools, image_result_fields, track_image_results
+from agent.utils.model_routing import ROUTE_IMAGE, get_route_model, get_route_model_id, track_route_latency
+from agent.utils.usage import agent_usage, record_usage
+from agent.utils.deadline import DeadlineExceeded, DeadlineHook
 
-# 설정 로드
-config = get_config()
-
-# AWS 설정
-AWS_REGION = config.get("AWS_REGION", os.environ.get("AWS_REGION", "us-east-1"))
-
-# Claude 모델 (에이전트 추론용)
-model = BedrockModel(
-    model_id=config.get("BEDROCK_CLAUDE_MODEL_ID", "anthropic.claude-sonnet-4-5-20250929-v1:0"),
-    region_name=AWS_REGION
-)
+# Claude 모델 (에이전트 추론용, image 라우트 모델)
+model = get_route_model(ROUTE_IMAGE)
 
 # Tools 인스턴스
 _tools = ImageGeneratorTools()
@@ -31,10 +23,11 @@ _tools = ImageGeneratorTools()
 
 # ============================================================================
 # Strands Tools
+# async tool: sync agent 호출(Strands 내부 이벤트 루프)과 async 경로 모두에서 await로 실행
 # ============================================================================
 
 @tool
-def generate_image_from_text(text: str) -> Dict[str, Any]:
+async def generate_image_from_text(text: str) -> Dict[str, Any]:
     """
     일기 텍스트를 입력받아 이미지를 생성합니다 (미리보기용, S3 업로드 없음).
     Claude로 프롬프트 변환 후 Nova Canvas로 이미지 생성.
@@ -43,19 +36,15 @@ def generate_image_from_text(text: str) -> Dict[str, Any]:
         text: 일기 텍스트 (한글)
     
     Returns:
-        image_base64: 생성된 이미지 (base64)
+        image_base64: 생성된 이미지 (base64, 미리보기 해상도)
         prompt: 사용된 프롬프트
+        seed: 생성 seed (히스토리에 추가할 때 prompt와 함께 사용)
     """
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(_tools.generate_image_from_text(text))
-    finally:
-        loop.close()
+    return await _tools.generate_image_from_text(text)
 
 
 @tool
-def upload_image_to_s3(user_id: str, image_base64: str, record_date: str = None) -> Dict[str, Any]:
+async def upload_image_to_s3(user_id: str, image_base64: str, record_date: str = None) -> Dict[str, Any]:
     """
     이미지를 S3에 업로드합니다 (히스토리에 추가 버튼용).
     
@@ -67,17 +56,38 @@ def upload_image_to_s3(user_id: str, image_base64: str, record_date: str = None)
     Returns:
         s3_key: S3 키
         image_url: 이미지 URL
+        upload_status: uploaded 또는 pending (write-behind 모드, 백그라운드 업로드 중)
     """
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(_tools.upload_image_to_s3(user_id, image_base64, record_date))
-    finally:
-        loop.close()
+    return await _tools.upload_image_to_s3(user_id, image_base64, record_date)
+
+
+@tool
+async def render_image_to_history(
+    user_id: str,
+    positive_prompt: str,
+    seed: int,
+    negative_prompt: str = None,
+    record_date: str = None
+) -> Dict[str, Any]:
+    """
+    미리보기의 seed와 prompt로 최종 해상도(1024x1280) 이미지를 생성해서 S3에 업로드합니다 (히스토리에 추가).
+    
+    Args:
+        user_id: 사용자 ID (cognito_sub)
+        positive_prompt: 미리보기에 사용된 프롬프트
+        seed: 미리보기 seed
+        negative_prompt: 미리보기에 사용된 네거티브 프롬프트 (선택)
+        record_date: 기록 날짜 (선택, ISO format)
+    
+    Returns:
+        s3_key: S3 키
+        image_url: 이미지 URL
+    """
+    return await _tools.render_image_to_history(user_id, positive_prompt, seed, negative_prompt, record_date)
 
 
 @tool
-def build_prompt_from_text(text: str) -> Dict[str, Any]:
+async def build_prompt_from_text(text: str) -> Dict[str, Any]:
     """
     일기 텍스트를 이미지 생성 프롬프트로 변환합니다 (이미지 생성 없음).
     
@@ -88,28 +98,18 @@ def build_prompt_from_text(text: str) -> Dict[str, Any]:
         positive_prompt: 생성된 프롬프트
         negative_prompt: 네거티브 프롬프트
     """
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(_tools.build_prompt_from_text(text))
-    finally:
-        loop.close()
+    return await _tools.build_prompt_from_text(text)
 
 
 @tool
-def health_check() -> Dict[str, Any]:
+async def health_check() -> Dict[str, Any]:
     """
     이미지 생성 서비스의 상태를 확인합니다.
     
     Returns:
         서비스 상태 정보
     """
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(_tools.health_check())
-    finally:
-        loop.close()
+    return await _tools.health_check()
 
 
 # ============================================================================
@@ -119,40 +119,95 @@ def health_check() -> Dict[str, Any]:
 AGENT_SYSTEM_PROMPT = """당신은 일기 텍스트를 이미지로 변환하는 AI Agent입니다.
 
 **사용 가능한 도구:**
-1. generate_image_from_text: 텍스트 → 이미지 생성 (미리보기용, S3 업로드 X)
+1. generate_image_from_text: 텍스트 → 이미지 생성 (미리보기용 작은 해상도, S3 업로드 X)
    - 입력: text (일기 텍스트)
-   - 출력: image_base64, prompt
+   - 출력: image_base64, prompt, seed
+
+2. render_image_to_history: 미리보기의 seed / prompt로 최종 해상도 이미지를 생성해서 S3에 업로드 (히스토리에 추가용)
+   - 입력: user_id (cognito_sub), positive_prompt, seed, negative_prompt (선택), record_date (선택)
+   - 출력: s3_key, image_url
 
-2. upload_image_to_s3: 이미지를 S3에 업로드 (히스토리에 추가용)
+3. upload_image_to_s3: 이미지를 S3에 업로드 (히스토리에 추가용)
    - 입력: user_id (cognito_sub), image_base64, record_date (선택)
    - 출력: s3_key, image_url
 
-3. build_prompt_from_text: 프롬프트만 생성 (이미지 생성 없음)
+4. build_prompt_from_text: 프롬프트만 생성 (이미지 생성 없음)
    - 입력: text
    - 출력: positive_prompt, negative_prompt
 
-4. health_check: 서비스 상태 확인
+5. health_check: 서비스 상태 확인
 
 **작업 흐름:**
 - "미리보기", "이미지 생성" 요청 + text 제공 → generate_image_from_text 사용
+- "히스토리에 추가" 요청 + user_id, seed, prompt 제공 → render_image_to_history 사용
 - "업로드", "저장", "히스토리에 추가" 요청 + user_id, image_base64 제공 → upload_image_to_s3 사용
 - "프롬프트 생성" 요청 → build_prompt_from_text 사용
 
 **중요:**
 - 미리보기는 S3에 업로드하지 않고 base64 이미지만 반환
+- 미리보기 결과에는 seed와 positive prompt를 함께 알려주세요 (히스토리에 추가할 때 필요)
 - 히스토리에 추가할 때만 S3에 업로드
 """
 
-image_generator_agent = Agent(
-    model=model,
-    system_prompt=AGENT_SYSTEM_PROMPT,
-    tools=[
-        generate_image_from_text,
-        upload_image_to_s3,
-        build_prompt_from_text,
-        health_check,
-    ]
-)
+def _new_image_generator_agent() -> Agent:
+    return Agent(
+        model=model,
+        system_prompt=AGENT_SYSTEM_PROMPT,
+        tools=[
+            generate_image_from_text,
+            render_image_to_history,
+            upload_image_to_s3,
+            build_prompt_from_text,
+            health_check,
+        ],
+        callback_handler=None,
+        hooks=[DeadlineHook()]
+    )
+
+
+image_generator_agent = _new_image_generator_agent()
+
+
+def _can_render_directly(user_id: str, image_base64: str, seed: int, image_prompt: str) -> bool:
+    # 미리보기 seed / prompt로 히스토리에 추가: 할 일이 정해져 있으므로 agent 추론 없이 바로 렌더링
+    return seed is not None and bool(image_prompt) and bool(user_id) and not image_base64
+
+
+def _render_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    if not result.get("success"):
+        return {"success": False, "error": result.get("error")}
+    return {
+        "success": True,
+        "response": result["image_url"],
+        "s3_key": result["s3_key"],
+        "upload_status": result["upload_status"]
+    }
+
+
+def _agent_result(response: Any, image_results: Dict[str, Any]) -> Dict[str, Any]:
+    result = {"success": True, "response": str(response)}
+    # fallback 프롬프트 사용 여부와 미리보기 seed / prompt는 응답 텍스트가 아닌 필드로 orchestrator 결과까지 전달
+    result.update(image_result_fields(image_results))
+    return result
+
+
+def _build_prompt(
+    request: str, user_id: str, text: str, image_base64: str, record_date: str, seed: int, image_prompt: str
+) -> str:
+    prompt = f"요청: {request}"
+    if user_id:
+        prompt += f"\nuser_id: {user_id}"
+    if text:
+        prompt += f"\n일기 텍스트: {text}"
+    if image_base64:
+        prompt += f"\nimage_base64: {image_base64[:100]}... (총 {len(image_base64)} 문자)"
+    if record_date:
+        prompt += f"\nrecord_date: {record_date}"
+    if seed is not None:
+        prompt += f"\nseed: {seed}"
+    if image_prompt:
+        prompt += f"\nprompt: {image_prompt}"
+    return prompt
 
 
 @tool
@@ -161,7 +216,9 @@ def run_image_generator(
     user_id: str = None, 
     text: str = None, 
     image_base64: str = None,
-    record_date: str = None
+    record_date: str = None,
+    seed: int = None,
+    image_prompt: str = None
 ) -> Dict[str, Any]:
     """
     Image Generator Agent 실행 함수 (orchestrator에서 호출)
@@ -172,26 +229,82 @@ def run_image_generator(
         text: 일기 텍스트 (이미지 생성 시 필요)
         image_base64: 업로드할 이미지 (S3 업로드 시 필요)
         record_date: 기록 날짜 (S3 업로드 시 선택)
+        seed: 미리보기 seed (히스토리에 추가 시 최종 해상도 렌더링용)
+        image_prompt: 미리보기 positive prompt (seed와 함께 사용)
     
     Returns:
         에이전트 실행 결과
     """
-    prompt = f"요청: {request}"
-    if user_id:
-        prompt += f"\nuser_id: {user_id}"
-    if text:
-        prompt += f"\n일기 텍스트: {text}"
-    if image_base64:
-        prompt += f"\nimage_base64: {image_base64[:100]}... (총 {len(image_base64)} 문자)"
-    if record_date:
-        prompt += f"\nrecord_date: {record_date}"
+    if _can_render_directly(user_id, image_base64, seed, image_prompt):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            result = loop.run_until_complete(
+                _tools.render_image_to_history(user_id, image_prompt, seed, record_date=record_date)
+            )
+        finally:
+            loop.close()
+        return _render_result(result)
+    
+    # 공유 agent는 동시 호출을 지원하지 않으므로 sync 경로도 요청마다 agent를 만들어 대화 기록을 분리
+    agent = _new_image_generator_agent()
+    prompt = _build_prompt(request, user_id, text, image_base64, record_date, seed, image_prompt)
     
     try:
-        response = image_generator_agent(prompt)
+        with track_route_latency(ROUTE_IMAGE, get_route_model_id(ROUTE_IMAGE)), track_image_results() as image_results:
+            response = agent(prompt)
+        record_usage(ROUTE_IMAGE, get_route_model_id(ROUTE_IMAGE), agent_usage(agent))
+        return _agent_result(response, image_results)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
         return {
-            "success": True,
-            "response": str(response)
+            "success": False,
+            "error": str(e)
         }
+
+
+@tool(name="run_image_generator")
+async def run_image_generator_async(
+    request: str, 
+    user_id: str = None, 
+    text: str = None, 
+    image_base64: str = None,
+    record_date: str = None,
+    seed: int = None,
+    image_prompt: str = None
+) -> Dict[str, Any]:
+    """
+    Image Generator Agent 실행 함수 (orchestrator에서 호출)
+    
+    Args:
+        request: 사용자 요청 (자연어)
+        user_id: 사용자 ID - cognito_sub (S3 업로드 시 필요)
+        text: 일기 텍스트 (이미지 생성 시 필요)
+        image_base64: 업로드할 이미지 (S3 업로드 시 필요)
+        record_date: 기록 날짜 (S3 업로드 시 선택)
+        seed: 미리보기 seed (히스토리에 추가 시 최종 해상도 렌더링용)
+        image_prompt: 미리보기 positive prompt (seed와 함께 사용)
+    
+    Returns:
+        에이전트 실행 결과
+    """
+    if _can_render_directly(user_id, image_base64, seed, image_prompt):
+        return _render_result(
+            await _tools.render_image_to_history(user_id, image_prompt, seed, record_date=record_date)
+        )
+    
+    # async 경로: 동시에 여러 요청이 실행되므로 요청마다 agent를 만들어 대화 기록을 분리
+    agent = _new_image_generator_agent()
+    prompt = _build_prompt(request, user_id, text, image_base64, record_date, seed, image_prompt)
+    
+    try:
+        with track_route_latency(ROUTE_IMAGE, get_route_model_id(ROUTE_IMAGE)), track_image_results() as image_results:
+            response = await agent.invoke_async(prompt)
+        record_usage(ROUTE_IMAGE, get_route_model_id(ROUTE_IMAGE), agent_usage(agent))
+        return _agent_result(response, image_results)
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         return {
             "success": False,
@@ -4,18 +4,35 @@ TypeScript 서비스 없이 독립 실행
 """
 
 import os
-import json
 import base64
 import random
 import time
 import logging
 import asyncio
-from typing import Dict, Any
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional
 from datetime import datetime
 
 import boto3
 
 from agent.utils.secrets import get_config
+from agent.utils.bedrock_regions import get_runtime_client, invoke_model_json
+from agent.utils.circuit_breaker import CircuitOpenError, get_breaker
+from agent.utils.deadline import DeadlineExceeded, check_deadline
+from agent.utils.hedging import hedged_call
+from agent.utils.model_routing import (
+    ROUTE_IMAGE,
+    ROUTE_PROMPT_BUILDER,
+    anthropic_system_blocks,
+    get_route_model_id,
+    track_route_latency,
+)
+from agent.utils.usage import normalize_usage, record_images, record_usage
+from agent.utils.log import summarize
+from agent.utils.metrics import register_collector
+from agent.utils.write_behind import WriteBehindUploader, queue_depth_collector
 
 logger = logging.getLogger(__name__)
 
@@ -28,11 +45,23 @@ config = get_config()
 
 # Nova Canvas 설정
 NOVA_CANVAS_MODEL_ID = config.get("BEDROCK_NOVA_CANVAS_MODEL_ID", "amazon.nova-canvas-v1:0")
-CLAUDE_MODEL_ID = config.get("BEDROCK_LLM_MODEL_ID", "anthropic.claude-sonnet-4-20250514-v1:0")
+# 프롬프트 생성은 prompt_builder 라우트 모델 사용 (작고 빠른 모델 배치 가능)
+CLAUDE_MODEL_ID = (
+    get_route_model_id(ROUTE_PROMPT_BUILDER)
+    or config.get("BEDROCK_LLM_MODEL_ID", "anthropic.claude-sonnet-4-20250514-v1:0")
+)
 AWS_REGION = config.get("AWS_REGION", os.getenv("AWS_REGION", "us-east-1"))
 S3_BUCKET = config.get("KNOWLEDGE_BASE_BUCKET", os.getenv("KNOWLEDGE_BASE_BUCKET", "knowledge-base-test-6575574"))
 
-# 이미지 생성 설정
+# S3 업로드 방식
+# - sync: 요청 안에서 업로드 완료까지 대기 (기본)
+# - write_behind: 로컬 spool에 기록 후 키와 URL을 바로 반환, 백그라운드에서 재시도하며 업로드
+S3_UPLOAD_MODE = os.getenv("S3_UPLOAD_MODE", "sync").lower()
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", "/tmp/agent-upload-spool")
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "2"))
+UPLOAD_MAX_ATTEMPTS = int(os.getenv("UPLOAD_MAX_ATTEMPTS", "5"))
+
+# 이미지 생성 설정 (최종 이미지 - 히스토리에 추가)
 IMAGE_CONFIG = {
     "width": 1024,
     "height": 1280,
@@ -40,6 +69,20 @@ IMAGE_CONFIG = {
     "number_of_images": 1
 }
 
+# 미리보기 설정 - 같은 4:5 비율의 작은 해상도 (Nova Canvas: 16의 배수, 320 ~ 4096)
+# 사용자가 여러 번 다시 생성하는 미리보기는 작게 만들고, 히스토리에 추가할 때
+# 미리보기의 seed와 prompt로 최종 해상도 이미지를 다시 렌더링합니다.
+PREVIEW_IMAGE_CONFIG = {
+    **IMAGE_CONFIG,
+    "width": int(os.getenv("IMAGE_PREVIEW_WIDTH", "512")),
+    "height": int(os.getenv("IMAGE_PREVIEW_HEIGHT", "640")),
+}
+
+IMAGE_TIERS = {
+    "preview": PREVIEW_IMAGE_CONFIG,
+    "final": IMAGE_CONFIG,
+}
+
 # Negative Prompt
 NEGATIVE_PROMPT = """anime, cartoon, illustration, painting, sketch, drawing, 3d render, cgi, unreal engine, fantasy, surreal, low quality, low resolution, blurry, out of focus, noise, overexposed, underexposed, jpeg artifacts, deformed body, distorted face, bad anatomy, extra fingers, missing fingers, fused fingers, extra limbs, missing limbs, overly posed, studio lighting, text, caption, subtitle, watermark, logo, wrong food, wrong animal, substituted items, inaccurate details"""
 
@@ -76,15 +119,12 @@ Keep prompt under 500 characters."""
 # AWS 클라이언트
 # ============================================================================
 
-_bedrock_client = None
 _s3_client = None
 
 
 def get_bedrock_client():
-    global _bedrock_client
-    if _bedrock_client is None:
-        _bedrock_client = boto3.client("bedrock-runtime", region_name=AWS_REGION)
-    return _bedrock_client
+    # invoke_model은 invoke_model_json이 모델별 리전 목록에 따라 리전별 client를 사용
+    return get_runtime_client(AWS_REGION)
 
 
 def get_s3_client():
@@ -94,18 +134,111 @@ def get_s3_client():
     return _s3_client
 
 
+_uploader: Optional[WriteBehindUploader] = None
+_uploader_lock = threading.Lock()
+
+
+def _put_s3_object(fileobj, s3_key: str, content_type: str) -> None:
+    # circuit이 열려 있으면 바로 실패 → write-behind uploader가 나중에 재시도
+    with get_breaker("s3").guard():
+        get_s3_client().upload_fileobj(fileobj, S3_BUCKET, s3_key, ExtraArgs={"ContentType": content_type})
+
+
+def get_uploader() -> WriteBehindUploader:
+    """write-behind 업로더 (처음 호출 시 spool 복구 및 업로드 스레드 시작)"""
+    global _uploader
+    if _uploader is None:
+        with _uploader_lock:
+            if _uploader is None:
+                uploader = WriteBehindUploader(
+                    _put_s3_object,
+                    UPLOAD_SPOOL_DIR,
+                    workers=UPLOAD_WORKERS,
+                    max_attempts=UPLOAD_MAX_ATTEMPTS,
+                )
+                uploader.start()
+                _uploader = uploader
+    return _uploader
+
+
+def write_behind_enabled() -> bool:
+    return S3_UPLOAD_MODE == "write_behind"
+
+
+def get_upload_status(s3_key: str) -> Optional[Dict[str, Any]]:
+    """
+    write-behind 업로드 상태 조회
+    status: pending / uploading / uploaded / failed (spool에 기록이 없으면 None)
+    """
+    status = get_uploader().status(s3_key)
+    if status is None:
+        return None
+    return {**status, "image_url": build_image_url(s3_key)}
+
+
+register_collector(queue_depth_collector(lambda: _uploader))
+
+
+# ============================================================================
+# 요청 단위 결과 추적 (fallback 프롬프트, 미리보기 seed / prompt)
+# ============================================================================
+
+# 하위 agent를 거치면 tool 결과는 텍스트로만 돌아오므로 요청 단위로 fallback 프롬프트 사용 여부와
+# 미리보기 seed / prompt(히스토리에 추가할 때 필요)를 모음
+_image_results: ContextVar[Optional[Dict[str, Any]]] = ContextVar("image_results", default=None)
+
+
+@contextmanager
+def track_image_results():
+    """
+    with 블록 안에서 fallback 프롬프트(Claude 없이 일기 원문으로 만든 프롬프트) 사용 여부와
+    마지막 미리보기의 seed / prompt를 기록합니다. 바깥에서 이미 추적 중이면 같은 상태를 공유합니다.
+
+    Yields:
+        {"prompt_fallback": bool, "preview": {"seed", "prompt", "negative_prompt"} 또는 None}
+        - 블록이 끝난 뒤 확인
+    """
+    state = _image_results.get()
+    if state is not None:
+        yield state
+        return
+    state = {"prompt_fallback": False, "preview": None}
+    token = _image_results.set(state)
+    try:
+        yield state
+    finally:
+        _image_results.reset(token)
+
+
+def image_result_fields(state: Dict[str, Any]) -> Dict[str, Any]:
+    """track_image_results 상태를 결과 필드(prompt_fallback, seed, prompt, negative_prompt)로 변환합니다."""
+    fields = {}
+    if state["prompt_fallback"]:
+        fields["prompt_fallback"] = True
+    if state["preview"]:
+        fields.update(state["preview"])
+    return fields
+
+
+def _with_prompt_fallback(result: Dict[str, Any], prompt_result: Dict[str, Any]) -> Dict[str, Any]:
+    # fallback 프롬프트로 만든 결과에만 prompt_fallback 표시
+    if prompt_result.get("prompt_fallback"):
+        result["prompt_fallback"] = True
+    return result
+
+
 # ============================================================================
 # 핵심 기능
 # ============================================================================
 
 def generate_prompt_with_claude(journal_text: str) -> Dict[str, str]:
     """Claude를 사용하여 한글 일기를 영어 프롬프트로 변환"""
-    client = get_bedrock_client()
-    
+    # deadline이 지났으면 fallback 프롬프트 대신 바로 중단
+    check_deadline("prompt_builder")
     request_body = {
         "anthropic_version": "bedrock-2023-05-31",
         "max_tokens": 1024,
-        "system": SYSTEM_PROMPT,
+        "system": anthropic_system_blocks(SYSTEM_PROMPT, CLAUDE_MODEL_ID),
         "messages": [
             {
                 "role": "user",
@@ -115,38 +248,59 @@ def generate_prompt_with_claude(journal_text: str) -> Dict[str, str]:
     }
     
     try:
-        response = client.invoke_model(
-            modelId=CLAUDE_MODEL_ID,
-            contentType="application/json",
-            accept="application/json",
-            body=json.dumps(request_body)
-        )
+        with track_route_latency(ROUTE_PROMPT_BUILDER, CLAUDE_MODEL_ID):
+            # 느린 응답은 HEDGE_CALLS에 prompt_builder가 있으면 같은 요청을 한 번 더 보냄 (멱등 호출)
+            response_body = hedged_call("prompt_builder", invoke_model_json, CLAUDE_MODEL_ID, request_body)
+        record_usage(ROUTE_PROMPT_BUILDER, CLAUDE_MODEL_ID, normalize_usage(response_body.get("usage")))
         
-        response_body = json.loads(response["body"].read())
         generated_prompt = response_body.get("content", [{}])[0].get("text", "").strip()
         
         if len(generated_prompt) > 1024:
             generated_prompt = generated_prompt[:1021] + "..."
         
-        logger.info(f"[PromptBuilder] Generated prompt: {generated_prompt[:100]}...")
+        logger.debug("[PromptBuilder] Generated prompt: %s", summarize(generated_prompt, 100))
         
         return {
             "positive_prompt": generated_prompt,
             "negative_prompt": NEGATIVE_PROMPT
         }
+    except DeadlineExceeded:
+        raise
     except Exception as e:
-        logger.error(f"[PromptBuilder] Claude error: {e}")
+        if isinstance(e, CircuitOpenError):
+            logger.warning("[PromptBuilder] Claude circuit open, 일기 원문 기반 프롬프트 사용")
+        else:
+            logger.error("[PromptBuilder] Claude error: %s", e)
+        # prompt_fallback: Claude 없이 원문 일부로 만든 프롬프트임을 호출자에게 표시
+        state = _image_results.get()
+        if state is not None:
+            state["prompt_fallback"] = True
         return {
             "positive_prompt": f"A realistic documentary-style photo representing: {journal_text[:200]}",
-            "negative_prompt": NEGATIVE_PROMPT
+            "negative_prompt": NEGATIVE_PROMPT,
+            "prompt_fallback": True
         }
 
 
-def generate_image_with_nova(positive_prompt: str, negative_prompt: str = None) -> Dict[str, Any]:
-    """Nova Canvas로 이미지 생성"""
-    client = get_bedrock_client()
+def generate_image_with_nova(
+    positive_prompt: str,
+    negative_prompt: str = None,
+    seed: int = None,
+    tier: str = "final",
+) -> Dict[str, Any]:
+    """
+    Nova Canvas로 이미지 생성
     
-    seed = random.randint(0, 2147483647)
+    Args:
+        positive_prompt: 이미지 프롬프트
+        negative_prompt: 네거티브 프롬프트 (없으면 기본값)
+        seed: 생성 seed (없으면 랜덤). 미리보기와 같은 seed / prompt면 같은 구도로 렌더링
+        tier: "preview" (작은 해상도) 또는 "final" (1024x1280)
+    """
+    check_deadline("nova")
+    image_config = IMAGE_TIERS.get(tier, IMAGE_CONFIG)
+    if seed is None:
+        seed = random.randint(0, 2147483647)
     
     request_body = {
         "taskType": "TEXT_IMAGE",
@@ -155,48 +309,52 @@ def generate_image_with_nova(positive_prompt: str, negative_prompt: str = None)
             "negativeText": negative_prompt or NEGATIVE_PROMPT
         },
         "imageGenerationConfig": {
-            "cfgScale": IMAGE_CONFIG["cfg_scale"],
+            "cfgScale": image_config["cfg_scale"],
             "seed": seed,
-            "width": IMAGE_CONFIG["width"],
-            "height": IMAGE_CONFIG["height"],
-            "numberOfImages": IMAGE_CONFIG["number_of_images"]
+            "width": image_config["width"],
+            "height": image_config["height"],
+            "numberOfImages": image_config["number_of_images"]
         }
     }
     
     try:
-        logger.info(f"[ImageGenerator] Generating image with Nova Canvas (seed: {seed})...")
-        
-        response = client.invoke_model(
-            modelId=NOVA_CANVAS_MODEL_ID,
-            contentType="application/json",
-            accept="*/*",
-            body=json.dumps(request_body)
+        logger.info(
+            "[ImageGenerator] Generating %s image with Nova Canvas (seed: %d, %dx%d)",
+            tier, seed, image_config["width"], image_config["height"]
         )
         
-        response_body = json.loads(response["body"].read())
+        response_body = invoke_model_json(NOVA_CANVAS_MODEL_ID, request_body, accept="*/*")
         
         if not response_body.get("images"):
             return {"success": False, "error": "No images returned from Nova Canvas"}
         
+        record_images(
+            ROUTE_IMAGE, NOVA_CANVAS_MODEL_ID, len(response_body["images"]),
+            pixels=image_config["width"] * image_config["height"]
+        )
         image_base64 = response_body["images"][0]
         logger.info("[ImageGenerator] Image generated successfully")
         
         return {
             "success": True,
-            "image_base64": image_base64
+            "image_base64": image_base64,
+            "seed": seed,
+            "tier": tier,
+            "width": image_config["width"],
+            "height": image_config["height"]
         }
+    except DeadlineExceeded:
+        raise
     except Exception as e:
-        logger.error(f"[ImageGenerator] Nova Canvas error: {e}")
+        logger.error("[ImageGenerator] Nova Canvas error: %s", e)
         return {"success": False, "error": str(e)}
 
 
-def upload_to_s3(user_id: str, image_base64: str, record_date: str = None) -> Dict[str, str]:
+def build_s3_key(user_id: str, record_date: str = None) -> str:
     """
-    S3에 이미지 업로드
+    업로드 S3 키 생성
     경로: {user_id}/history/{년}/{월}/{일}/image_{timestamp}.png
     """
-    client = get_s3_client()
-    
     # record_date가 있으면 그 날짜 사용, 없으면 현재 시간
     if record_date:
         try:
@@ -211,27 +369,92 @@ def upload_to_s3(user_id: str, image_base64: str, record_date: str = None) -> Di
     day = dt.strftime("%d")
     timestamp = int(time.time() * 1000)
     
-    s3_key = f"{user_id}/history/{year}/{month}/{day}/image_{timestamp}.png"
+    return f"{user_id}/history/{year}/{month}/{day}/image_{timestamp}.png"
+
+
+def build_image_url(s3_key: str) -> str:
+    return f"https://{S3_BUCKET}.s3.{AWS_REGION}.amazonaws.com/{s3_key}"
+
+
+def upload_to_s3(user_id: str, image_base64: str, record_date: str = None) -> Dict[str, str]:
+    """
+    S3에 이미지 업로드 (JSON 본문의 image_base64)
+    경로: {user_id}/history/{년}/{월}/{일}/image_{timestamp}.png
+    S3_UPLOAD_MODE=write_behind이면 spool에 기록 후 바로 반환 (upload_status: pending)
+    """
+    client = get_s3_client()
+    s3_key = build_s3_key(user_id, record_date)
     
     try:
         image_bytes = base64.b64decode(image_base64)
         
-        client.put_object(
-            Bucket=S3_BUCKET,
-            Key=s3_key,
-            Body=image_bytes,
-            ContentType="image/png"
-        )
+        if write_behind_enabled():
+            get_uploader().submit(s3_key, data=image_bytes, content_type="image/png")
+            return {
+                "s3_key": s3_key,
+                "image_url": build_image_url(s3_key),
+                "upload_status": "pending"
+            }
+        
+        with get_breaker("s3").guard():
+            client.put_object(
+                Bucket=S3_BUCKET,
+                Key=s3_key,
+                Body=image_bytes,
+                ContentType="image/png"
+            )
         
-        image_url = f"https://{S3_BUCKET}.s3.{AWS_REGION}.amazonaws.com/{s3_key}"
-        logger.info(f"[S3] Uploaded: {s3_key}")
+        image_url = build_image_url(s3_key)
+        logger.info("[S3] Uploaded: %s", s3_key)
         
         return {
             "s3_key": s3_key,
             "image_url": image_url
         }
     except Exception as e:
-        logger.error(f"[S3] Upload error: {e}")
+        logger.error("[S3] Upload error: %s", e)
+        raise
+
+
+def upload_stream_to_s3(user_id: str, fileobj, record_date: str = None, content_type: str = "image/png") -> Dict[str, str]:
+    """
+    파일 객체를 S3에 스트리밍 업로드 (multipart / raw binary 요청용)
+    upload_fileobj가 청크 단위로 읽어 보내므로 이미지 전체를 메모리에 복사하지 않습니다.
+    
+    Args:
+        user_id: 사용자 ID (cognito_sub)
+        fileobj: 읽기 가능한 바이너리 파일 객체 (SpooledTemporaryFile 등)
+        record_date: 기록 날짜 (선택, ISO format)
+        content_type: 이미지 Content-Type
+    """
+    client = get_s3_client()
+    s3_key = build_s3_key(user_id, record_date)
+    
+    try:
+        if write_behind_enabled():
+            # 요청 본문 spool을 업로드 spool로 청크 단위 복사 (메모리 전체 복사 없음)
+            get_uploader().submit(s3_key, fileobj=fileobj, content_type=content_type)
+            return {
+                "s3_key": s3_key,
+                "image_url": build_image_url(s3_key),
+                "upload_status": "pending"
+            }
+        
+        with get_breaker("s3").guard():
+            client.upload_fileobj(
+                fileobj,
+                S3_BUCKET,
+                s3_key,
+                ExtraArgs={"ContentType": content_type}
+            )
+        logger.info("[S3] Uploaded (stream): %s", s3_key)
+        
+        return {
+            "s3_key": s3_key,
+            "image_url": build_image_url(s3_key)
+        }
+    except Exception as e:
+        logger.error("[S3] Upload error: %s", e)
         raise
 
 
@@ -240,43 +463,115 @@ def upload_to_s3(user_id: str, image_base64: str, record_date: str = None) -> Di
 # ============================================================================
 
 class ImageGeneratorTools:
-    """Image Generator Agent의 도구 모음 - DB 없이 동작"""
+    """
+    Image Generator Agent의 도구 모음 - DB 없이 동작
+    boto3(Bedrock, S3)는 async API가 없으므로 asyncio.to_thread로 실행해 이벤트 루프를 막지 않습니다.
+    """
     
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or {}
     
-    async def generate_image_from_text(self, text: str) -> Dict[str, Any]:
+    async def generate_image_from_text(self, text: str, tier: str = "preview") -> Dict[str, Any]:
         """
         텍스트에서 이미지 생성 (미리보기용, S3 업로드 X)
         
         Args:
             text: 일기 텍스트 (한글)
+            tier: "preview" (기본, 작은 해상도) 또는 "final"
         
         Returns:
             image_base64: 생성된 이미지 (base64)
             prompt: 사용된 프롬프트
+            seed: 생성 seed (히스토리에 추가할 때 같은 seed / prompt로 최종 해상도 렌더링)
         """
         try:
             # 1. Claude로 프롬프트 생성
-            prompt_result = generate_prompt_with_claude(text)
+            prompt_result = await asyncio.to_thread(generate_prompt_with_claude, text)
             
             # 2. Nova Canvas로 이미지 생성
-            image_result = generate_image_with_nova(
+            image_result = await asyncio.to_thread(
+                generate_image_with_nova,
                 prompt_result["positive_prompt"],
-                prompt_result["negative_prompt"]
+                prompt_result["negative_prompt"],
+                tier=tier
             )
             
             if not image_result["success"]:
                 return {"success": False, "error": image_result["error"]}
             
-            return {
+            # agent 응답 텍스트와 별도로 seed / prompt를 orchestrator 결과 필드로 전달
+            state = _image_results.get()
+            if state is not None:
+                state["preview"] = {
+                    "seed": image_result["seed"],
+                    "prompt": prompt_result["positive_prompt"],
+                    "negative_prompt": prompt_result["negative_prompt"]
+                }
+            
+            return _with_prompt_fallback({
                 "success": True,
                 "image_base64": image_result["image_base64"],
                 "prompt": {
                     "positive": prompt_result["positive_prompt"],
                     "negative": prompt_result["negative_prompt"]
-                }
+                },
+                "seed": image_result["seed"],
+                "tier": tier,
+                "width": image_result["width"],
+                "height": image_result["height"]
+            }, prompt_result)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    async def render_image_to_history(
+        self,
+        user_id: str,
+        positive_prompt: str,
+        seed: int,
+        negative_prompt: str = None,
+        record_date: str = None
+    ) -> Dict[str, Any]:
+        """
+        미리보기의 seed / prompt로 최종 해상도 이미지를 렌더링해서 S3에 업로드 (히스토리에 추가)
+        
+        Args:
+            user_id: 사용자 ID (cognito_sub)
+            positive_prompt: 미리보기에 사용된 프롬프트
+            seed: 미리보기 seed
+            negative_prompt: 미리보기에 사용된 네거티브 프롬프트 (선택)
+            record_date: 기록 날짜 (선택, ISO format)
+        
+        Returns:
+            s3_key: S3 키
+            image_url: 이미지 URL
+        """
+        try:
+            if not user_id:
+                return {"success": False, "error": "user_id is required"}
+            
+            if not positive_prompt or seed is None:
+                return {"success": False, "error": "prompt and seed are required"}
+            
+            image_result = await asyncio.to_thread(
+                generate_image_with_nova, positive_prompt, negative_prompt, seed=int(seed), tier="final"
+            )
+            if not image_result["success"]:
+                return {"success": False, "error": image_result["error"]}
+            
+            s3_result = await asyncio.to_thread(upload_to_s3, user_id, image_result["image_base64"], record_date)
+            
+            return {
+                "success": True,
+                "user_id": user_id,
+                "s3_key": s3_result["s3_key"],
+                "image_url": s3_result["image_url"],
+                "upload_status": s3_result.get("upload_status", "uploaded"),
+                "seed": image_result["seed"]
             }
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             return {"success": False, "error": str(e)}
     
@@ -300,27 +595,32 @@ class ImageGeneratorTools:
             if not image_base64:
                 return {"success": False, "error": "image_base64 is required"}
             
-            s3_result = upload_to_s3(user_id, image_base64, record_date)
+            s3_result = await asyncio.to_thread(upload_to_s3, user_id, image_base64, record_date)
             
             return {
                 "success": True,
                 "user_id": user_id,
                 "s3_key": s3_result["s3_key"],
-                "image_url": s3_result["image_url"]
+                "image_url": s3_result["image_url"],
+                "upload_status": s3_result.get("upload_status", "uploaded")
             }
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             return {"success": False, "error": str(e)}
     
     async def build_prompt_from_text(self, text: str) -> Dict[str, Any]:
         """프롬프트만 생성 (이미지 생성 없음)"""
         try:
-            prompt_result = generate_prompt_with_claude(text)
+            prompt_result = await asyncio.to_thread(generate_prompt_with_claude, text)
             
-            return {
+            return _with_prompt_fallback({
                 "success": True,
                 "positive_prompt": prompt_result["positive_prompt"],
                 "negative_prompt": prompt_result["negative_prompt"]
-            }
+            }, prompt_result)
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             return {"success": False, "error": str(e)}
     
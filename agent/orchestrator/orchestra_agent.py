@@ -1,6 +1,7 @@
 import json
 import logging
 import os
+import time
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, Dict, Optional
@@ -8,10 +9,8 @@ from typing import Any, Dict, Optional
 from pydantic import BaseModel, Field
 from strands import Agent
 
-from .summarize.agent import generate_auto_summarize
-from .question.agent import generate_auto_response
-from .image_generator.agent import run_image_generator
-from .weekly_report.agent import run_weekly_report
+# 하위 agent는 첫 사용 시 registry가 import (서버 cold start 단축)
+from .registry import get_async_orchestrator_tools, get_async_sub_agent, get_orchestrator_tools, get_sub_agent
 
 # Secrets Manager에서 설정 가져오기
 try:
@@ -44,13 +43,20 @@ except Exception as e:
     else:
         print(f"[Orchestra] 환경변수에서 Model ID 가져옴: {BEDROCK_MODEL_ARN}")
 
-# Configure the root strands logger
-logging.getLogger("strands").setLevel(logging.INFO)
-
-# Add a handler to see the logs
-logging.basicConfig(
-    format="%(levelname)s | %(name)s | %(message)s", handlers=[logging.StreamHandler()]
+from ..utils.model_routing import (
+    ROUTE_ROUTING,
+    agent_model_latency,
+    get_route_model,
+    get_route_model_id,
+    record_route_latency,
 )
+from ..utils.usage import agent_usage, record_usage
+from ..utils.log import redact_payload, summarize
+from ..utils.tracing import span
+from ..utils.deadline import DeadlineExceeded, DeadlineHook
+
+# 로그 레벨/핸들러는 utils.log.setup_logging에서 설정 (LOG_LEVEL, STRANDS_LOG_LEVEL)
+logger = logging.getLogger(__name__)
 
 
 ORCHESTRATOR_PROMPT = """
@@ -168,6 +174,192 @@ class OrchestratorResult(BaseModel):
     message: str = Field(description="응답 메시지")
 
 
+# image 결과에서 OrchestratorResult 밖으로 전달하는 필드 (히스토리에 추가할 때 seed / prompt 재사용)
+IMAGE_RESULT_FIELDS = ("prompt_fallback", "seed", "prompt", "negative_prompt")
+
+# request_type → (하위 agent 이름, 응답 type, 성공 메시지, 실패 시 기본 메시지)
+DIRECT_ROUTES = {
+    "image": ("image", "image", "이미지가 생성되었습니다.", "이미지 생성 중 오류가 발생했습니다."),
+    "question": ("question", "answer", "질문에 대한 답변입니다.", "답변 생성 중 오류가 발생했습니다."),
+    "summarize": ("summarize", "diary", "일기가 생성되었습니다.", "일기 생성 중 오류가 발생했습니다."),
+    "report": ("report", "report", "리포트가 생성되었습니다.", "리포트 생성 중 오류가 발생했습니다."),
+}
+
+
+def _direct_route_kwargs(
+    request_type: str,
+    user_input: str,
+    user_id: Optional[str],
+    current_date: Optional[str],
+    temperature: Optional[float],
+    text: Optional[str],
+    image_base64: Optional[str],
+    record_date: Optional[str],
+    seed: Optional[int],
+    image_prompt: Optional[str],
+) -> Dict[str, Any]:
+    """request_type별 하위 agent 진입 함수 인자"""
+    if request_type == "image":
+        return dict(
+            request=user_input,
+            user_id=user_id,
+            text=text,
+            image_base64=image_base64,
+            record_date=record_date,
+            seed=seed,
+            image_prompt=image_prompt
+        )
+    if request_type == "question":
+        return dict(question=user_input, user_id=user_id, current_date=current_date)
+    if request_type == "summarize":
+        return dict(content=user_input, temperature=temperature)
+    return dict(request=user_input, user_id=user_id)
+
+
+def _direct_route_result(request_type: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """하위 agent 결과를 OrchestratorResult 형식으로 변환 (question / summarize 결과에는 success가 없음)"""
+    name, result_type, message, error_message = DIRECT_ROUTES[request_type]
+    logger.debug(
+        "%s 결과: success=%s response=%s", name, result.get("success", True), summarize(result.get("response"))
+    )
+    if result.get("success", True):
+        direct_result = {
+            "type": result_type,
+            "content": result.get("response", ""),
+            "message": message
+        }
+        # 이미지 프롬프트가 Claude 없이 일기 원문으로 만들어진 경우(prompt_fallback)와 미리보기 seed / prompt
+        for key in IMAGE_RESULT_FIELDS:
+            if key in result:
+                direct_result[key] = result[key]
+        return direct_result
+    return {
+        "type": result_type,
+        "content": "",
+        "message": result.get("error", error_message)
+    }
+
+
+def _error_result(e: Exception) -> Dict[str, Any]:
+    return {
+        "type": "error",
+        "content": "",
+        "message": f"요청 처리 중 오류가 발생했습니다: {str(e)}"
+    }
+
+
+def is_failed_result(result: Dict[str, Any]) -> bool:
+    """
+    orchestrator 결과가 실패인지 확인합니다 (server / job 워커 / backfill / 벤치마크 공통).
+    하위 agent 실패는 예외 대신 HTTP 200과 함께 빈 content + 오류 메시지로 반환됩니다.
+    """
+    if result.get("type") == "error":
+        return True
+    return result.get("type") in ("image", "report") and not result.get("content")
+
+
+def _build_routing_prompt(
+    user_input: str,
+    user_id: Optional[str],
+    current_date: Optional[str],
+    temperature: Optional[float],
+    text: Optional[str],
+    image_base64: Optional[str],
+    record_date: Optional[str],
+    seed: Optional[int],
+    image_prompt: Optional[str],
+) -> str:
+    # orchestrator에게 요청 처리
+    prompt = f"""
+사용자 요청을 분석하고 적절한 tool을 호출하세요.
+
+<user_input>{user_input}</user_input>
+<request_type>자동 판단</request_type>
+"""
+    
+    # user_id 추가 (중요: tool 호출 시 반드시 전달)
+    if user_id:
+        prompt += f"\n<user_id>{user_id}</user_id>\n⚠️ 중요: generate_auto_response 호출 시 이 user_id를 반드시 전달하세요!"
+    
+    # current_date 추가 (중요: tool 호출 시 반드시 전달)
+    if current_date:
+        prompt += f"\n<current_date>{current_date}</current_date>\n⚠️ 중요: generate_auto_response 호출 시 이 current_date를 반드시 전달하세요!"
+    
+    # 이미지 생성 관련 파라미터 추가
+    if text:
+        prompt += f"\n<text>{text[:200]}...</text>\n⚠️ 중요: run_image_generator 호출 시 이 text를 반드시 전달하세요!"
+    
+    if image_base64:
+        prompt += f"\n<image_base64>제공됨 (길이: {len(image_base64)})</image_base64>\n⚠️ 중요: run_image_generator 호출 시 이 image_base64를 반드시 전달하세요!"
+    
+    if record_date:
+        prompt += f"\n<record_date>{record_date}</record_date>\n⚠️ 중요: run_image_generator 호출 시 이 record_date를 반드시 전달하세요!"
+    
+    if seed is not None and image_prompt:
+        prompt += f"\n<seed>{seed}</seed>\n<image_prompt>{image_prompt}</image_prompt>\n⚠️ 중요: run_image_generator 호출 시 이 seed와 image_prompt를 반드시 전달하세요!"
+    
+    # temperature 정보 추가
+    if temperature is not None:
+        prompt += f"\n<temperature>{temperature}</temperature>"
+    
+    return prompt
+
+
+def _new_orchestrator_agent(tools) -> Agent:
+    # 각 요청마다 새로운 Agent 생성 (라우팅 분류는 routing 라우트 모델 사용)
+    routing_model = get_route_model(ROUTE_ROUTING)
+    return Agent(
+        model=routing_model or BEDROCK_MODEL_ARN,
+        tools=tools,
+        system_prompt=ORCHESTRATOR_PROMPT,
+        callback_handler=None,
+        hooks=[DeadlineHook()],
+    )
+
+
+def _track_image_results():
+    # AI 라우팅은 get_orchestrator_tools가 하위 agent를 모두 로드하므로 여기서 import해도 추가 비용 없음
+    from .image_generator.tools import track_image_results
+
+    return track_image_results()
+
+
+def _finish_routing(
+    orchestrator_agent: Agent,
+    result: Any,
+    start: float,
+    routing_model_id: str,
+    image_results: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    # 라우팅 지연시간: tool(하위 agent) 실행 시간을 제외한 모델 호출 시간
+    routing_latency = agent_model_latency(orchestrator_agent)
+    record_route_latency(
+        ROUTE_ROUTING,
+        routing_model_id,
+        routing_latency if routing_latency is not None else time.perf_counter() - start,
+    )
+    record_usage(ROUTE_ROUTING, routing_model_id, agent_usage(orchestrator_agent))
+
+    # Pydantic 모델을 dict로 변환
+    if hasattr(result, "model_dump"):
+        result_dict = result.model_dump()
+    elif hasattr(result, "dict"):
+        result_dict = result.dict()
+    else:
+        result_dict = result
+    if image_results is not None:
+        from .image_generator.tools import image_result_fields
+
+        # structured output에는 없는 필드: fallback 프롬프트 사용 여부, 미리보기 seed / prompt
+        result_dict.update(image_result_fields(image_results))
+
+    logger.debug("orchestrate_request 완료: type=%s", result_dict.get("type"))
+    return result_dict
+
+
+STRUCTURED_OUTPUT_PROMPT = "사용자 요청에 대한 처리 결과를 구조화된 형태로 추출하시오"
+
+
 def orchestrate_request(
     user_input: str,
     user_id: Optional[str] = None,
@@ -177,6 +369,8 @@ def orchestrate_request(
     text: Optional[str] = None,
     image_base64: Optional[str] = None,
     record_date: Optional[str] = None,
+    seed: Optional[int] = None,
+    image_prompt: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     사용자 요청을 분석하여 적절한 agent로 라우팅하는 메인 함수
@@ -191,6 +385,8 @@ def orchestrate_request(
         text (Optional[str]): 이미지 생성용 일기 텍스트
         image_base64 (Optional[str]): S3 업로드용 이미지 (base64)
         record_date (Optional[str]): S3 업로드용 날짜
+        seed (Optional[int]): 미리보기 seed (히스토리에 추가 시 최종 해상도 렌더링용)
+        image_prompt (Optional[str]): 미리보기 prompt (seed와 함께 사용)
 
     Returns:
         Dict[str, Any]: 처리 결과
@@ -200,186 +396,103 @@ def orchestrate_request(
             - message: 응답 메시지
     """
     
-    print(f"[DEBUG] ========== orchestrate_request 시작 ==========")
-    print(f"[DEBUG] request_type: {request_type}")
-    print(f"[DEBUG] user_input: {user_input[:100]}...")
+    logger.debug("orchestrate_request 시작: request_type=%s user_input=%s", request_type, summarize(user_input, 100))
     
     # ============================================================================
     # DIRECT ROUTING: request_type이 명시된 경우 AI 없이 직접 라우팅
     # ============================================================================
     if request_type:
-        print(f"[DEBUG] ========== DIRECT ROUTING ==========")
-        print(f"[DEBUG] request_type: {request_type}")
+        logger.debug("DIRECT ROUTING: request_type=%s", request_type)
         
-        try:
-            if request_type == "image":
-                # 이미지 생성 직접 호출 (Orchestrator AI 우회)
-                print(f"[DEBUG] request_type=image 감지, run_image_generator 직접 호출")
-                print(f"[DEBUG]   user_input: {user_input[:100]}...")
-                print(f"[DEBUG]   text: {text[:50] if text else None}...")
-                print(f"[DEBUG]   user_id: {user_id}")
-                print(f"[DEBUG]   image_base64: {'<provided>' if image_base64 else None}")
-                print(f"[DEBUG]   record_date: {record_date}")
-                
-                result = run_image_generator(
-                    request=user_input,
-                    user_id=user_id,
-                    text=text,
-                    image_base64=image_base64,
-                    record_date=record_date
-                )
-                print(f"[DEBUG] run_image_generator 결과: {result}")
-                
-                # OrchestratorResult 형식으로 변환
-                if result.get("success"):
-                    return {
-                        "type": "image",
-                        "content": result.get("response", ""),
-                        "message": "이미지가 생성되었습니다."
-                    }
-                else:
-                    return {
-                        "type": "image",
-                        "content": "",
-                        "message": result.get("error", "이미지 생성 중 오류가 발생했습니다.")
-                    }
-            
-            elif request_type == "question":
-                # 질문 답변 직접 호출 (Orchestrator AI 우회)
-                print(f"[DEBUG] request_type=question 감지, generate_auto_response 직접 호출")
-                print(f"[DEBUG]   question: {user_input[:100]}...")
-                print(f"[DEBUG]   user_id: {user_id}")
-                print(f"[DEBUG]   current_date: {current_date}")
-                
-                result = generate_auto_response(
-                    question=user_input,
-                    user_id=user_id,
-                    current_date=current_date
-                )
-                print(f"[DEBUG] generate_auto_response 결과: {result}")
-                
-                return {
-                    "type": "answer",
-                    "content": result.get("response", ""),
-                    "message": "질문에 대한 답변입니다."
-                }
-            
-            elif request_type == "summarize":
-                # 일기 생성 직접 호출 (Orchestrator AI 우회)
-                print(f"[DEBUG] request_type=summarize 감지, generate_auto_summarize 직접 호출")
-                print(f"[DEBUG]   content: {user_input[:100]}...")
-                print(f"[DEBUG]   temperature: {temperature}")
-                
-                result = generate_auto_summarize(
-                    content=user_input,
-                    temperature=temperature
+        if request_type in DIRECT_ROUTES:
+            try:
+                kwargs = _direct_route_kwargs(
+                    request_type, user_input, user_id, current_date, temperature,
+                    text, image_base64, record_date, seed, image_prompt
                 )
-                print(f"[DEBUG] generate_auto_summarize 결과: {result}")
-                
-                return {
-                    "type": "diary",
-                    "content": result.get("response", ""),
-                    "message": "일기가 생성되었습니다."
-                }
-            
-            elif request_type == "report":
-                # 주간 리포트 직접 호출 (Orchestrator AI 우회)
-                print(f"[DEBUG] request_type=report 감지, run_weekly_report 직접 호출")
-                print(f"[DEBUG]   request: {user_input[:100]}...")
-                print(f"[DEBUG]   user_id: {user_id}")
-                
-                result = run_weekly_report(
-                    request=user_input,
-                    user_id=user_id
-                )
-                print(f"[DEBUG] run_weekly_report 결과: {result}")
-                
-                if result.get("success"):
-                    return {
-                        "type": "report",
-                        "content": result.get("response", ""),
-                        "message": "리포트가 생성되었습니다."
-                    }
-                else:
-                    return {
-                        "type": "report",
-                        "content": "",
-                        "message": result.get("error", "리포트 생성 중 오류가 발생했습니다.")
-                    }
-            
-            else:
-                print(f"[WARNING] Unknown request_type: {request_type}, falling back to AI routing")
+                logger.debug("%s 직접 호출: %s", DIRECT_ROUTES[request_type][0], redact_payload(kwargs))
+                result = get_sub_agent(DIRECT_ROUTES[request_type][0])(**kwargs)
+                return _direct_route_result(request_type, result)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                logger.exception("Direct routing failed: %s", e)
+                return _error_result(e)
         
-        except Exception as e:
-            print(f"[ERROR] Direct routing failed: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return {
-                "type": "error",
-                "content": "",
-                "message": f"요청 처리 중 오류가 발생했습니다: {str(e)}"
-            }
+        logger.warning("Unknown request_type: %s, falling back to AI routing", request_type)
     
     # ============================================================================
     # AI ROUTING: request_type이 None인 경우에만 AI가 판단
     # ============================================================================
-    print(f"[DEBUG] Using AI routing (request_type is None)")
+    logger.debug("Using AI routing (request_type is None)")
     
-    # 각 요청마다 새로운 Agent 생성
-    orchestrator_agent = Agent(
-        model=BEDROCK_MODEL_ARN,
-        tools=[
-            generate_auto_summarize,
-            generate_auto_response,
-            run_image_generator,
-            run_weekly_report,
-        ],
-        system_prompt=ORCHESTRATOR_PROMPT,
+    orchestrator_agent = _new_orchestrator_agent(get_orchestrator_tools())
+    prompt = _build_routing_prompt(
+        user_input, user_id, current_date, temperature, text, image_base64, record_date, seed, image_prompt
     )
+    
+    start = time.perf_counter()
+    routing_model_id = get_route_model_id(ROUTE_ROUTING) or BEDROCK_MODEL_ARN
+    # 하위 agent(tool) 호출은 이 span의 자식 span으로 기록됨
+    with span("routing", model_id=routing_model_id), _track_image_results() as image_results:
+        orchestrator_agent(prompt)
 
-    # orchestrator에게 요청 처리
-    prompt = f"""
-사용자 요청을 분석하고 적절한 tool을 호출하세요.
+        result = orchestrator_agent.structured_output(OrchestratorResult, STRUCTURED_OUTPUT_PROMPT)
 
-<user_input>{user_input}</user_input>
-<request_type>자동 판단</request_type>
-"""
-    
-    # user_id 추가 (중요: tool 호출 시 반드시 전달)
-    if user_id:
-        prompt += f"\n<user_id>{user_id}</user_id>\n⚠️ 중요: generate_auto_response 호출 시 이 user_id를 반드시 전달하세요!"
-    
-    # current_date 추가 (중요: tool 호출 시 반드시 전달)
-    if current_date:
-        prompt += f"\n<current_date>{current_date}</current_date>\n⚠️ 중요: generate_auto_response 호출 시 이 current_date를 반드시 전달하세요!"
-    
-    # 이미지 생성 관련 파라미터 추가
-    if text:
-        prompt += f"\n<text>{text[:200]}...</text>\n⚠️ 중요: run_image_generator 호출 시 이 text를 반드시 전달하세요!"
-    
-    if image_base64:
-        prompt += f"\n<image_base64>제공됨 (길이: {len(image_base64)})</image_base64>\n⚠️ 중요: run_image_generator 호출 시 이 image_base64를 반드시 전달하세요!"
+    return _finish_routing(orchestrator_agent, result, start, routing_model_id, image_results)
+
+
+async def orchestrate_request_async(
+    user_input: str,
+    user_id: Optional[str] = None,
+    current_date: Optional[str] = None,
+    request_type: Optional[str] = None,
+    temperature: Optional[float] = None,
+    text: Optional[str] = None,
+    image_base64: Optional[str] = None,
+    record_date: Optional[str] = None,
+    seed: Optional[int] = None,
+    image_prompt: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    orchestrate_request의 async 버전 (인자와 반환값 동일)
+    하위 agent와 tool을 Strands async API(invoke_async / structured_output_async)로 실행해
+    LLM 응답을 기다리는 동안 스레드를 점유하지 않습니다.
+    """
+    logger.debug("orchestrate_request_async 시작: request_type=%s user_input=%s", request_type, summarize(user_input, 100))
     
-    if record_date:
-        prompt += f"\n<record_date>{record_date}</record_date>\n⚠️ 중요: run_image_generator 호출 시 이 record_date를 반드시 전달하세요!"
+    if request_type:
+        logger.debug("DIRECT ROUTING: request_type=%s", request_type)
+        
+        if request_type in DIRECT_ROUTES:
+            try:
+                kwargs = _direct_route_kwargs(
+                    request_type, user_input, user_id, current_date, temperature,
+                    text, image_base64, record_date, seed, image_prompt
+                )
+                logger.debug("%s 직접 호출: %s", DIRECT_ROUTES[request_type][0], redact_payload(kwargs))
+                result = await get_async_sub_agent(DIRECT_ROUTES[request_type][0])(**kwargs)
+                return _direct_route_result(request_type, result)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                logger.exception("Direct routing failed: %s", e)
+                return _error_result(e)
+        
+        logger.warning("Unknown request_type: %s, falling back to AI routing", request_type)
     
-    # temperature 정보 추가
-    if temperature is not None:
-        prompt += f"\n<temperature>{temperature}</temperature>"
+    logger.debug("Using AI routing (request_type is None)")
     
-    orchestrator_agent(prompt)
-
-    result = orchestrator_agent.structured_output(
-        OrchestratorResult, "사용자 요청에 대한 처리 결과를 구조화된 형태로 추출하시오"
+    orchestrator_agent = _new_orchestrator_agent(get_async_orchestrator_tools())
+    prompt = _build_routing_prompt(
+        user_input, user_id, current_date, temperature, text, image_base64, record_date, seed, image_prompt
     )
+    
+    start = time.perf_counter()
+    routing_model_id = get_route_model_id(ROUTE_ROUTING) or BEDROCK_MODEL_ARN
+    with span("routing", model_id=routing_model_id), _track_image_results() as image_results:
+        await orchestrator_agent.invoke_async(prompt)
 
-    # Pydantic 모델을 dict로 변환
-    if hasattr(result, "model_dump"):
-        result_dict = result.model_dump()
-    elif hasattr(result, "dict"):
-        result_dict = result.dict()
-    else:
-        result_dict = result
+        result = await orchestrator_agent.structured_output_async(OrchestratorResult, STRUCTURED_OUTPUT_PROMPT)
 
-    print(f"[DEBUG] ========== orchestrate_request 완료 ==========")
-    return result_dict
+    return _finish_routing(orchestrator_agent, result, start, routing_model_id, image_results)
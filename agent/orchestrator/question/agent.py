@@ -4,8 +4,18 @@ import os
 from typing import Any, Dict, List
 
 from strands import Agent, tool
+from strands.tools import PythonAgentTool
 from strands_tools import retrieve
 
+from agent.utils.model_routing import ROUTE_ANSWER, get_route_model, get_route_model_id, track_route_latency
+from agent.utils.usage import agent_usage, record_usage
+from agent.utils.log import summarize
+from agent.utils.circuit_breaker import get_breaker
+from agent.utils.deadline import DeadlineExceeded, DeadlineHook
+from agent.utils.hedging import hedged_call
+
+logger = logging.getLogger(__name__)
+
 # Secrets Manager에서 설정 가져오기
 try:
     from agent.utils.secrets import get_config
@@ -70,6 +80,82 @@ SELLER_ANSWER_PROMPT = """
 단, 공손한 톤이어야 합니다. 
 """
 
+# 요청마다 동일한 system prompt (prompt caching 대상 prefix)
+# user_id, 날짜 같은 요청별 값은 system prompt가 아닌 사용자 메시지에 넣습니다
+CACHED_SYSTEM_PROMPT = RESPONSE_SYSTEM_PROMPT + f"\nSELLER_ANSWER_PROMPT: {SELLER_ANSWER_PROMPT}"
+
+def _guarded_retrieve(tool, **kwargs):
+    # circuit이 열려 있으면 Knowledge Base를 호출하지 않고 바로 오류 결과 반환
+    breaker = get_breaker("kb_retrieve")
+    if not breaker.allow():
+        return {
+            "toolUseId": tool["toolUseId"],
+            "status": "error",
+            "content": [{"text": "Knowledge Base 검색을 일시적으로 사용할 수 없습니다."}],
+        }
+    try:
+        # KB retrieve는 조회만 하므로 느린 호출은 HEDGE_CALLS에 kb_retrieve가 있으면 한 번 더 보냄
+        result = hedged_call("kb_retrieve", retrieve.retrieve, tool, **kwargs)
+    except BaseException as e:
+        breaker.record_error(e)
+        raise
+    # retrieve는 예외 대신 status: error 결과를 반환
+    if result.get("status") == "error":
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return result
+
+
+# strands_tools.retrieve와 같은 spec / 이름의 tool (호출만 circuit breaker / hedged_call로 감쌈)
+RETRIEVE_TOOL = PythonAgentTool("retrieve", retrieve.TOOL_SPEC, _guarded_retrieve)
+
+
+def _new_response_agent() -> Agent:
+    """retrieve tool을 가진 답변 agent (system prompt는 고정 prefix만 사용)"""
+    return Agent(
+        model=get_route_model(ROUTE_ANSWER),
+        tools=[RETRIEVE_TOOL],
+        system_prompt=CACHED_SYSTEM_PROMPT,
+        callback_handler=None,
+        hooks=[DeadlineHook()],
+    )
+
+
+def _build_search_query(question: str, user_id: str = None, current_date: str = None) -> str:
+    """검색 쿼리 구성 (user_id, 날짜 등 요청별 값은 여기에만 포함)"""
+    return f"""
+당신은 반드시 retrieve 도구를 사용하여 지식베이스를 검색해야 합니다.
+
+검색 조건:
+- 사용자 ID: {user_id if user_id else '미제공'}
+- 현재 날짜: {current_date if current_date else '미제공'}
+- 질문: {question}
+
+지금 즉시 retrieve 도구를 호출하여 관련 정보를 검색하세요.
+검색 결과를 바탕으로만 답변하세요.
+검색 결과가 없으면 "해당 날짜의 일기 기록을 찾을 수 없습니다"라고 답변하세요.
+"""
+
+
+def _knowledge_base_id() -> str:
+    # 환경변수 확인 (이미 모듈 로드 시 검증되었지만 재확인)
+    kb_id = os.environ.get('KNOWLEDGE_BASE_ID', '')
+    
+    # 이 시점에서는 이미 모듈 로드 시 검증되었으므로 비어있을 수 없음
+    if not kb_id:
+        logger.error("CRITICAL: KNOWLEDGE_BASE_ID가 런타임에 비어있습니다!")
+    return kb_id
+
+
+def _log_result(agent: Agent, result: Dict[str, Any]) -> None:
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "generate_auto_response 완료: tool_results=%d response=%s",
+            len(filter_tool_result(agent)), summarize(result["response"])
+        )
+
+
 @tool
 def generate_auto_response(question: str, user_id: str = None, current_date: str = None) -> Dict[str, Any]:
     """
@@ -84,73 +170,67 @@ def generate_auto_response(question: str, user_id: str = None, current_date: str
         Dict[str, Any]: 생성한 답변
     """
     
-    print(f"[DEBUG] ========== generate_auto_response 호출 ==========")
-    print(f"[DEBUG] question: {question}")
-    print(f"[DEBUG] user_id: {user_id}")
-    print(f"[DEBUG] current_date: {current_date}")
-    
-    # 환경변수 확인 (이미 모듈 로드 시 검증되었지만 재확인)
-    kb_id = os.environ.get('KNOWLEDGE_BASE_ID', '')
-    aws_region = os.environ.get('AWS_REGION', '')
-    print(f"[DEBUG] KNOWLEDGE_BASE_ID from env: {kb_id}")
-    print(f"[DEBUG] AWS_REGION from env: {aws_region}")
+    logger.debug("generate_auto_response 호출: question=%s current_date=%s", summarize(question, 100), current_date)
     
-    # 이 시점에서는 이미 모듈 로드 시 검증되었으므로 비어있을 수 없음
-    if not kb_id:
-        print(f"[ERROR] CRITICAL: KNOWLEDGE_BASE_ID가 런타임에 비어있습니다!")
+    if not _knowledge_base_id():
         return {"response": "Knowledge Base 설정 오류. 시스템 관리자에게 문의하세요."}
 
     try:
-        # system prompt 구성
-        system_prompt = RESPONSE_SYSTEM_PROMPT + f"\nSELLER_ANSWER_PROMPT: {SELLER_ANSWER_PROMPT}"
+        # Agent 생성 (retrieve tool 포함)
+        auto_response_agent = _new_response_agent()
+        search_query = _build_search_query(question, user_id, current_date)
+        
+        with track_route_latency(ROUTE_ANSWER, get_route_model_id(ROUTE_ANSWER)):
+            response = auto_response_agent(search_query)
+        record_usage(ROUTE_ANSWER, get_route_model_id(ROUTE_ANSWER), agent_usage(auto_response_agent))
         
-        if user_id:
-            system_prompt += f"\n\n<context>\n사용자 ID: {user_id}\n"
-        if current_date:
-            system_prompt += f"현재 날짜: {current_date}\n</context>"
+        # 결과 반환
+        result = {"response": str(response)}
+        _log_result(auto_response_agent, result)
+        return result
+        
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.exception("generate_auto_response 실패: %s: %s", type(e).__name__, e)
+        return {"response": f"답변 생성 중 오류가 발생했습니다: {str(e)}"}
 
-        # Agent 생성 (retrieve tool 포함)
-        print(f"[DEBUG] Creating Agent with retrieve tool...")
-        auto_response_agent = Agent(
-            tools=[retrieve],
-            system_prompt=system_prompt,
-        )
 
-        # 검색 쿼리 구성
-        search_query = f"""
-당신은 반드시 retrieve 도구를 사용하여 지식베이스를 검색해야 합니다.
+@tool(name="generate_auto_response")
+async def generate_auto_response_async(question: str, user_id: str = None, current_date: str = None) -> Dict[str, Any]:
+    """
+    질문에 대한 답변을 생성하는 메인 함수
 
-검색 조건:
-- 사용자 ID: {user_id if user_id else '미제공'}
-- 현재 날짜: {current_date if current_date else '미제공'}
-- 질문: {question}
+    Args:
+        question (str): 사용자의 질문
+        user_id (str): 사용자 ID (Knowledge Base 검색 필터용)
+        current_date (str): 현재 날짜 (검색 컨텍스트용)
 
-지금 즉시 retrieve 도구를 호출하여 관련 정보를 검색하세요.
-검색 결과를 바탕으로만 답변하세요.
-검색 결과가 없으면 "해당 날짜의 일기 기록을 찾을 수 없습니다"라고 답변하세요.
-"""
+    Returns:
+        Dict[str, Any]: 생성한 답변
+    """
+    logger.debug("generate_auto_response(async) 호출: question=%s current_date=%s", summarize(question, 100), current_date)
+    
+    if not _knowledge_base_id():
+        return {"response": "Knowledge Base 설정 오류. 시스템 관리자에게 문의하세요."}
+
+    try:
+        # retrieve(boto3)는 sync tool이라 Strands가 별도 스레드에서 실행
+        auto_response_agent = _new_response_agent()
+        search_query = _build_search_query(question, user_id, current_date)
         
-        print(f"[DEBUG] Calling agent with retrieve tool...")
-        response = auto_response_agent(search_query)
+        with track_route_latency(ROUTE_ANSWER, get_route_model_id(ROUTE_ANSWER)):
+            response = await auto_response_agent.invoke_async(search_query)
+        record_usage(ROUTE_ANSWER, get_route_model_id(ROUTE_ANSWER), agent_usage(auto_response_agent))
         
-        print(f"[DEBUG] Agent 응답 완료")
-        print(f"[DEBUG] Response: {str(response)[:200]}...")
-
-        # tool_result 추출
-        tool_results = filter_tool_result(auto_response_agent)
-        print(f"[DEBUG] Tool results count: {len(tool_results)}")
-
-        # 결과 반환
         result = {"response": str(response)}
-        print(f"[DEBUG] ========== generate_auto_response 완료 ==========")
+        _log_result(auto_response_agent, result)
         return result
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
-        print(f"[ERROR] ========== generate_auto_response 실패 ==========")
-        print(f"[ERROR] Exception type: {type(e).__name__}")
-        print(f"[ERROR] Exception message: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("generate_auto_response 실패: %s: %s", type(e).__name__, e)
         return {"response": f"답변 생성 중 오류가 발생했습니다: {str(e)}"}
 
 def filter_tool_result(agent: Agent) -> List:
@@ -0,0 +1,115 @@
+"""
+Sub-Agent Registry
+하위 agent 모듈을 처음 사용할 때 import하는 지연 로딩 레지스트리
+
+image_generator / weekly_report 모듈은 import 시점에 BedrockModel과 Agent를 생성하므로
+서버 시작 경로에서 제외하고, 첫 요청 또는 백그라운드 warm-up(warmup.py)에서 로드합니다.
+"""
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from agent.utils.lanes import LaneTool, lane_for
+
+# 이름 → (모듈 경로, 진입 함수 이름)
+# 각 모듈은 async 경로용 진입 함수 "<진입 함수 이름>_async"도 제공 (같은 tool 이름으로 등록)
+SUB_AGENTS = {
+    "summarize": (".summarize.agent", "generate_auto_summarize"),
+    "question": (".question.agent", "generate_auto_response"),
+    "image": (".image_generator.agent", "run_image_generator"),
+    "report": (".weekly_report.agent", "run_weekly_report"),
+}
+
+logger = logging.getLogger(__name__)
+
+ASYNC_SUFFIX = "_async"
+
+_loaded: Dict[str, Callable[..., Any]] = {}
+_loaded_async: Dict[str, Callable[..., Any]] = {}
+_load_times: Dict[str, float] = {}
+_lock = threading.Lock()
+
+
+def get_sub_agent(name: str) -> Callable[..., Any]:
+    """
+    하위 agent 진입 함수(strands tool)를 반환합니다. 처음 호출 시 모듈을 import합니다.
+
+    Args:
+        name: SUB_AGENTS의 키 ('summarize', 'question', 'image', 'report')
+
+    Returns:
+        하위 agent 진입 함수 (@tool 데코레이터가 적용된 함수)
+    """
+    entry = _loaded.get(name)
+    if entry is not None:
+        return entry
+
+    if name not in SUB_AGENTS:
+        raise KeyError(f"등록되지 않은 sub-agent입니다: {name}")
+
+    with _lock:
+        if name not in _loaded:
+            module_path, attr = SUB_AGENTS[name]
+            start = time.perf_counter()
+            module = importlib.import_module(module_path, package=__package__)
+            _loaded_async[name] = getattr(module, attr + ASYNC_SUFFIX)
+            _loaded[name] = getattr(module, attr)
+            _load_times[name] = time.perf_counter() - start
+            logger.info("[Registry] %s sub-agent 로드 완료 (%.0fms)", name, _load_times[name] * 1000)
+    return _loaded[name]
+
+
+def get_async_sub_agent(name: str) -> Callable[..., Any]:
+    """
+    하위 agent의 async 진입 함수(async strands tool)를 반환합니다. 처음 호출 시 모듈을 import합니다.
+
+    Args:
+        name: SUB_AGENTS의 키
+
+    Returns:
+        await로 호출하는 하위 agent 진입 함수
+    """
+    get_sub_agent(name)
+    return _loaded_async[name]
+
+
+def get_orchestrator_tools() -> List[Callable[..., Any]]:
+    """
+    AI 라우팅용 orchestrator agent에 전달할 전체 하위 agent tool 목록을 반환합니다.
+    각 tool은 요청의 lane slot을 하위 agent의 lane으로 옮깁니다 (LaneTool, 요청이 끝날 때 반납).
+    """
+    return [LaneTool(get_sub_agent(name), lane_for(name)) for name in SUB_AGENTS]
+
+
+def get_async_orchestrator_tools() -> List[Callable[..., Any]]:
+    """async 경로의 orchestrator agent에 전달할 하위 agent tool 목록 (tool 이름은 sync와 동일)"""
+    return [LaneTool(get_async_sub_agent(name), lane_for(name)) for name in SUB_AGENTS]
+
+
+def loaded_sub_agents() -> Dict[str, float]:
+    """로드된 하위 agent와 로드 소요 시간(초)을 반환합니다."""
+    return dict(_load_times)
+
+
+def warm_up(names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    하위 agent를 미리 로드합니다. 실패한 agent는 건너뛰고 결과에 에러를 기록합니다.
+
+    Args:
+        names: 로드할 하위 agent 이름 목록 (None이면 전체)
+
+    Returns:
+        {name: 로드 시간(초) 또는 에러 메시지}
+    """
+    result = {}
+    for name in names or SUB_AGENTS:
+        try:
+            get_sub_agent(name)
+            result[name] = _load_times.get(name, 0.0)
+        except Exception as e:
+            logger.warning("[Registry] %s sub-agent 로드 실패: %s", name, e)
+            result[name] = f"error: {str(e)}"
+    return result
+
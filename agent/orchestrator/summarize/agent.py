@@ -5,6 +5,11 @@ from typing import Any, Dict, List, Optional
 
 from strands import Agent, tool
 
+from agent.utils.model_routing import ROUTE_DIARY, get_route_model, get_route_model_id, track_route_latency
+from agent.utils.usage import agent_usage, record_usage
+from agent.utils.deadline import DeadlineHook
+from agent.utils.hedging import hedged_call, hedged_call_async
+
 # Configure the root strands logger
 #logging.getLogger("strands").setLevel(logging.INFO)
 
@@ -48,6 +53,33 @@ SELLER_ANSWER_PROMPT = """
 일기 형식으로 작성하고, 줄글 형식, 1인칭 시점으로 일기를 작성해야 합니다.
 """
 
+def _new_summarize_agent() -> Agent:
+    return Agent(
+        model=get_route_model(ROUTE_DIARY),
+        system_prompt=summarize_SYSTEM_PROMPT
+        + f"""
+        SELLER_ANSWER_PROMPT: {SELLER_ANSWER_PROMPT}
+        """,
+        callback_handler=None,
+        hooks=[DeadlineHook()],
+    )
+
+
+def _summarize(content: str) -> str:
+    # hedge 호출마다 별도 Agent (대화 기록을 공유하지 않도록), 사용량은 실제 호출한 만큼 기록
+    agent = _new_summarize_agent()
+    response = agent(content)
+    record_usage(ROUTE_DIARY, get_route_model_id(ROUTE_DIARY), agent_usage(agent))
+    return str(response)
+
+
+async def _summarize_async(content: str) -> str:
+    agent = _new_summarize_agent()
+    response = await agent.invoke_async(content)
+    record_usage(ROUTE_DIARY, get_route_model_id(ROUTE_DIARY), agent_usage(agent))
+    return str(response)
+
+
 @tool
 def generate_auto_summarize(
     content: str,
@@ -66,17 +98,33 @@ def generate_auto_summarize(
         Dict[str, Any]: 요약된 일기 텍스트
     """
 
-    # 각 요청마다 새로운 Agent 생성
-    auto_response_agent = Agent(
-        system_prompt=summarize_SYSTEM_PROMPT
-        + f"""
-        SELLER_ANSWER_PROMPT: {SELLER_ANSWER_PROMPT}
-        """,
-    )
-
-    # 리뷰에 대한 자동 응답 생성
-    response = auto_response_agent(content)
+    # 리뷰에 대한 자동 응답 생성 (각 요청마다 새로운 Agent, 느리면 hedge)
+    with track_route_latency(ROUTE_DIARY, get_route_model_id(ROUTE_DIARY)):
+        response = hedged_call("diary", _summarize, content)
 
     # 결과 반환 - tool_results를 포함
-    result = {"response": str(response)}#, "tool_results": tool_results}
-    return result
\ No newline at end of file
+    result = {"response": response}#, "tool_results": tool_results}
+    return result
+
+
+@tool(name="generate_auto_summarize")
+async def generate_auto_summarize_async(
+    content: str,
+    temperature: Optional[float] = None,
+    top_k: int = 50
+) -> Dict[str, Any]:
+    """
+    질문에 대한 답변을 생성하는 메인 함수
+
+    Args:
+        content (str): 분석할 내용
+        temperature: 응답의 무작위성 (0.0 ~ 1.0, 낮을수록 일관된 응답)
+        top_k: 상위 K개 토큰에서 샘플링 (기본값: 50)
+
+    Returns:
+        Dict[str, Any]: 요약된 일기 텍스트
+    """
+    with track_route_latency(ROUTE_DIARY, get_route_model_id(ROUTE_DIARY)):
+        response = await hedged_call_async("diary", _summarize_async, content)
+
+    return {"response": response}
@@ -0,0 +1,208 @@
+"""
+Runtime Warm-up
+서버가 요청을 받기 전에 첫 요청이 치르는 비용(모듈 import, BedrockModel 생성,
+TLS handshake)을 미리 처리하고 readiness 상태를 관리합니다.
+
+단계:
+1. sub_agents  - 하위 agent 모듈 로드 (SUBAGENT_WARMUP, 실패 시 not ready)
+2. models      - 라우트별 BedrockModel 생성
+3. connections - S3 / bedrock-runtime / API_BASE_URL 커넥션 풀 미리 열기 (WARMUP_CONNECTIONS,
+                 async 모드는 서버 이벤트 루프의 AsyncClient, thread 모드는 공유 httpx.Client)
+4. model_call  - 라우트 모델별 1토큰 호출 (WARMUP_MODEL_CALL, 기본 off)
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from .registry import warm_up as warm_up_sub_agents
+from agent.utils.model_routing import ROUTES, get_route_model, get_route_model_id, get_route_model_table
+
+logger = logging.getLogger(__name__)
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).lower() in ("1", "true", "yes")
+
+
+SUBAGENT_WARMUP = _env_flag("SUBAGENT_WARMUP", "true")
+WARMUP_CONNECTIONS = _env_flag("WARMUP_CONNECTIONS", "true")
+WARMUP_MODEL_CALL = _env_flag("WARMUP_MODEL_CALL", "false")
+
+# 상태: pending → warming → ready | failed
+_state: Dict[str, Any] = {
+    "status": "pending",
+    "phases": {},
+    "started_at": None,
+    "finished_at": None,
+}
+_state_lock = threading.Lock()
+
+
+def _run_phase(name: str, func, fatal: bool = False) -> bool:
+    start = time.perf_counter()
+    try:
+        detail = func()
+        ok = True
+    except Exception as e:
+        detail = f"error: {str(e)}"
+        ok = False
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    with _state_lock:
+        _state["phases"][name] = {"ok": ok, "fatal": fatal, "elapsed_ms": elapsed_ms, "detail": detail}
+    logger.info("[Warmup] %s: %s (%.0fms) %s", name, "ok" if ok else "failed", elapsed_ms, detail)
+    return ok or not fatal
+
+
+def _warm_sub_agents() -> Dict[str, Any]:
+    result = warm_up_sub_agents()
+    failed = [name for name, value in result.items() if isinstance(value, str)]
+    if failed:
+        raise RuntimeError(f"sub-agent 로드 실패: {', '.join(failed)}")
+    return {name: round(seconds * 1000, 1) for name, seconds in result.items()}
+
+
+def _warm_models() -> Dict[str, Optional[str]]:
+    for route in ROUTES:
+        get_route_model(route)
+    # /ready의 phases.models.detail에 라우트 → model ID 테이블 표시
+    return get_route_model_table()
+
+
+def _warm_connections(loop: Optional[asyncio.AbstractEventLoop] = None) -> Dict[str, str]:
+    """
+    커넥션 풀에 keep-alive 커넥션을 하나씩 열어둡니다. 응답 코드와 무관하게 TLS 연결이 목적입니다.
+
+    Args:
+        loop: async 경로가 실행되는 이벤트 루프. 주어지면 그 루프의 AsyncClient(api_async)를,
+            없으면 sync 경로의 httpx.Client(api)를 미리 엽니다.
+    """
+    from .image_generator.tools import S3_BUCKET, get_bedrock_client, get_s3_client
+    from .weekly_report.tools import API_BASE_URL, get_async_http_client, get_http_client
+
+    result = {}
+
+    get_bedrock_client()
+    result["bedrock-runtime"] = "client ready"
+
+    try:
+        get_s3_client().head_bucket(Bucket=S3_BUCKET)
+        result["s3"] = "connected"
+    except Exception as e:
+        # 권한 오류(403)여도 커넥션은 열린 상태
+        result["s3"] = f"connected ({type(e).__name__})"
+
+    name = "api" if loop is None else "api_async"
+    try:
+        if loop is None:
+            response = get_http_client().get(API_BASE_URL, timeout=5)
+        else:
+            # AsyncClient 커넥션은 만들어진 루프에 묶이므로 요청이 실행되는 루프에서 연결
+            async def _connect():
+                return await get_async_http_client().get(API_BASE_URL, timeout=5)
+
+            response = asyncio.run_coroutine_threadsafe(_connect(), loop).result(timeout=10)
+        result[name] = f"connected ({response.status_code})"
+    except Exception as e:
+        result[name] = f"failed ({type(e).__name__}: {str(e)})"
+
+    return result
+
+
+def _warm_model_call() -> Dict[str, str]:
+    """라우트 모델별로 1토큰 Converse 호출을 보내 모델 엔드포인트 커넥션과 인증을 미리 처리합니다."""
+    result = {}
+    seen = set()
+    for route in ROUTES:
+        model = get_route_model(route)
+        model_id = get_route_model_id(route)
+        if model is None or model_id in seen:
+            continue
+        seen.add(model_id)
+        model.client.converse(
+            modelId=model.config["model_id"],
+            messages=[{"role": "user", "content": [{"text": "ping"}]}],
+            inferenceConfig={"maxTokens": 1},
+        )
+        result[route] = model_id or "default"
+    return result
+
+
+def run_warmup(loop: Optional[asyncio.AbstractEventLoop] = None) -> Dict[str, Any]:
+    """
+    warm-up 단계를 순서대로 실행하고 readiness 상태를 갱신합니다.
+
+    Args:
+        loop: async 경로가 실행되는 이벤트 루프 (connections 단계에서 사용)
+
+    Returns:
+        readiness 상태 딕셔너리
+    """
+    with _state_lock:
+        _state["status"] = "warming"
+        _state["started_at"] = datetime.utcnow().isoformat()
+
+    start = time.perf_counter()
+    ok = True
+    if SUBAGENT_WARMUP:
+        ok = _run_phase("sub_agents", _warm_sub_agents, fatal=True) and ok
+    ok = _run_phase("models", _warm_models) and ok
+    if WARMUP_CONNECTIONS:
+        ok = _run_phase("connections", lambda: _warm_connections(loop)) and ok
+    if WARMUP_MODEL_CALL:
+        ok = _run_phase("model_call", _warm_model_call) and ok
+
+    with _state_lock:
+        _state["status"] = "ready" if ok else "failed"
+        _state["finished_at"] = datetime.utcnow().isoformat()
+        _state["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info("[Warmup] 완료: %s (%.0fms)", _state["status"], _state["elapsed_ms"])
+    return get_readiness()[1]
+
+
+def start_warmup(
+    wait_for: Optional[threading.Event] = None,
+    delay: float = 5.0,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+) -> threading.Thread:
+    """
+    백그라운드 스레드에서 warm-up을 실행합니다.
+
+    Args:
+        wait_for: 이 이벤트가 설정될 때까지 대기 (예: 서버가 첫 /ping에 응답한 시점)
+        delay: wait_for를 기다리는 최대 시간 (초)
+        loop: async 경로가 실행되는 이벤트 루프 (서버 이벤트 루프, thread 모드에서는 None)
+
+    Returns:
+        시작된 daemon 스레드
+    """
+    def _run():
+        if wait_for is not None:
+            wait_for.wait(timeout=delay)
+        try:
+            run_warmup(loop)
+        except Exception as e:
+            with _state_lock:
+                _state["status"] = "failed"
+                _state["error"] = str(e)
+            logger.exception("[Warmup] 실패: %s", e)
+
+    thread = threading.Thread(target=_run, name="runtime-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_readiness() -> Tuple[bool, Dict[str, Any]]:
+    """
+    현재 readiness 상태를 반환합니다.
+
+    Returns:
+        (ready 여부, 상태 딕셔너리)
+    """
+    with _state_lock:
+        state = {**_state, "phases": dict(_state["phases"])}
+    return state["status"] == "ready", state
@@ -4,6 +4,7 @@
 from .agent import (
     weekly_report_agent,
     run_weekly_report,
+    run_weekly_report_async,
     get_user_info,
     get_diary_entries,
     get_report_list,
@@ -15,6 +16,7 @@ from .agent import (
 __all__ = [
     "weekly_report_agent",
     "run_weekly_report",
+    "run_weekly_report_async",
     "get_user_info",
     "get_diary_entries",
     "get_report_list",
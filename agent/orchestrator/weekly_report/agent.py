@@ -5,38 +5,32 @@ import os
 from typing import Dict, Any
 
 from strands import Agent, tool
-from strands.models import BedrockModel
 
 from .prompts import REPORT_SYSTEM_PROMPT
 from .tools import (
-    get_user_info as _get_user_info,
-    get_diary_entries as _get_diary_entries,
-    get_report_list as _get_report_list,
-    get_report_detail as _get_report_detail,
-    create_report as _create_report,
-    check_report_status as _check_report_status
+    get_user_info_async as _get_user_info,
+    get_diary_entries_async as _get_diary_entries,
+    get_report_list_async as _get_report_list,
+    get_report_detail_async as _get_report_detail,
+    create_report_async as _create_report,
+    check_report_status_async as _check_report_status
 )
-from agent.utils.secrets import get_config
+from . import tools as _sync_tools
+from agent.utils.model_routing import ROUTE_REPORT, get_route_model, get_route_model_id, track_route_latency
+from agent.utils.usage import agent_usage, record_usage
+from agent.utils.deadline import DeadlineExceeded, DeadlineHook
 
-# 설정 로드
-config = get_config()
-
-# AWS 설정
-AWS_REGION = config.get("AWS_REGION", os.environ.get("AWS_REGION", "us-east-1"))
-
-# Claude 모델 (에이전트 추론용)
-model = BedrockModel(
-    model_id=config.get("BEDROCK_CLAUDE_MODEL_ID", "anthropic.claude-sonnet-4-5-20250929-v1:0"),
-    region_name=AWS_REGION
-)
+# Claude 모델 (에이전트 추론용, report 라우트 모델)
+model = get_route_model(ROUTE_REPORT)
 
 
 # ============================================================================
 # Strands Tools (기존 tools.py 래핑 - 이름 충돌 방지)
+# async tool: httpx.AsyncClient로 호출 (async 경로 전용)
 # ============================================================================
 
 @tool
-def get_user_info(user_id: str) -> Dict[str, Any]:
+async def get_user_info(user_id: str) -> Dict[str, Any]:
     """
     사용자 정보를 조회합니다.
     
@@ -46,11 +40,11 @@ def get_user_info(user_id: str) -> Dict[str, Any]:
     Returns:
         사용자 정보 (nickname, email 등)
     """
-    return _get_user_info(user_id)
+    return await _get_user_info(user_id)
 
 
 @tool
-def get_diary_entries(user_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
+async def get_diary_entries(user_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
     """
     지정된 기간의 일기 항목을 조회합니다.
     
@@ -62,11 +56,11 @@ def get_diary_entries(user_id: str, start_date: str, end_date: str) -> Dict[str,
     Returns:
         일기 항목 목록
     """
-    return _get_diary_entries(user_id, start_date, end_date)
+    return await _get_diary_entries(user_id, start_date, end_date)
 
 
 @tool
-def get_report_list(user_id: str, limit: int = 10) -> Dict[str, Any]:
+async def get_report_list(user_id: str, limit: int = 10) -> Dict[str, Any]:
     """
     사용자의 리포트 목록을 조회합니다.
     
@@ -77,11 +71,11 @@ def get_report_list(user_id: str, limit: int = 10) -> Dict[str, Any]:
     Returns:
         리포트 목록
     """
-    return _get_report_list(user_id, limit)
+    return await _get_report_list(user_id, limit)
 
 
 @tool
-def get_report_detail(report_id: int, user_id: str) -> Dict[str, Any]:
+async def get_report_detail(report_id: int, user_id: str) -> Dict[str, Any]:
     """
     리포트 상세 정보를 조회합니다.
     
@@ -92,11 +86,11 @@ def get_report_detail(report_id: int, user_id: str) -> Dict[str, Any]:
     Returns:
         리포트 상세 정보
     """
-    return _get_report_detail(report_id, user_id)
+    return await _get_report_detail(report_id, user_id)
 
 
 @tool
-def create_report(user_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
+async def create_report(user_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
     """
     주간 리포트 생성을 요청합니다.
     
@@ -108,11 +102,11 @@ def create_report(user_id: str, start_date: str, end_date: str) -> Dict[str, Any
     Returns:
         생성된 리포트 정보 (report_id, status)
     """
-    return _create_report(user_id, start_date, end_date)
+    return await _create_report(user_id, start_date, end_date)
 
 
 @tool
-def check_report_status(report_id: int, user_id: str) -> Dict[str, Any]:
+async def check_report_status(report_id: int, user_id: str) -> Dict[str, Any]:
     """
     리포트 생성 상태를 확인합니다.
     
@@ -123,25 +117,58 @@ def check_report_status(report_id: int, user_id: str) -> Dict[str, Any]:
     Returns:
         리포트 상태 (processing, completed, failed)
     """
-    return _check_report_status(report_id, user_id)
+    return await _check_report_status(report_id, user_id)
 
 
 # ============================================================================
 # Weekly Report Master Agent
 # ============================================================================
 
-weekly_report_agent = Agent(
-    model=model,
-    system_prompt=REPORT_SYSTEM_PROMPT,
-    tools=[
-        get_user_info,
-        get_diary_entries,
-        get_report_list,
-        get_report_detail,
-        create_report,
-        check_report_status,
-    ]
-)
+ASYNC_TOOLS = [
+    get_user_info,
+    get_diary_entries,
+    get_report_list,
+    get_report_detail,
+    create_report,
+    check_report_status,
+]
+
+# sync 경로: Strands가 sync 호출마다 새 이벤트 루프에서 tool을 실행하므로, 루프별 AsyncClient가
+# 호출마다 생기지 않도록 공유 httpx.Client 커넥션 풀을 쓰는 tools.py의 sync tool 사용
+SYNC_TOOLS = [
+    _sync_tools.get_user_info,
+    _sync_tools.get_diary_entries,
+    _sync_tools.get_report_list,
+    _sync_tools.get_report_detail,
+    _sync_tools.create_report,
+    _sync_tools.check_report_status,
+]
+
+
+def _new_weekly_report_agent(tools) -> Agent:
+    return Agent(
+        model=model,
+        system_prompt=REPORT_SYSTEM_PROMPT,
+        tools=tools,
+        callback_handler=None,
+        hooks=[DeadlineHook()]
+    )
+
+
+weekly_report_agent = _new_weekly_report_agent(SYNC_TOOLS)
+
+
+def _build_prompt(request: str, user_id: str, start_date: str, end_date: str, report_id: int) -> str:
+    prompt = f"요청: {request}"
+    if user_id:
+        prompt += f"\n사용자 ID: {user_id}"
+    if start_date:
+        prompt += f"\n시작일: {start_date}"
+    if end_date:
+        prompt += f"\n종료일: {end_date}"
+    if report_id:
+        prompt += f"\n리포트 ID: {report_id}"
+    return prompt
 
 
 @tool
@@ -165,23 +192,63 @@ def run_weekly_report(
     Returns:
         에이전트 실행 결과
     """
+    # 공유 agent는 동시 호출을 지원하지 않으므로 sync 경로도 요청마다 agent를 만들어 대화 기록을 분리
+    agent = _new_weekly_report_agent(SYNC_TOOLS)
     # 컨텍스트 구성
-    prompt = f"요청: {request}"
-    if user_id:
-        prompt += f"\n사용자 ID: {user_id}"
-    if start_date:
-        prompt += f"\n시작일: {start_date}"
-    if end_date:
-        prompt += f"\n종료일: {end_date}"
-    if report_id:
-        prompt += f"\n리포트 ID: {report_id}"
+    prompt = _build_prompt(request, user_id, start_date, end_date, report_id)
+    
+    try:
+        with track_route_latency(ROUTE_REPORT, get_route_model_id(ROUTE_REPORT)):
+            response = agent(prompt)
+        record_usage(ROUTE_REPORT, get_route_model_id(ROUTE_REPORT), agent_usage(agent))
+        return {
+            "success": True,
+            "response": str(response)
+        }
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+
+@tool(name="run_weekly_report")
+async def run_weekly_report_async(
+    request: str,
+    user_id: str = None,
+    start_date: str = None,
+    end_date: str = None,
+    report_id: int = None
+) -> Dict[str, Any]:
+    """
+    Weekly Report Agent 실행 함수
+    
+    Args:
+        request: 사용자 요청 (자연어)
+        user_id: 사용자 ID
+        start_date: 시작일 (YYYY-MM-DD)
+        end_date: 종료일 (YYYY-MM-DD)
+        report_id: 리포트 ID (조회/상태확인 시)
+    
+    Returns:
+        에이전트 실행 결과
+    """
+    # async 경로: 동시에 여러 요청이 실행되므로 요청마다 agent를 만들어 대화 기록을 분리
+    agent = _new_weekly_report_agent(ASYNC_TOOLS)
+    prompt = _build_prompt(request, user_id, start_date, end_date, report_id)
     
     try:
-        response = weekly_report_agent(prompt)
+        with track_route_latency(ROUTE_REPORT, get_route_model_id(ROUTE_REPORT)):
+            response = await agent.invoke_async(prompt)
+        record_usage(ROUTE_REPORT, get_route_model_id(ROUTE_REPORT), agent_usage(agent))
         return {
             "success": True,
             "response": str(response)
         }
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         return {
             "success": False,
@@ -1,14 +1,134 @@
 # weekly_report/tools.py
 """Weekly Report Agent Tools - FastAPI API 호출 방식"""
 
+import asyncio
 import os
+import threading
+import weakref
 import httpx
 from strands import tool
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from agent.utils.circuit_breaker import get_breaker
+from agent.utils.deadline import timeout_for
+from agent.utils.metrics import httpx_pool_collector, register_collector
+from agent.utils.tracing import trace_event_hooks
 
 # FastAPI 서버 URL
 API_BASE_URL = os.environ.get("API_BASE_URL", "https://api.aws11.shop")
 
+HTTP_TIMEOUT = 30
+HTTP_LIMITS = dict(max_connections=20, max_keepalive_connections=10)
+
+# 공유 HTTP 클라이언트 (keep-alive 커넥션 풀 재사용, 요청마다 TLS handshake 방지)
+_http_client = None
+_http_client_lock = threading.Lock()
+
+# 이벤트 루프별 AsyncClient (커넥션이 생성된 루프에 묶이므로 루프마다 하나씩)
+# async 경로(서버 이벤트 루프, backfill)에서만 만들어지며 루프 종료 전에 close_async_http_client로 닫음
+_async_transport: Optional[httpx.AsyncBaseTransport] = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_http_client() -> httpx.Client:
+    """API_BASE_URL 호출용 공유 httpx.Client를 반환합니다."""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = httpx.Client(
+                    timeout=HTTP_TIMEOUT,
+                    limits=httpx.Limits(**HTTP_LIMITS),
+                    # 호출마다 span 기록 + X-Trace-Id / traceparent 헤더 전파
+                    event_hooks=trace_event_hooks(),
+                )
+    return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """현재 이벤트 루프의 API_BASE_URL 호출용 httpx.AsyncClient를 반환합니다 (async 경로)."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            transport=_async_transport,
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(**HTTP_LIMITS),
+            event_hooks=trace_event_hooks(async_hooks=True),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def close_async_http_client() -> None:
+    """현재 이벤트 루프의 AsyncClient를 닫습니다 (서버 lifespan 종료, backfill 종료 시)."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _current_async_client() -> Optional[httpx.AsyncClient]:
+    try:
+        return _async_clients.get(asyncio.get_running_loop())
+    except RuntimeError:
+        return None
+
+
+# /metrics: API_BASE_URL 커넥션 풀 상태 (클라이언트 생성 전에는 보고하지 않음)
+register_collector(httpx_pool_collector("api", lambda: _http_client))
+# /metrics는 서버 이벤트 루프에서 수집하므로 async 경로의 AsyncClient 풀이 보고됨
+register_collector(httpx_pool_collector("api_async", _current_async_client))
+
+
+# circuit open 시 바로 반환하는 결과
+API_UNAVAILABLE = {"error": "리포트 API를 일시적으로 사용할 수 없습니다. 잠시 후 다시 시도해주세요."}
+
+
+def _record_response(breaker, response: httpx.Response) -> None:
+    # 5xx만 API 장애로 셈 (4xx는 API가 정상 응답한 것)
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+
+def _call_api(method: str, path: str, error_label: str, **kwargs) -> Dict[str, Any]:
+    # timeout = min(호출별 timeout, 요청 deadline까지 남은 시간). 지났으면 DeadlineExceeded
+    kwargs["timeout"] = timeout_for(kwargs.get("timeout", HTTP_TIMEOUT), "api")
+    breaker = get_breaker("report_api")
+    if not breaker.allow():
+        return dict(API_UNAVAILABLE)
+    try:
+        response = get_http_client().request(method, f"{API_BASE_URL}{path}", **kwargs)
+        _record_response(breaker, response)
+        if response.status_code == 200:
+            return response.json()
+        else:
+            return {"error": f"{error_label}: {response.status_code}"}
+    except Exception as e:
+        breaker.record_error(e)
+        return {"error": f"API 호출 실패: {str(e)}"}
+
+
+async def _call_api_async(method: str, path: str, error_label: str, **kwargs) -> Dict[str, Any]:
+    kwargs["timeout"] = timeout_for(kwargs.get("timeout", HTTP_TIMEOUT), "api")
+    breaker = get_breaker("report_api")
+    if not breaker.allow():
+        return dict(API_UNAVAILABLE)
+    try:
+        response = await get_async_http_client().request(method, f"{API_BASE_URL}{path}", **kwargs)
+        _record_response(breaker, response)
+        if response.status_code == 200:
+            return response.json()
+        else:
+            return {"error": f"{error_label}: {response.status_code}"}
+    except BaseException as e:
+        # 취소(CancelledError)는 breaker에 probe 자리만 반납하고 그대로 전파
+        breaker.record_error(e)
+        if not isinstance(e, Exception):
+            raise
+        return {"error": f"API 호출 실패: {str(e)}"}
+
 
 @tool
 def get_user_info(user_id: str) -> Dict[str, Any]:
@@ -21,17 +141,7 @@ def get_user_info(user_id: str) -> Dict[str, Any]:
     Returns:
         사용자 정보 (nickname, email 등)
     """
-    try:
-        with httpx.Client(timeout=30) as client:
-            response = client.get(
-                f"{API_BASE_URL}/user/{user_id}"
-            )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {"error": f"사용자 조회 실패: {response.status_code}"}
-    except Exception as e:
-        return {"error": f"API 호출 실패: {str(e)}"}
+    return _call_api("GET", f"/user/{user_id}", "사용자 조회 실패")
 
 
 @tool
@@ -47,22 +157,14 @@ def get_diary_entries(user_id: str, start_date: str, end_date: str) -> Dict[str,
     Returns:
         일기 항목 목록
     """
-    try:
-        with httpx.Client(timeout=30) as client:
-            response = client.get(
-                f"{API_BASE_URL}/history",
-                params={
-                    "user_id": user_id,
-                    "start_date": start_date,
-                    "end_date": end_date
-                }
-            )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {"error": f"일기 조회 실패: {response.status_code}"}
-    except Exception as e:
-        return {"error": f"API 호출 실패: {str(e)}"}
+    return _call_api(
+        "GET", "/history", "일기 조회 실패",
+        params={
+            "user_id": user_id,
+            "start_date": start_date,
+            "end_date": end_date
+        }
+    )
 
 
 @tool
@@ -77,21 +179,13 @@ def get_report_list(user_id: str, limit: int = 10) -> Dict[str, Any]:
     Returns:
         리포트 목록
     """
-    try:
-        with httpx.Client(timeout=30) as client:
-            response = client.get(
-                f"{API_BASE_URL}/report",
-                params={
-                    "user_id": user_id,
-                    "limit": limit
-                }
-            )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {"error": f"리포트 목록 조회 실패: {response.status_code}"}
-    except Exception as e:
-        return {"error": f"API 호출 실패: {str(e)}"}
+    return _call_api(
+        "GET", "/report", "리포트 목록 조회 실패",
+        params={
+            "user_id": user_id,
+            "limit": limit
+        }
+    )
 
 
 @tool
@@ -106,18 +200,7 @@ def get_report_detail(report_id: int, user_id: str) -> Dict[str, Any]:
     Returns:
         리포트 상세 정보
     """
-    try:
-        with httpx.Client(timeout=30) as client:
-            response = client.get(
-                f"{API_BASE_URL}/report/{report_id}",
-                params={"user_id": user_id}
-            )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {"error": f"리포트 조회 실패: {response.status_code}"}
-    except Exception as e:
-        return {"error": f"API 호출 실패: {str(e)}"}
+    return _call_api("GET", f"/report/{report_id}", "리포트 조회 실패", params={"user_id": user_id})
 
 
 @tool
@@ -137,22 +220,15 @@ def create_report(
     Returns:
         생성된 리포트 정보 (report_id, status)
     """
-    try:
-        with httpx.Client(timeout=60) as client:
-            response = client.post(
-                f"{API_BASE_URL}/report/create",
-                json={
-                    "user_id": user_id,
-                    "start_date": start_date,
-                    "end_date": end_date
-                }
-            )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {"error": f"리포트 생성 실패: {response.status_code}"}
-    except Exception as e:
-        return {"error": f"API 호출 실패: {str(e)}"}
+    return _call_api(
+        "POST", "/report/create", "리포트 생성 실패",
+        json={
+            "user_id": user_id,
+            "start_date": start_date,
+            "end_date": end_date
+        },
+        timeout=60
+    )
 
 
 @tool
@@ -167,15 +243,43 @@ def check_report_status(report_id: int, user_id: str) -> Dict[str, Any]:
     Returns:
         리포트 상태 (processing, completed, failed)
     """
-    try:
-        with httpx.Client(timeout=30) as client:
-            response = client.get(
-                f"{API_BASE_URL}/report/status/{report_id}",
-                params={"user_id": user_id}
-            )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {"error": f"상태 조회 실패: {response.status_code}"}
-    except Exception as e:
-        return {"error": f"API 호출 실패: {str(e)}"}
+    return _call_api("GET", f"/report/status/{report_id}", "상태 조회 실패", params={"user_id": user_id})
+
+
+# ============================================================================
+# Async 버전 (httpx.AsyncClient) - agent.py의 async tool이 사용
+# ============================================================================
+
+async def get_user_info_async(user_id: str) -> Dict[str, Any]:
+    return await _call_api_async("GET", f"/user/{user_id}", "사용자 조회 실패")
+
+
+async def get_diary_entries_async(user_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
+    return await _call_api_async(
+        "GET", "/history", "일기 조회 실패",
+        params={"user_id": user_id, "start_date": start_date, "end_date": end_date}
+    )
+
+
+async def get_report_list_async(user_id: str, limit: int = 10) -> Dict[str, Any]:
+    return await _call_api_async(
+        "GET", "/report", "리포트 목록 조회 실패", params={"user_id": user_id, "limit": limit}
+    )
+
+
+async def get_report_detail_async(report_id: int, user_id: str) -> Dict[str, Any]:
+    return await _call_api_async("GET", f"/report/{report_id}", "리포트 조회 실패", params={"user_id": user_id})
+
+
+async def create_report_async(user_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
+    return await _call_api_async(
+        "POST", "/report/create", "리포트 생성 실패",
+        json={"user_id": user_id, "start_date": start_date, "end_date": end_date},
+        timeout=60
+    )
+
+
+async def check_report_status_async(report_id: int, user_id: str) -> Dict[str, Any]:
+    return await _call_api_async(
+        "GET", f"/report/status/{report_id}", "상태 조회 실패", params={"user_id": user_id}
+    )
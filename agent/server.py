@@ -2,15 +2,68 @@
 Agent Core Runtime HTTP Server
 FastAPI 기반 서버로 /ping과 /invocations 엔드포인트 제공
 """
+import time
+
+# cold start 측정 기준 시점 (가능한 한 먼저 기록)
+_MODULE_START = time.perf_counter()
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional, Tuple
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
-import uvicorn
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+import contextvars
+import functools
+import hashlib
+import asyncio
 import json
+import math
+import tempfile
+import threading
+import logging
+import uvicorn
+import uuid
 import sys
 import os
 
-# orchestrator import
-sys.path.insert(0, os.path.dirname(__file__))
+# agent 패키지 import 경로 (orchestrator와 utils가 같은 모듈 인스턴스를 공유하도록
+# 항상 agent.* 경로로 import)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if __name__ == "__main__":
+    # SERVER_WORKERS > 1: 앱을 로드하지 않고 gunicorn + UvicornWorker로 프로세스 교체 (gunicorn_conf.py)
+    from agent.utils.workers import get_worker_count
+
+    if get_worker_count() > 1:
+        print(f"🚀 멀티 워커 모드: {get_worker_count()} workers (gunicorn + UvicornWorker)", flush=True)
+        os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        os.execvp("gunicorn", [
+            "gunicorn", "-c", os.path.join("agent", "gunicorn_conf.py"), "agent.server:app"
+        ])
+
+from agent.utils.deadline import DEADLINE_EXCEEDED, DeadlineExceeded, deadline_scope, remaining
+from agent.utils.fairness import QuotaExceeded, user_slot, user_weight
+from agent.utils.idempotency import (
+    IDEMPOTENCY_HEADER, IDEMPOTENCY_KEY_MAX_LENGTH, IDEMPOTENCY_REPLAYED_HEADER, IdempotencyConflict,
+    get_idempotency_store, request_fingerprint, scoped_key,
+)
+from agent.utils.lanes import LaneFull, lane_for, lane_slot
+from agent.utils.job_queue import TERMINAL_STATUSES, JobQueue, running_jobs_collector
+from agent.utils.log import log_context, redact_payload, setup_logging
+from agent.utils.metrics import (
+    IN_FLIGHT, REQUEST_LATENCY, REQUESTS, register_collector, render_metrics, start_snapshot_writer,
+)
+from agent.utils.usage import track_request_usage
+from agent.utils.tracing import (
+    TRACE_HEADER, add_span_listener, instrument_boto3, span, start_trace, trace_id_from_headers,
+)
+
+setup_logging()
+logger = logging.getLogger("server")
+
+# boto3 기본 session으로 만들어지는 client(S3, bedrock-runtime, KB retrieve)의 호출을 span으로 기록
+# (client 생성 전에 등록해야 적용되므로 orchestrator import보다 먼저 실행)
+instrument_boto3()
 
 # 시작 시 설정 로드 및 검증
 print("=" * 80, flush=True)
@@ -19,7 +72,7 @@ print("=" * 80, flush=True)
 
 config = None
 try:
-    from utils.secrets import get_config
+    from agent.utils.secrets import get_config
     config = get_config()
     print(f"✅ 설정 로드 완료", flush=True)
     print(f"   - AWS Region: {config.get('AWS_REGION')}", flush=True)
@@ -37,11 +90,19 @@ except Exception as e:
 
 # orchestrator import - 이것도 실패할 수 있으므로 try-catch
 orchestrate_request = None
+orchestrator_error = None
 try:
     print("🔄 Orchestrator 로드 중...", flush=True)
-    from orchestrator.orchestra_agent import orchestrate_request
+    from agent.orchestrator.orchestra_agent import is_failed_result, orchestrate_request, orchestrate_request_async
+    from agent.orchestrator.warmup import get_readiness, start_warmup
+    from agent.orchestrator.image_generator.tools import (
+        get_upload_status, get_uploader, upload_stream_to_s3, write_behind_enabled,
+    )
+    from agent.orchestrator.weekly_report.tools import close_async_http_client
     print("✅ Orchestrator 로드 완료", flush=True)
 except Exception as e:
+    orchestrate_request = None
+    orchestrator_error = str(e)
     import sys
     print(f"❌ CRITICAL: Orchestrator 로드 실패: {str(e)}", file=sys.stderr, flush=True)
     import traceback
@@ -49,112 +110,795 @@ except Exception as e:
     sys.stderr.flush()
     # 서버는 시작하되, 요청 시 에러 반환
 
-app = FastAPI(title="Diary Orchestrator Agent")
+# 백그라운드 warm-up 시작 전 첫 /ping을 기다리는 최대 시간 (초)
+WARMUP_DELAY = float(os.environ.get("WARMUP_DELAY", "5"))
+
+# 응답에 요청 단위 token usage / 추정 비용 포함 여부 (요청 본문의 include_usage로도 지정 가능)
+INCLUDE_USAGE = os.environ.get("INCLUDE_USAGE", "false").lower() in ("1", "true", "yes")
+
+# 요청 deadline (시간 예산): X-Request-Timeout 헤더(초) 또는 REQUEST_TIMEOUT, 최대 MAX_REQUEST_TIMEOUT
+# orchestrator → 하위 agent → tool → 외부 호출까지 전달되고, 넘으면 작업을 중단하고 504 반환 (0 = 제한 없음)
+DEADLINE_HEADER = "X-Request-Timeout"
+REQUEST_TIMEOUT = float(os.environ.get("REQUEST_TIMEOUT", "120"))
+MAX_REQUEST_TIMEOUT = float(os.environ.get("MAX_REQUEST_TIMEOUT", "900"))
+
+# orchestrator 실행 방식
+# - async (기본): orchestrate_request_async를 이벤트 루프에서 실행 (Strands invoke_async, httpx.AsyncClient,
+#   boto3는 asyncio.to_thread). LLM 응답 대기 중 스레드를 점유하지 않아 워커당 수백 개 요청을 동시에 처리
+# - thread: orchestrate_request(동기)를 아래 스레드 풀에서 실행 (이전 방식)
+ORCHESTRATION_MODE = os.environ.get("ORCHESTRATION_MODE", "async").lower()
+# async 모드에서 asyncio.to_thread(boto3 호출, Strands BedrockModel 스트림)가 쓰는 기본 executor 크기
+# (기본값 min(32, CPU + 4)이면 동시 LLM 호출이 그 수로 제한됨)
+ASYNC_IO_THREADS = int(os.environ.get("ASYNC_IO_THREADS", "128"))
+
+# orchestrate_request(동기)를 실행하는 스레드 풀 - 이벤트 루프가 /ping, /metrics에 계속 응답하도록 분리
+# (thread 모드의 orchestrator와 바이너리 업로드에서 사용)
+ORCHESTRATOR_WORKERS = int(os.environ.get("ORCHESTRATOR_WORKERS", "8"))
+_executor = ThreadPoolExecutor(max_workers=ORCHESTRATOR_WORKERS, thread_name_prefix="orchestrator")
+
+# multipart / raw binary 이미지 업로드 (JSON image_base64 대신 본문을 그대로 S3로 스트리밍)
+# 메모리에는 UPLOAD_SPOOL_MAX_MEMORY까지만 두고 넘으면 임시 파일로 spool
+UPLOAD_SPOOL_MAX_MEMORY = int(os.environ.get("UPLOAD_SPOOL_MAX_MEMORY", str(1024 * 1024)))
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+# multipart 본문에서 파일 외 폼 필드 / boundary에 허용하는 크기 (본문 전체 한도 = MAX_UPLOAD_BYTES + 이 값)
+_MULTIPART_OVERHEAD = 64 * 1024
+_BINARY_CONTENT_TYPES = ("image/", "application/octet-stream")
+
+# job 모드 (요청 본문 "mode": "job"): 요청을 SQLite 큐에 넣고 job id를 바로 반환,
+# 워커 task가 실행하고 결과는 GET /jobs/{job_id}로 조회 (JOB_WORKERS=0이면 비활성)
+JOB_QUEUE_PATH = os.environ.get("JOB_QUEUE_PATH", "/tmp/agent-jobs.db")
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+# 실패 시 재시도하는 job 종류 (request_type, AI 라우팅은 auto). 나머지는 1회만 실행:
+# 이미지 업로드 / 리포트 생성 / 데이터 저장은 부작용 뒤에 실패할 수 있어 다시 실행하면 중복 저장됨
+JOB_RETRY_KINDS = frozenset(
+    kind.strip() for kind in os.environ.get("JOB_RETRY_KINDS", "question,summarize").split(",") if kind.strip()
+)
+JOB_RETRY_BACKOFF = float(os.environ.get("JOB_RETRY_BACKOFF", "2"))
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "60"))
+JOB_RESULT_TTL = float(os.environ.get("JOB_RESULT_TTL", "86400"))
+# job 1회 실행 시간 예산 (초, 넘으면 실패 처리, JOB_RETRY_KINDS이면 재시도)
+JOB_TIMEOUT = float(os.environ.get("JOB_TIMEOUT", "900"))
+# GET /jobs/{job_id}/events 상태 확인 주기 (초)
+JOB_STREAM_INTERVAL = float(os.environ.get("JOB_STREAM_INTERVAL", "0.5"))
+
+# POST /invocations/batch: 요청당 최대 항목 수 / 동시에 실행하는 항목 수
+# (각 항목은 사용자 quota와 lane 제한도 그대로 적용받음)
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "100"))
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "4"))
+
+register_collector(lambda: [
+    ("agent_executor_queue_depth", "gauge", "Requests waiting for an orchestrator worker thread",
+     {}, _executor._work_queue.qsize()),
+    ("agent_executor_workers", "gauge", "Orchestrator worker thread pool size", {}, ORCHESTRATOR_WORKERS),
+])
+
+_listening = threading.Event()
+_job_queue = None
+# 실행 중인 job의 trace id → job id (span 종료를 job progress로 기록)
+_job_traces = {}
+_IMPORT_SECONDS = time.perf_counter() - _MODULE_START
+
+
+def _process_uptime() -> float:
+    """프로세스 시작 이후 경과 시간 (초). /proc을 읽을 수 없으면 모듈 로드 기준."""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except Exception:
+        return time.perf_counter() - _MODULE_START
+
+
+def _request_budget(headers) -> Optional[float]:
+    """X-Request-Timeout 헤더(초) 또는 REQUEST_TIMEOUT. 0 이하 / 잘못된 값은 기본값 사용"""
+    budget = REQUEST_TIMEOUT
+    value = headers.get(DEADLINE_HEADER.lower())
+    if value:
+        try:
+            budget = float(value) if float(value) > 0 else budget
+        except ValueError:
+            logger.warning("잘못된 %s 헤더 무시: %s", DEADLINE_HEADER, value)
+    if budget <= 0:
+        return None
+    return min(budget, MAX_REQUEST_TIMEOUT) if MAX_REQUEST_TIMEOUT > 0 else budget
+
+
+async def _run_orchestrator(orchestrate_kwargs: dict) -> dict:
+    """
+    ORCHESTRATION_MODE에 따라 orchestrator 실행 (/invocations와 job 워커 공통)
+    사용자 quota(요청 속도 / 동시 실행, 초과 시 QuotaExceeded)를 확인하고
+    request_type의 lane slot을 얻은 뒤 실행합니다 (대기열이 가득 차면 LaneFull).
+    deadline이 있으면 남은 시간이 지날 때 기다림을 멈추고 DeadlineExceeded를 던집니다.
+    async 모드는 orchestrator task가 취소되고, thread 모드의 스레드는 다음 모델 / tool 호출 전에 중단됩니다.
+    """
+    user_id = orchestrate_kwargs.get("user_id")
+    async with user_slot(user_id), \
+            lane_slot(lane_for(orchestrate_kwargs.get("request_type")), user_id, user_weight(user_id)):
+        if ORCHESTRATION_MODE == "thread":
+            # 현재 contextvars(trace, 로그 컨텍스트, deadline, lane)를 worker 스레드로 복사해서 실행
+            call = functools.partial(orchestrate_request, **orchestrate_kwargs)
+            pending = asyncio.get_running_loop().run_in_executor(
+                _executor, contextvars.copy_context().run, call
+            )
+        else:
+            pending = orchestrate_request_async(**orchestrate_kwargs)
+
+        left = remaining()
+        if left is None:
+            return await pending
+        try:
+            return await asyncio.wait_for(pending, timeout=left)
+        except asyncio.TimeoutError:
+            DEADLINE_EXCEEDED.inc(stage="request")
+            raise DeadlineExceeded("request")
+
+
+class JobFailed(Exception):
+    """orchestrator가 오류 결과를 반환한 job (JOB_RETRY_KINDS이면 job 큐가 재시도)"""
+
+
+async def _run_job(job: dict) -> dict:
+    """job 워커: 큐에 저장된 /invocations 요청을 orchestrator로 실행"""
+    payload = job["payload"]
+    orchestrate_kwargs = payload["orchestrate_kwargs"]
+    user_id = orchestrate_kwargs.get("user_id")
+    request_type = orchestrate_kwargs.get("request_type")
+    # job id를 trace id로 사용 (요청 trace id는 속성으로 연결)
+    with start_trace("job", trace_id=job["id"], request_trace_id=payload.get("trace_id"),
+                     attempt=job["attempts"]) as root, \
+            log_context(request_id=payload.get("request_id"), trace_id=job["id"], job_id=job["id"],
+                        user_id=user_id, request_type=request_type), \
+            track_request_usage(user_id) as request_usage, \
+            deadline_scope(JOB_TIMEOUT):
+        _job_traces[root.trace_id] = job["id"]
+        try:
+            with span("orchestrate", request_type=request_type) as orchestrate_span:
+                result = await _run_orchestrator(orchestrate_kwargs)
+                result_type = result.get("type", "unknown")
+                orchestrate_span.set_attribute("result_type", result_type)
+        finally:
+            _job_traces.pop(root.trace_id, None)
+        if is_failed_result(result):
+            raise JobFailed(result.get("message") or "요청 처리 실패")
+        usage = request_usage.totals()
+        logger.info(
+            "Job 완료: type=%s attempt=%d tokens_in=%d tokens_out=%d images=%d cost=$%.6f",
+            result_type, job["attempts"], usage["input_tokens"], usage["output_tokens"],
+            usage["images"], usage["cost_usd"]
+        )
+        if payload.get("include_usage"):
+            result = {**result, "usage": usage}
+        return result
+
+
+def _record_job_progress(s) -> None:
+    """job 실행 중 끝난 span(라우팅, Bedrock / S3 / API 호출 등)을 job progress로 기록"""
+    job_id = _job_traces.get(s.trace_id)
+    if job_id is None or s.parent_id is None or _job_queue is None:
+        return
+    _job_queue.progress(job_id, s.name, duration_ms=s.duration_ms, status=s.status)
+
+
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(
+            _run_job,
+            JOB_QUEUE_PATH,
+            workers=JOB_WORKERS,
+            max_attempts=JOB_MAX_ATTEMPTS,
+            backoff=JOB_RETRY_BACKOFF,
+            lease=JOB_LEASE_SECONDS,
+            result_ttl=JOB_RESULT_TTL,
+        )
+    return _job_queue
+
+
+add_span_listener(_record_job_progress)
+register_collector(running_jobs_collector(lambda: _job_queue))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print(f"⏱️  서버 모듈 로드: {_IMPORT_SECONDS * 1000:.0f}ms", flush=True)
+    if ORCHESTRATION_MODE != "thread":
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=ASYNC_IO_THREADS, thread_name_prefix="asyncio-io")
+        )
+    if orchestrate_request is not None:
+        # async 모드: 요청이 쓰는 서버 이벤트 루프의 AsyncClient 커넥션을 미리 열도록 루프 전달
+        start_warmup(
+            wait_for=_listening,
+            delay=WARMUP_DELAY,
+            loop=asyncio.get_running_loop() if ORCHESTRATION_MODE != "thread" else None,
+        )
+    # 멀티 워커 모드(METRICS_DIR 설정 시): 워커별 메트릭 스냅샷 주기 기록
+    start_snapshot_writer()
+    # write-behind 업로드: 이전 프로세스가 spool에 남긴 업로드를 바로 이어서 처리
+    if orchestrate_request is not None and write_behind_enabled():
+        get_uploader()
+    # job 워커 시작 (이전 프로세스가 남긴 대기 / lease 만료 job도 이어서 처리)
+    if orchestrate_request is not None and JOB_WORKERS > 0:
+        get_job_queue().start()
+    yield
+    if _job_queue is not None:
+        await _job_queue.stop()
+    if orchestrate_request is not None:
+        await close_async_http_client()
+
+
+app = FastAPI(title="Diary Orchestrator Agent", lifespan=lifespan)
 
 
 @app.get("/ping")
 async def ping():
     """헬스체크 엔드포인트"""
+    if not _listening.is_set():
+        _listening.set()
+        print(f"⏱️  Cold start: 첫 healthy /ping까지 {_process_uptime() * 1000:.0f}ms "
+              f"(프로세스 시작 기준, 모듈 로드 {_IMPORT_SECONDS * 1000:.0f}ms)", flush=True)
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def ready():
+    """
+    Readiness 엔드포인트
+    orchestrator 로드와 warm-up(하위 agent, 모델, 커넥션 풀)이 끝나
+    첫 요청을 정상 지연시간으로 처리할 수 있을 때만 200을 반환
+    """
+    if orchestrate_request is None:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "failed", "error": orchestrator_error or "Orchestrator 초기화 실패"}
+        )
+
+    is_ready, state = get_readiness()
+    return JSONResponse(status_code=200 if is_ready else 503, content=state)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape 엔드포인트"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/uploads")
+async def upload_status(key: str):
+    """
+    write-behind 업로드 상태 조회 (S3_UPLOAD_MODE=write_behind)
+    status: pending / uploading / uploaded / failed
+    """
+    if orchestrate_request is None or not write_behind_enabled():
+        return JSONResponse(status_code=404, content={"error": "write-behind 업로드가 비활성화되어 있습니다."})
+    status = get_upload_status(key)
+    if status is None:
+        return JSONResponse(status_code=404, content={"error": "업로드 기록이 없습니다.", "key": key})
+    return status
+
+
+def _job_mode_disabled() -> JSONResponse:
+    return JSONResponse(status_code=404, content={"error": "job 모드가 비활성화되어 있습니다."})
+
+
+@app.get("/jobs")
+async def job_counts():
+    """status별 job 수 (같은 큐를 쓰는 전체 워커 기준)"""
+    if orchestrate_request is None or JOB_WORKERS <= 0:
+        return _job_mode_disabled()
+    return {"jobs": await get_job_queue().counts_async()}
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """
+    job 상태 / 결과 조회
+    status: queued / running / succeeded / failed, 성공 시 result에 /invocations 응답과 같은 형식의 결과
+    """
+    if orchestrate_request is None or JOB_WORKERS <= 0:
+        return _job_mode_disabled()
+    job = await get_job_queue().get_async(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "job이 없습니다.", "job_id": job_id})
+    return job
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    job 진행 상황 스트리밍 (NDJSON)
+    상태나 progress가 바뀔 때마다 job 상태를 한 줄씩 보내고, succeeded / failed가 되면 종료합니다.
+    """
+    if orchestrate_request is None or JOB_WORKERS <= 0:
+        return _job_mode_disabled()
+    queue = get_job_queue()
+    job = await queue.get_async(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "job이 없습니다.", "job_id": job_id})
+
+    async def stream():
+        current = job
+        last_update = None
+        while True:
+            if current["updated_at"] != last_update:
+                last_update = current["updated_at"]
+                yield json.dumps(current, ensure_ascii=False) + "\n"
+            if current["status"] in TERMINAL_STATUSES or await request.is_disconnected():
+                return
+            await asyncio.sleep(JOB_STREAM_INTERVAL)
+            current = await queue.get_async(job_id) or current
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+class UploadRejected(Exception):
+    """바이너리 업로드 요청 오류 (status_code와 함께 응답)"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _is_binary_upload(content_type: str) -> bool:
+    return content_type.startswith("multipart/form-data") or content_type.startswith(_BINARY_CONTENT_TYPES)
+
+
+def _upload_too_large() -> UploadRejected:
+    return UploadRejected(413, f"이미지가 너무 큽니다 (최대 {MAX_UPLOAD_BYTES} bytes).")
+
+
+def _check_declared_size(request: Request, limit: int) -> None:
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise _upload_too_large()
+
+
+def _size_limited_request(request: Request, limit: int) -> Request:
+    """본문을 받는 동안 limit bytes를 넘으면 UploadRejected(413)를 던지는 Request (form 파싱이 끝나기 전에 중단)"""
+    received = 0
+
+    async def receive():
+        nonlocal received
+        message = await request.receive()
+        if message["type"] == "http.request":
+            received += len(message.get("body", b""))
+            if received > limit:
+                raise _upload_too_large()
+        return message
+
+    return Request(request.scope, receive)
+
+
+async def _spool_request_body(request: Request):
+    """raw binary 본문을 청크 단위로 SpooledTemporaryFile에 기록 (본문 전체를 bytes로 만들지 않음)"""
+    _check_declared_size(request, MAX_UPLOAD_BYTES)
+
+    spool = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_MEMORY)
+    size = 0
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise _upload_too_large()
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool, size
+
+
+def _file_digest(fileobj) -> str:
+    # 멱등 키 요청 지문용 이미지 hash (청크 단위로 읽고 처음으로 되돌림)
+    digest = hashlib.sha256()
+    for chunk in iter(functools.partial(fileobj.read, 1024 * 1024), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+async def _handle_binary_upload(request: Request, content_type: str, current_span) -> Tuple[int, dict, bool]:
+    """
+    multipart/form-data 또는 raw binary(image/*, application/octet-stream) 이미지 업로드
+    ("히스토리에 추가"를 image_base64 JSON 없이 처리)
+
+    - multipart: 파일 필드 image 또는 file, 폼 필드 user_id / record_date / idempotency_key
+    - raw binary: 본문이 이미지, 쿼리 파라미터 user_id / record_date / idempotency_key (또는 X-User-Id 헤더)
+
+    업로드할 이미지와 대상 키가 정해져 있으므로 LLM agent를 거치지 않고 바로 S3에 올립니다.
+    본문은 MAX_UPLOAD_BYTES를 넘는 순간 읽기를 멈추고, 업로드는 JSON 요청과 같은
+    사용자 quota / image lane / 멱등 키 안에서 실행합니다.
+
+    Returns:
+        (status code, 응답 본문, 저장된 / 합류한 결과이면 True)
+    """
+    params = request.query_params
+    form = None
+    if content_type.startswith("multipart/form-data"):
+        # 폼 필드 / boundary 여유분을 더한 크기까지만 받음
+        limit = MAX_UPLOAD_BYTES + _MULTIPART_OVERHEAD
+        _check_declared_size(request, limit)
+        # python-multipart가 파일 파트를 SpooledTemporaryFile로 받음 (큰 파일은 디스크)
+        form = await _size_limited_request(request, limit).form()
+        upload = form.get("image") or form.get("file")
+        if upload is None or not hasattr(upload, "file"):
+            await form.close()
+            raise UploadRejected(400, "image 파일 필드가 필요합니다.")
+        size = getattr(upload, "size", None)
+        if size is not None and size > MAX_UPLOAD_BYTES:
+            await form.close()
+            raise _upload_too_large()
+        fileobj = upload.file
+        image_type = upload.content_type or "image/png"
+        user_id = form.get("user_id") or params.get("user_id")
+        record_date = form.get("record_date") or params.get("record_date")
+        idempotency_key = form.get("idempotency_key") or params.get("idempotency_key")
+    else:
+        fileobj, size = await _spool_request_body(request)
+        image_type = content_type.split(";")[0].strip()
+        if not image_type.startswith("image/"):
+            image_type = "image/png"
+        user_id = params.get("user_id") or request.headers.get("x-user-id")
+        record_date = params.get("record_date")
+        idempotency_key = params.get("idempotency_key")
+    idempotency_key = request.headers.get(IDEMPOTENCY_HEADER.lower()) or idempotency_key
+
+    try:
+        if not user_id:
+            raise UploadRejected(400, "user_id가 필요합니다.")
+        if size == 0:
+            raise UploadRejected(400, "이미지 데이터가 비어 있습니다.")
+
+        async def execute() -> Tuple[int, dict]:
+            async with user_slot(user_id), lane_slot(lane_for("image"), user_id, user_weight(user_id)):
+                with log_context(user_id=user_id, request_type="image"), \
+                        span("upload", content_type=image_type, size=size):
+                    call = functools.partial(upload_stream_to_s3, user_id, fileobj, record_date, image_type)
+                    uploaded = await asyncio.get_running_loop().run_in_executor(
+                        _executor, contextvars.copy_context().run, call
+                    )
+            logger.info("바이너리 업로드 완료: key=%s size=%s", uploaded["s3_key"], size)
+            return 200, {
+                "type": "image",
+                "content": uploaded["image_url"],
+                "message": "이미지가 히스토리에 추가되었습니다.",
+                "s3_key": uploaded["s3_key"],
+                "upload_status": uploaded.get("upload_status", "uploaded"),
+            }
+
+        if not idempotency_key:
+            status_code, result = await execute()
+            return status_code, result, False
+
+        idempotency_key = str(idempotency_key)
+        if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise UploadRejected(400, f"{IDEMPOTENCY_HEADER}가 너무 깁니다.")
+        fingerprint = request_fingerprint({
+            "upload": await asyncio.to_thread(_file_digest, fileobj),
+            "content_type": image_type,
+            "record_date": record_date,
+        })
+        status_code, result, replayed = await get_idempotency_store().run(
+            scoped_key(user_id, idempotency_key), fingerprint, execute,
+        )
+        current_span.set_attribute("idempotent_replay", replayed)
+        return status_code, result, replayed
+    finally:
+        if form is not None:
+            await form.close()
+        else:
+            fileobj.close()
+
+
+def _error_content(message: str) -> dict:
+    return {"type": "error", "content": "", "message": message}
+
+
+def _orchestrate_kwargs(body: dict) -> Optional[dict]:
+    """/invocations 본문에서 orchestrator 인자를 추출합니다 (입력이 없으면 None)."""
+    # 파라미터 추출
+    user_input = body.get('content') or body.get('inputText') or body.get('input') or body.get('user_input')
+    if not user_input:
+        return None
+    return dict(
+        user_input=user_input,
+        user_id=body.get('user_id'),
+        current_date=body.get('record_date') or body.get('current_date'),
+        request_type=body.get('request_type'),
+        temperature=body.get('temperature'),
+        # 이미지 생성 관련 파라미터
+        text=body.get('text'),  # 이미지 생성용 일기 텍스트
+        image_base64=body.get('image_base64'),  # S3 업로드용 이미지
+        record_date=body.get('record_date'),  # S3 업로드용 날짜
+        seed=body.get('seed'),  # 미리보기 seed (히스토리에 추가 시 최종 해상도 렌더링)
+        image_prompt=body.get('prompt')  # 미리보기 prompt
+    )
+
+
+async def _execute_invocation(body: dict, orchestrate_kwargs: dict, request_id: str, trace_id: str,
+                              current_span) -> Tuple[int, dict]:
+    """/invocations 본문 하나를 실행하고 (status code, 응답 본문)을 반환합니다 (/invocations와 batch 공통)."""
+    user_id = orchestrate_kwargs["user_id"]
+    request_type = orchestrate_kwargs["request_type"]
+
+    # job 모드: 큐에 넣고 job id를 바로 반환 (이미지 / 리포트처럼 오래 걸리는 요청용)
+    if body.get('mode') == "job":
+        if JOB_WORKERS <= 0:
+            return 400, _error_content("job 모드가 비활성화되어 있습니다.")
+        with log_context(user_id=user_id, request_type=request_type):
+            kind = request_type or "auto"
+            job_id = await get_job_queue().submit(kind, {
+                "orchestrate_kwargs": orchestrate_kwargs,
+                "request_id": request_id,
+                "trace_id": trace_id,
+                "include_usage": INCLUDE_USAGE or bool(body.get('include_usage')),
+            }, max_attempts=JOB_MAX_ATTEMPTS if kind in JOB_RETRY_KINDS else 1)
+        current_span.set_attribute("job_id", job_id)
+        return 202, {
+            "type": "job",
+            "content": job_id,
+            "message": "요청이 접수되었습니다.",
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/jobs/{job_id}"
+        }
+
+    # orchestrator 실행 - 모든 요청을 orchestrator가 처리
+    with log_context(user_id=user_id, request_type=request_type), \
+            track_request_usage(user_id) as request_usage, \
+            span("orchestrate", request_type=request_type) as orchestrate_span:
+        result = await _run_orchestrator(orchestrate_kwargs)
+        result_type = result.get('type', 'unknown')
+        orchestrate_span.set_attribute("result_type", result_type)
+        usage = request_usage.totals()
+        logger.info(
+            "Invocations 완료: type=%s tokens_in=%d tokens_out=%d images=%d cost=$%.6f",
+            result_type, usage["input_tokens"], usage["output_tokens"], usage["images"], usage["cost_usd"]
+        )
+        if INCLUDE_USAGE or body.get('include_usage'):
+            result = {**result, "usage": usage}
+    return 200, result
+
+
+async def _invoke(body: dict, orchestrate_kwargs: dict, request_id: str, trace_id: str, current_span,
+                  idempotency_key=None) -> Tuple[int, dict, bool]:
+    """
+    멱등 키가 있으면 같은 키의 저장된 응답을 재사용하거나 실행 중인 요청에 합류하고, 없으면 바로 실행합니다.
+
+    Returns:
+        (status code, 응답 본문, 저장된 / 합류한 결과이면 True)
+    """
+    execute = functools.partial(_execute_invocation, body, orchestrate_kwargs, request_id, trace_id, current_span)
+    if not idempotency_key:
+        status_code, result = await execute()
+        return status_code, result, False
+
+    idempotency_key = str(idempotency_key)
+    if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        return 400, _error_content(f"{IDEMPOTENCY_HEADER}가 너무 깁니다."), False
+    fingerprint = request_fingerprint({k: v for k, v in body.items() if k != 'idempotency_key'})
+    # HTTP 200으로 돌아온 하위 agent 실패(일시적인 Bedrock / S3 오류 등)는 저장하지 않아 재시도하면 다시 실행
+    status_code, result, replayed = await get_idempotency_store().run(
+        scoped_key(orchestrate_kwargs["user_id"], idempotency_key), fingerprint, execute,
+        lambda status_code, content: not is_failed_result(content),
+    )
+    current_span.set_attribute("idempotent_replay", replayed)
+    if replayed:
+        logger.info("Invocations 멱등 응답 재사용: type=%s", result.get('type', 'unknown'))
+    return status_code, result, replayed
+
+
+def _invocation_error(e: Exception) -> Tuple[int, dict, dict, str]:
+    """
+    요청 처리 중 발생한 예외를 응답으로 바꿉니다 (except 블록 안에서 호출).
+
+    Returns:
+        (status code, 응답 본문, 추가 헤더, result_type)
+    """
+    if isinstance(e, DeadlineExceeded):
+        # 남은 작업은 취소됨 (async) 또는 다음 모델 / tool 호출 전에 중단됨 (thread)
+        logger.warning("Invocations 시간 초과: %s", e)
+        return 504, _error_content(str(e)), {}, "timeout"
+    if isinstance(e, QuotaExceeded):
+        # 사용자 quota 초과: 다른 사용자 요청에 영향을 주지 않도록 거절
+        logger.warning("Invocations 거절 (사용자 quota): %s", e)
+        return 429, _error_content(str(e)), {"Retry-After": str(max(1, math.ceil(e.retry_after)))}, "throttled"
+    if isinstance(e, IdempotencyConflict):
+        logger.warning("Invocations 거절 (멱등 키 충돌): %s", e)
+        return 422, _error_content(str(e)), {}, "conflict"
+    if isinstance(e, LaneFull):
+        # lane 대기열 초과: 처리하지 않고 바로 거절 (클라이언트가 재시도)
+        logger.warning("Invocations 거절: %s", e)
+        return 503, _error_content(str(e)), {"Retry-After": "1"}, "rejected"
+    logger.exception("Invocations 실패: %s: %s", type(e).__name__, e)
+    return 500, _error_content(f"요청 처리 중 오류가 발생했습니다: {str(e)}"), {}, "error"
+
+
 @app.post("/invocations")
 async def invocations(request: Request):
     """
     Agent 호출 엔드포인트
     Agent Core Runtime이 이 엔드포인트로 요청을 보냄
     """
-    import sys
-    import traceback
-    
     # orchestrator가 로드되지 않았으면 에러 반환
     if orchestrate_request is None:
         error_msg = "Orchestrator 초기화 실패. CloudWatch Logs를 확인하세요."
-        print(f"❌ ERROR: {error_msg}", file=sys.stderr, flush=True)
-        return JSONResponse(
-            status_code=500,
-            content={
-                "type": "error",
-                "content": "",
-                "message": error_msg
-            }
-        )
+        logger.error(error_msg)
+        return JSONResponse(status_code=500, content=_error_content(error_msg))
     
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    trace_id = trace_id_from_headers(request.headers) or uuid.uuid4().hex
+    trace_headers = {TRACE_HEADER: trace_id}
+    start = time.perf_counter()
+    result_type = "error"
+    with start_trace("invocations", trace_id=trace_id, request_id=request_id) as root, \
+            log_context(request_id=request_id, trace_id=trace_id), \
+            deadline_scope(_request_budget(request.headers)), \
+            IN_FLIGHT.track_inprogress():
+        try:
+            # multipart / raw binary 이미지 업로드는 JSON 파싱 없이 S3로 스트리밍
+            content_type = request.headers.get("content-type", "").lower()
+            if _is_binary_upload(content_type):
+                root.set_attribute("request_type", "upload")
+                try:
+                    status_code, result, replayed = await _handle_binary_upload(request, content_type, root)
+                except UploadRejected as e:
+                    logger.warning("바이너리 업로드 거부: %s", e)
+                    return JSONResponse(
+                        status_code=e.status_code,
+                        headers=trace_headers,
+                        content=_error_content(str(e))
+                    )
+                if replayed:
+                    trace_headers[IDEMPOTENCY_REPLAYED_HEADER] = "true"
+                result_type = result["type"]
+                return JSONResponse(status_code=status_code, content=result, headers=trace_headers)
+
+            # 요청 본문 파싱
+            body = await request.json()
+            
+            # 본문 전체를 직렬화하지 않고 필드별로 축약 (image_base64는 길이만)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Invocations 시작: %s", redact_payload(body))
+            
+            orchestrate_kwargs = _orchestrate_kwargs(body)
+            if orchestrate_kwargs is None:
+                error_msg = "입력 데이터가 필요합니다."
+                logger.warning(error_msg)
+                return JSONResponse(status_code=400, headers=trace_headers, content=_error_content(error_msg))
+            root.set_attribute("request_type", orchestrate_kwargs["request_type"])
+
+            status_code, result, replayed = await _invoke(
+                body, orchestrate_kwargs, request_id, trace_id, root,
+                idempotency_key=request.headers.get(IDEMPOTENCY_HEADER.lower()) or body.get('idempotency_key'),
+            )
+            if replayed:
+                trace_headers[IDEMPOTENCY_REPLAYED_HEADER] = "true"
+            result_type = result.get('type', 'unknown')
+            return JSONResponse(status_code=status_code, content=result, headers=trace_headers)
+
+        except Exception as e:
+            status_code, content, headers, result_type = _invocation_error(e)
+            return JSONResponse(status_code=status_code, headers={**trace_headers, **headers}, content=content)
+        finally:
+            REQUESTS.inc(type=result_type)
+            REQUEST_LATENCY.observe(time.perf_counter() - start, type=result_type)
+
+
+async def _run_batch_item(index: int, body, budget: Optional[float], batch_id: str, trace_id: str) -> dict:
+    """batch 항목 하나를 실행하고 NDJSON 한 줄로 보낼 결과를 반환합니다 (예외는 항목 오류로 변환)."""
+    request_id = f"{batch_id}-{index}"
+    start = time.perf_counter()
+    result_type = "error"
+    headers = {}
+    with span("batch_item", index=index) as item_span, \
+            log_context(request_id=request_id, batch_index=index), \
+            deadline_scope(budget), \
+            IN_FLIGHT.track_inprogress():
+        try:
+            orchestrate_kwargs = _orchestrate_kwargs(body) if isinstance(body, dict) else None
+            if orchestrate_kwargs is None:
+                status_code, result = 400, _error_content("입력 데이터가 필요합니다.")
+            else:
+                item_span.set_attribute("request_type", orchestrate_kwargs["request_type"])
+                status_code, result, replayed = await _invoke(
+                    body, orchestrate_kwargs, request_id, trace_id, item_span,
+                    idempotency_key=body.get('idempotency_key'),
+                )
+                if replayed:
+                    headers[IDEMPOTENCY_REPLAYED_HEADER] = "true"
+                result_type = result.get('type', 'unknown')
+        except Exception as e:
+            status_code, result, headers, result_type = _invocation_error(e)
+        finally:
+            REQUESTS.inc(type=result_type)
+            REQUEST_LATENCY.observe(time.perf_counter() - start, type=result_type)
+        item_span.set_attribute("status_code", status_code)
+    item = {"index": index, "status_code": status_code, "result": result}
+    if headers:
+        item["headers"] = headers
+    return item
+
+
+@app.post("/invocations/batch")
+async def invocations_batch(request: Request):
+    """
+    여러 /invocations 요청을 한 번에 실행하고 항목별 결과를 NDJSON으로 스트리밍합니다.
+
+    본문: /invocations 본문 배열, 또는 {"items": [...], "defaults": {...}, "order": "request" | "completed",
+    "concurrency": n}. defaults는 각 항목에 기본값으로 합쳐집니다 (항목 값이 우선).
+    각 항목은 /invocations와 같은 quota / lane / deadline(X-Request-Timeout, 항목마다 시작 시점부터) 안에서 실행되며,
+    한 항목의 오류는 그 항목의 status_code / result로만 전달됩니다.
+    마지막 줄은 {"done": true, "total", "succeeded", "failed", "elapsed_ms"}입니다.
+    """
+    if orchestrate_request is None:
+        error_msg = "Orchestrator 초기화 실패. CloudWatch Logs를 확인하세요."
+        logger.error(error_msg)
+        return JSONResponse(status_code=500, content=_error_content(error_msg))
+
+    batch_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    trace_id = trace_id_from_headers(request.headers) or uuid.uuid4().hex
+    trace_headers = {TRACE_HEADER: trace_id}
     try:
-        # 요청 본문 파싱
         body = await request.json()
-        
-        print(f"[DEBUG] ========== Invocations 시작 ==========", flush=True)
-        print(f"[DEBUG] Request body: {json.dumps(body, ensure_ascii=False)[:200]}...", flush=True)
-        
-        # 파라미터 추출
-        user_input = body.get('content') or body.get('inputText') or body.get('input') or body.get('user_input')
-        user_id = body.get('user_id')
-        current_date = body.get('record_date') or body.get('current_date')
-        request_type = body.get('request_type')
-        temperature = body.get('temperature')
-        
-        # 이미지 생성 관련 파라미터
-        text = body.get('text')  # 이미지 생성용 일기 텍스트
-        image_base64 = body.get('image_base64')  # S3 업로드용 이미지
-        record_date = body.get('record_date')  # S3 업로드용 날짜
-        
-        if not user_input:
-            error_msg = "입력 데이터가 필요합니다."
-            print(f"❌ ERROR: {error_msg}", file=sys.stderr, flush=True)
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "type": "error",
-                    "content": "",
-                    "message": error_msg
-                }
-            )
-        
-        print(f"[DEBUG] Extracted parameters:", flush=True)
-        print(f"[DEBUG]   user_input: {user_input[:100]}..." if len(str(user_input)) > 100 else f"[DEBUG]   user_input: {user_input}", flush=True)
-        print(f"[DEBUG]   user_id: {user_id}", flush=True)
-        print(f"[DEBUG]   current_date: {current_date}", flush=True)
-        print(f"[DEBUG]   request_type: {request_type}", flush=True)
-        print(f"[DEBUG]   text: {text[:50] if text else None}...", flush=True)
-        print(f"[DEBUG]   image_base64: {'<provided>' if image_base64 else None}", flush=True)
-        print(f"[DEBUG]   record_date: {record_date}", flush=True)
-        
-        # orchestrator 실행 - 모든 요청을 orchestrator가 처리
-        print(f"[DEBUG] Calling orchestrate_request...", flush=True)
-        result = orchestrate_request(
-            user_input=user_input,
-            user_id=user_id,
-            current_date=current_date,
-            request_type=request_type,
-            temperature=temperature,
-            text=text,
-            image_base64=image_base64,
-            record_date=record_date
-        )
-        print(f"[DEBUG] orchestrate_request completed", flush=True)
-        
-        print(f"[DEBUG] Result type: {result.get('type', 'unknown')}", flush=True)
-        print(f"[DEBUG] ========== Invocations 완료 ==========", flush=True)
-        
-        return JSONResponse(content=result)
-        
-    except Exception as e:
-        print(f"[ERROR] ========== Invocations 실패 ==========", file=sys.stderr, flush=True)
-        print(f"[ERROR] Exception type: {type(e).__name__}", file=sys.stderr, flush=True)
-        print(f"[ERROR] Exception message: {str(e)}", file=sys.stderr, flush=True)
-        print(f"[ERROR] Traceback:", file=sys.stderr, flush=True)
-        traceback.print_exc(file=sys.stderr)
-        sys.stderr.flush()
-        
-        return JSONResponse(
-            status_code=500,
-            content={
-                "type": "error",
-                "content": "",
-                "message": f"요청 처리 중 오류가 발생했습니다: {str(e)}"
-            }
-        )
+    except ValueError:
+        return JSONResponse(status_code=400, headers=trace_headers, content=_error_content("JSON 본문이 필요합니다."))
+
+    options = body if isinstance(body, dict) else {"items": body}
+    items = options.get("items")
+    order = options.get("order", "request")
+    defaults = options.get("defaults") or {}
+    error_msg = None
+    if not isinstance(items, list) or not items:
+        error_msg = "items 배열이 필요합니다."
+    elif len(items) > BATCH_MAX_ITEMS:
+        error_msg = f"batch 항목은 최대 {BATCH_MAX_ITEMS}개입니다."
+    elif order not in ("request", "completed"):
+        error_msg = "order는 request 또는 completed입니다."
+    elif not isinstance(defaults, dict):
+        error_msg = "defaults는 객체여야 합니다."
+    if error_msg:
+        return JSONResponse(status_code=400, headers=trace_headers, content=_error_content(error_msg))
+    try:
+        concurrency = max(1, min(int(options.get("concurrency") or BATCH_CONCURRENCY), BATCH_CONCURRENCY))
+    except (TypeError, ValueError):
+        concurrency = BATCH_CONCURRENCY
+    if defaults:
+        items = [{**defaults, **item} if isinstance(item, dict) else item for item in items]
+    budget = _request_budget(request.headers)
+
+    async def stream():
+        start = time.perf_counter()
+        counts = {"succeeded": 0, "failed": 0}
+        # 응답 스트리밍은 핸들러가 반환된 뒤 실행되므로 trace / 로그 컨텍스트를 여기서 시작
+        with start_trace("invocations_batch", trace_id=trace_id, request_id=batch_id, items=len(items)), \
+                log_context(trace_id=trace_id, batch_id=batch_id):
+            logger.info("Batch 시작: items=%d concurrency=%d order=%s", len(items), concurrency, order)
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def run(index, item):
+                async with semaphore:
+                    return await _run_batch_item(index, item, budget, batch_id, trace_id)
+
+            tasks = [asyncio.ensure_future(run(index, item)) for index, item in enumerate(items)]
+            try:
+                for pending in (tasks if order == "request" else asyncio.as_completed(tasks)):
+                    item = await pending
+                    counts["succeeded" if 200 <= item["status_code"] < 300 else "failed"] += 1
+                    yield json.dumps(item, ensure_ascii=False, default=str) + "\n"
+            finally:
+                # 클라이언트 연결이 끊기면 남은 항목 취소
+                for task in tasks:
+                    task.cancel()
+            elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+            logger.info("Batch 완료: items=%d succeeded=%d failed=%d elapsed_ms=%.1f",
+                        len(items), counts["succeeded"], counts["failed"], elapsed_ms)
+            yield json.dumps({"done": True, "total": len(items), **counts, "elapsed_ms": elapsed_ms}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson", headers=trace_headers)
 
 
 if __name__ == "__main__":
@@ -166,7 +910,12 @@ if __name__ == "__main__":
     print("Port: 8080")
     print("Endpoints:")
     print("  - GET  /ping")
+    print("  - GET  /ready")
+    print("  - GET  /metrics")
+    print("  - GET  /uploads?key=...")
+    print("  - GET  /jobs/{job_id}[/events]")
     print("  - POST /invocations")
+    print("  - POST /invocations/batch")
     print(f"Orchestrator 상태: {'✅ 로드됨' if orchestrate_request else '❌ 로드 실패'}")
     print("=" * 80)
     
@@ -175,7 +924,13 @@ if __name__ == "__main__":
             app,
             host="0.0.0.0",
             port=8080,
-            log_level="info"
+            log_level=os.environ.get("LOG_LEVEL", "info").lower(),
+            # uvicorn 로그도 utils.log의 Queue 핸들러로 출력
+            log_config=None,
+            # uvloop / httptools가 설치되어 있으면 사용 (uvicorn[standard])
+            loop="auto",
+            http="auto",
+            access_log=os.environ.get("ACCESS_LOG", "false").lower() in ("1", "true", "yes")
         )
     except Exception as e:
         print(f"❌ 서버 시작 실패: {str(e)}")
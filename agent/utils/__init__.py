@@ -2,5 +2,6 @@
 Utility functions
 """
 from .secrets import get_secret, get_config
+from .model_routing import get_route_model, get_route_model_id
 
-__all__ = ['get_secret', 'get_config']
+__all__ = ['get_secret', 'get_config', 'get_route_model', 'get_route_model_id']
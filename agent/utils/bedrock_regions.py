@@ -0,0 +1,468 @@
+"""
+Bedrock 리전 / cross-region inference profile failover
+모델별로 호출할 리전(또는 inference profile) 목록을 순서대로 두고,
+throttling이나 리전 장애로 실패하면 다음 target으로 바로 넘어갑니다.
+
+설정 (Secret 또는 환경변수 BEDROCK_MODEL_REGIONS, JSON):
+    {
+      "anthropic.claude-sonnet-4-5-20250929-v1:0": [
+        {"region": "us-east-1", "model_id": "us.anthropic.claude-sonnet-4-5-20250929-v1:0"},
+        {"region": "us-west-2", "model_id": "us.anthropic.claude-sonnet-4-5-20250929-v1:0"},
+        {"region": "us-east-1", "model_id": "global.anthropic.claude-sonnet-4-5-20250929-v1:0"}
+      ],
+      "amazon.nova-canvas-v1:0": ["us-east-1", "us-west-2"],
+      "*": ["us-east-1", "us-west-2"]
+    }
+
+- 키는 호출하는 model ID, inference profile 접두사를 뗀 기반 model ID, "*"(그 외 모든 모델) 순서로 찾습니다.
+- 문자열 항목은 리전 이름이며 같은 model ID를 그 리전에서 호출합니다
+  (inference profile ARN은 리전이 고정되어 있으므로 dict 항목으로 리전별 profile을 지정).
+- throttling / 리전 오류가 난 target은 BEDROCK_REGION_COOLDOWN초 동안 목록 뒤로 보냅니다.
+- 설정이 없으면 AWS_REGION 하나만 사용합니다 (기존 동작).
+
+모델마다 circuit breaker("bedrock:<기반 model ID>")가 있어 모든 target이 연속으로 실패하면 호출하지 않고 바로 실패합니다.
+BEDROCK_FALLBACK_MODELS에 fallback 모델이 있으면 circuit이 열렸거나 모든 target이 실패했을 때 그 모델로 같은 요청을 보냅니다.
+
+Strands agent는 FailoverBedrockModel(get_route_model이 생성), invoke_model 직접 호출은 invoke_model_json을 사용합니다.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, HTTPClientError
+from strands.models import BedrockModel
+from strands.types.exceptions import ModelThrottledException
+
+from .circuit_breaker import CIRCUIT_BREAKER_ENABLED, CircuitBreaker, CircuitOpenError, get_breaker
+from .deadline import check_deadline
+from .metrics import Counter, Histogram
+from .secrets import base_model_id, get_config
+from .tracing import instrument_boto3
+
+logger = logging.getLogger(__name__)
+
+# throttling / 리전 오류 후 해당 target을 뒤로 미루는 시간 (초)
+REGION_COOLDOWN = float(os.environ.get("BEDROCK_REGION_COOLDOWN", "30"))
+# failover 목록이 있는 모델의 리전별 boto3 재시도 횟수 (첫 시도 포함)
+# 같은 리전에서 오래 재시도하지 않고 다음 리전으로 넘어가도록 기본값을 낮게 둠
+REGION_MAX_ATTEMPTS = int(os.environ.get("BEDROCK_REGION_MAX_ATTEMPTS", "2"))
+# 리전별 지연시간 샘플 보관 개수 (백분위 계산용)
+REGION_SAMPLE_SIZE = int(os.environ.get("BEDROCK_REGION_SAMPLE_SIZE", "200"))
+
+# 다음 target으로 넘어가는 오류 코드 (EventStream 오류는 소문자로 시작하므로 소문자로 비교)
+THROTTLE_CODES = {"throttlingexception", "toomanyrequestsexception", "servicequotaexceededexception"}
+REGIONAL_ERROR_CODES = THROTTLE_CODES | {
+    "serviceunavailableexception",
+    "internalserverexception",
+    "modelnotreadyexception",
+    "modeltimeoutexception",
+    "modelstreamerrorexception",
+}
+
+# outcome: ok / throttled / unavailable / error
+REGION_CALLS = Counter(
+    "agent_bedrock_region_calls_total", "Bedrock calls by target region and outcome", ("model_id", "region", "outcome")
+)
+REGION_FAILOVERS = Counter(
+    "agent_bedrock_region_failovers_total", "Bedrock failovers away from a region", ("model_id", "region")
+)
+MODEL_FALLBACKS = Counter(
+    "agent_bedrock_model_fallbacks_total", "Requests sent to the fallback model", ("model_id", "fallback", "reason")
+)
+REGION_LATENCY = Histogram(
+    "agent_bedrock_region_call_duration_seconds", "Bedrock call latency by target region", ("model_id", "region")
+)
+
+
+@dataclass(frozen=True)
+class RegionTarget:
+    """호출 대상 (리전 + 그 리전에서 사용할 model ID / inference profile)"""
+
+    region: str
+    model_id: str
+
+
+_config = None
+_config_lock = threading.Lock()
+_clients: Dict[tuple, Any] = {}
+_clients_lock = threading.Lock()
+_cooldown: Dict[RegionTarget, float] = {}
+_stats: Dict[RegionTarget, Dict[str, Any]] = {}
+_stats_lock = threading.Lock()
+
+
+def _get_config() -> dict:
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                try:
+                    _config = get_config()
+                except Exception as e:
+                    logger.warning("[BedrockRegions] 설정 로드 실패, 환경변수 사용: %s", e)
+                    _config = {}
+    return _config
+
+
+def default_region() -> str:
+    return _get_config().get("AWS_REGION") or os.environ.get("AWS_REGION", "us-east-1")
+
+
+def get_region_targets(model_id: str) -> List[RegionTarget]:
+    """
+    model ID의 호출 target 목록을 설정 순서대로 반환합니다.
+
+    Args:
+        model_id: 호출할 model ID / inference profile
+
+    Returns:
+        RegionTarget 목록 (설정이 없으면 [AWS_REGION])
+    """
+    regions = _get_config().get("BEDROCK_MODEL_REGIONS") or {}
+    entries = regions.get(model_id) or regions.get(base_model_id(model_id)) or regions.get("*")
+    if not entries:
+        return [RegionTarget(default_region(), model_id)]
+    return [RegionTarget(entry["region"], entry.get("model_id") or model_id) for entry in entries]
+
+
+def fallback_model_id(model_id: str) -> Optional[str]:
+    """BEDROCK_FALLBACK_MODELS의 fallback 모델 (호출 model ID, 기반 model ID 순서로 조회)"""
+    fallbacks = _get_config().get("BEDROCK_FALLBACK_MODELS") or {}
+    fallback = fallbacks.get(model_id) or fallbacks.get(base_model_id(model_id))
+    return fallback if fallback and fallback != model_id else None
+
+
+def model_breaker(model_id: str) -> CircuitBreaker:
+    """모델별 circuit breaker (리전 / inference profile과 무관하게 기반 model ID 기준)"""
+    return get_breaker(f"bedrock:{base_model_id(model_id)}")
+
+
+def ordered_targets(targets: List[RegionTarget]) -> List[RegionTarget]:
+    """cooldown 중인 target을 뒤로 보낸 호출 순서 (모두 cooldown 중이면 먼저 풀리는 순서)"""
+    if len(targets) <= 1:
+        return list(targets)
+    now = time.monotonic()
+    ready = [t for t in targets if _cooldown.get(t, 0) <= now]
+    cooling = sorted((t for t in targets if _cooldown.get(t, 0) > now), key=lambda t: _cooldown[t])
+    return ready + cooling
+
+
+def error_code(error: BaseException) -> str:
+    if isinstance(error, ModelThrottledException):
+        return "ThrottlingException"
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code", "") or type(error).__name__
+    return type(error).__name__
+
+
+def is_regional_error(error: BaseException) -> bool:
+    """다른 리전 / profile로 넘어가면 성공할 수 있는 오류인지 (throttling, 리전 장애, 연결 오류)"""
+    if isinstance(error, (ModelThrottledException, BotoConnectionError, HTTPClientError)):
+        return True
+    return isinstance(error, ClientError) and error_code(error).lower() in REGIONAL_ERROR_CODES
+
+
+def _outcome(error: Optional[BaseException]) -> str:
+    if error is None:
+        return "ok"
+    if isinstance(error, ModelThrottledException) or error_code(error).lower() in THROTTLE_CODES:
+        return "throttled"
+    if is_regional_error(error):
+        return "unavailable"
+    return "error"
+
+
+def record_region_call(
+    target: RegionTarget,
+    elapsed: float,
+    error: Optional[BaseException] = None,
+    failover: bool = False,
+) -> None:
+    """
+    target별 호출 결과와 지연시간을 기록합니다.
+
+    Args:
+        target: 호출한 target
+        elapsed: 소요 시간 (초)
+        error: 실패 시 예외
+        failover: 실패 후 다음 target으로 넘어갔는지 여부 (해당 target은 cooldown)
+    """
+    outcome = _outcome(error)
+    REGION_CALLS.inc(model_id=target.model_id, region=target.region, outcome=outcome)
+    REGION_LATENCY.observe(elapsed, model_id=target.model_id, region=target.region)
+    if failover:
+        REGION_FAILOVERS.inc(model_id=target.model_id, region=target.region)
+        _cooldown[target] = time.monotonic() + REGION_COOLDOWN
+
+    with _stats_lock:
+        stats = _stats.get(target)
+        if stats is None:
+            stats = {
+                "count": 0,
+                "errors": 0,
+                "throttled": 0,
+                "failovers": 0,
+                "total": 0.0,
+                "max": 0.0,
+                "samples": deque(maxlen=REGION_SAMPLE_SIZE),
+            }
+            _stats[target] = stats
+        stats["count"] += 1
+        if outcome != "ok":
+            stats["errors"] += 1
+        if outcome == "throttled":
+            stats["throttled"] += 1
+        if failover:
+            stats["failovers"] += 1
+        stats["total"] += elapsed
+        stats["max"] = max(stats["max"], elapsed)
+        if outcome == "ok":
+            stats["samples"].append(elapsed)
+
+
+def _percentile(sorted_samples, pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def get_region_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    target(리전 + model ID)별 호출 통계를 반환합니다. 백분위는 성공한 호출 기준입니다.
+
+    Returns:
+        {"<model_id>@<region>": {count, errors, throttled, failovers, avg_ms, p50_ms, p95_ms, max_ms, cooldown}}
+    """
+    with _stats_lock:
+        snapshot = {target: (dict(stats), sorted(stats["samples"])) for target, stats in _stats.items()}
+
+    now = time.monotonic()
+    result = {}
+    for target, (stats, samples) in snapshot.items():
+        result[f"{target.model_id}@{target.region}"] = {
+            "model_id": target.model_id,
+            "region": target.region,
+            "count": stats["count"],
+            "errors": stats["errors"],
+            "throttled": stats["throttled"],
+            "failovers": stats["failovers"],
+            "avg_ms": round(stats["total"] / stats["count"] * 1000, 1) if stats["count"] else 0.0,
+            "p50_ms": round(_percentile(samples, 50) * 1000, 1),
+            "p95_ms": round(_percentile(samples, 95) * 1000, 1),
+            "max_ms": round(stats["max"] * 1000, 1),
+            "cooldown": _cooldown.get(target, 0) > now,
+        }
+    return result
+
+
+# ============================================================================
+# boto3 invoke_model
+# ============================================================================
+
+def get_runtime_client(region: Optional[str] = None, failover: bool = False):
+    """
+    리전별 bedrock-runtime client를 반환합니다 (기본 session → trace hook 적용).
+
+    Args:
+        region: 리전 (None이면 AWS_REGION)
+        failover: True면 리전 안에서의 재시도를 BEDROCK_REGION_MAX_ATTEMPTS로 제한
+    """
+    key = (region or default_region(), failover)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                kwargs = {"region_name": key[0]}
+                if failover:
+                    kwargs["config"] = Config(retries={"mode": "standard", "max_attempts": REGION_MAX_ATTEMPTS})
+                client = boto3.client("bedrock-runtime", **kwargs)
+                _clients[key] = client
+    return client
+
+
+def invoke_model_json(model_id: str, body: Dict[str, Any], accept: str = "application/json") -> Dict[str, Any]:
+    """
+    invoke_model을 리전 failover와 함께 호출하고 JSON 응답 본문을 반환합니다.
+    circuit이 열려 있거나 모든 target이 실패하면 fallback 모델(설정된 경우)로 다시 호출합니다.
+
+    Args:
+        model_id: 호출할 model ID / inference profile
+        body: 요청 본문
+        accept: 응답 Accept 헤더
+
+    Raises:
+        CircuitOpenError: circuit이 열려 있고 fallback 모델이 없음
+        마지막 target의 오류 또는 리전과 무관한 오류 (ValidationException 등)
+    """
+    fallback = fallback_model_id(model_id)
+    try:
+        with model_breaker(model_id).guard(is_regional_error):
+            return _invoke_targets(model_id, body, accept)
+    except Exception as e:
+        if fallback is None or not (isinstance(e, CircuitOpenError) or is_regional_error(e)):
+            raise
+        reason = "circuit_open" if isinstance(e, CircuitOpenError) else "error"
+        MODEL_FALLBACKS.inc(model_id=model_id, fallback=fallback, reason=reason)
+        logger.warning("[BedrockRegions] %s 사용 불가 (%s), fallback 모델 호출: %s", model_id, reason, fallback)
+    with model_breaker(fallback).guard(is_regional_error):
+        return _invoke_targets(fallback, body, accept)
+
+
+def _invoke_targets(model_id: str, body: Dict[str, Any], accept: str) -> Dict[str, Any]:
+    targets = ordered_targets(get_region_targets(model_id))
+    failover = len(targets) > 1
+    payload = json.dumps(body)
+    for index, target in enumerate(targets):
+        # 요청 deadline이 지났으면 다음 리전으로 넘어가지 않음
+        check_deadline("bedrock")
+        start = time.perf_counter()
+        try:
+            response = get_runtime_client(target.region, failover).invoke_model(
+                modelId=target.model_id,
+                contentType="application/json",
+                accept=accept,
+                body=payload
+            )
+            result = json.loads(response["body"].read())
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            if not is_regional_error(e) or index == len(targets) - 1:
+                record_region_call(target, elapsed, e)
+                raise
+            record_region_call(target, elapsed, e, failover=True)
+            logger.warning(
+                "[BedrockRegions] %s@%s 실패 (%s), 다음 target으로 전환: %s",
+                target.model_id, target.region, error_code(e), targets[index + 1].region
+            )
+            continue
+        record_region_call(target, time.perf_counter() - start)
+        return result
+
+
+# ============================================================================
+# Strands BedrockModel
+# ============================================================================
+
+class FailoverBedrockModel(BedrockModel):
+    """
+    여러 리전 / inference profile에 걸친 BedrockModel
+    첫 target이 자기 자신(기본 client)이고 나머지 target은 각각 BedrockModel을 둡니다.
+    응답 스트림이 시작되기 전에 regional 오류가 나면 다음 target으로 같은 요청을 다시 보냅니다.
+    모델 circuit이 열려 있거나 모든 target이 실패하면 fallback 모델로 보내거나 바로 실패합니다.
+    (structured_output도 내부적으로 stream을 사용하므로 같이 적용됨)
+    """
+
+    def __init__(self, targets: List[RegionTarget], fallback: Optional[BedrockModel] = None, **model_config):
+        first = targets[0]
+        # target이 하나뿐이면 boto3 기본 재시도 유지
+        if len(targets) > 1:
+            model_config.setdefault(
+                "boto_client_config", Config(retries={"mode": "standard", "max_attempts": REGION_MAX_ATTEMPTS})
+            )
+        super().__init__(model_id=first.model_id, region_name=first.region, **model_config)
+        self.targets = list(targets)
+        self.fallback = fallback
+        self.breaker = model_breaker(first.model_id)
+        self._target_models = {first: self}
+        for target in targets[1:]:
+            if target in self._target_models:
+                continue
+            model = BedrockModel(model_id=target.model_id, region_name=target.region, **model_config)
+            # BedrockModel은 별도 boto3 Session을 만들므로 client에 직접 trace hook 등록
+            instrument_boto3(model.client)
+            self._target_models[target] = model
+
+    async def stream(self, *args, **kwargs):
+        if not self.breaker.allow():
+            if self.fallback is None:
+                raise CircuitOpenError(self.breaker.name)
+            reason = "circuit_open"
+        else:
+            started = False
+            try:
+                async for event in self._stream_targets(*args, **kwargs):
+                    started = True
+                    yield event
+            except BaseException as e:
+                # 일부 응답을 이미 내보냈거나 regional 오류가 아니면 fallback으로 다시 시작하지 않음
+                if not self.breaker.record_error(e, is_regional_error) or started or self.fallback is None:
+                    raise
+                reason = "error"
+            else:
+                self.breaker.record_success()
+                return
+
+        MODEL_FALLBACKS.inc(model_id=self.config["model_id"], fallback=self.fallback.config["model_id"], reason=reason)
+        logger.warning(
+            "[BedrockRegions] %s 사용 불가 (%s), fallback 모델 호출: %s",
+            self.config["model_id"], reason, self.fallback.config["model_id"]
+        )
+        async for event in self.fallback.stream(*args, **kwargs):
+            yield event
+
+    async def _stream_targets(self, *args, **kwargs):
+        targets = ordered_targets(self.targets)
+        for index, target in enumerate(targets):
+            if index > 0:
+                check_deadline("model")
+            model = self._target_models[target]
+            events = super().stream(*args, **kwargs) if model is self else model.stream(*args, **kwargs)
+            start = time.perf_counter()
+            started = False
+            try:
+                async for event in events:
+                    started = True
+                    yield event
+            except Exception as e:
+                elapsed = time.perf_counter() - start
+                # 이미 일부 응답을 내보냈으면 다른 리전에서 다시 시작할 수 없음
+                if started or not is_regional_error(e) or index == len(targets) - 1:
+                    record_region_call(target, elapsed, e)
+                    raise
+                record_region_call(target, elapsed, e, failover=True)
+                logger.warning(
+                    "[BedrockRegions] %s@%s 실패 (%s), 다음 target으로 전환: %s",
+                    target.model_id, target.region, error_code(e), targets[index + 1].region
+                )
+                continue
+            record_region_call(target, time.perf_counter() - start)
+            return
+
+
+def build_bedrock_model(model_id: Optional[str], use_fallback: bool = True, **model_config) -> BedrockModel:
+    """
+    FailoverBedrockModel(리전 failover + circuit breaker + fallback 모델)을 만듭니다.
+    리전 설정 / fallback 모델이 없고 CIRCUIT_BREAKER=false면 BedrockModel 그대로 반환합니다.
+
+    Args:
+        model_id: model ID / inference profile (None이면 Strands 기본 모델)
+        use_fallback: BEDROCK_FALLBACK_MODELS의 fallback 모델 사용 여부 (fallback 모델 자신은 False)
+        model_config: BedrockModel 추가 설정 (cache_config 등)
+    """
+    region = default_region()
+    kwargs = {"region_name": region, **model_config}
+    if model_id:
+        kwargs["model_id"] = model_id
+    model = BedrockModel(**kwargs)
+    # Strands 기본 모델도 실제 model ID 기준으로 리전 설정 조회
+    effective_model_id = model.config["model_id"]
+    targets = get_region_targets(effective_model_id)
+    fallback_id = fallback_model_id(effective_model_id) if use_fallback else None
+    if targets == [RegionTarget(region, effective_model_id)] and not fallback_id and not CIRCUIT_BREAKER_ENABLED:
+        return model
+    if len(targets) > 1 or fallback_id:
+        logger.info(
+            "[BedrockRegions] %s → %s (fallback: %s)", effective_model_id,
+            ", ".join(f"{t.model_id}@{t.region}" for t in targets), fallback_id
+        )
+    fallback = build_bedrock_model(fallback_id, use_fallback=False, **model_config) if fallback_id else None
+    return FailoverBedrockModel(targets, fallback=fallback, **model_config)
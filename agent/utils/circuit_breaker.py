@@ -0,0 +1,235 @@
+"""
+의존성별 circuit breaker
+외부 의존성(Bedrock 모델, Knowledge Base, S3, report API)이 연속으로 실패하면 circuit을 열어
+CIRCUIT_OPEN_SECONDS 동안 호출하지 않고 바로 CircuitOpenError(또는 fallback)로 응답합니다.
+그 뒤 half-open 상태에서 CIRCUIT_HALF_OPEN_PROBES개의 호출만 통과시켜 성공하면 닫고, 실패하면 다시 엽니다.
+
+    with get_breaker("s3").guard():
+        client.put_object(...)
+
+    breaker = get_breaker("kb_retrieve")
+    if not breaker.allow():
+        return 실패 응답
+    ... breaker.record_success() / breaker.record_failure()
+
+- 의존성 이름: "bedrock:<기반 model ID>", "kb_retrieve", "s3", "report_api"
+- deadline 초과 / 취소는 의존성 상태와 무관하므로 실패로 세지 않습니다.
+- CIRCUIT_BREAKER=false면 모든 호출을 통과시킵니다.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from .deadline import DeadlineExceeded
+from .metrics import Counter, register_collector
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_BREAKER_ENABLED = os.environ.get("CIRCUIT_BREAKER", "true").lower() in ("1", "true", "yes")
+# 연속 실패 횟수가 이 값에 도달하면 circuit open
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "5"))
+# open 상태 유지 시간 (초), 지나면 half-open
+CIRCUIT_OPEN_SECONDS = float(os.environ.get("CIRCUIT_OPEN_SECONDS", "30"))
+# half-open 상태에서 동시에 통과시킬 probe 호출 수
+CIRCUIT_HALF_OPEN_PROBES = int(os.environ.get("CIRCUIT_HALF_OPEN_PROBES", "1"))
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+_STATE_VALUES = {STATE_CLOSED: 0, STATE_HALF_OPEN: 1, STATE_OPEN: 2}
+
+CIRCUIT_TRANSITIONS = Counter(
+    "agent_circuit_transitions_total", "Circuit breaker state transitions", ("dependency", "state")
+)
+CIRCUIT_REJECTED = Counter(
+    "agent_circuit_rejected_total", "Calls rejected without trying because the circuit was open", ("dependency",)
+)
+
+# 실패로 세지 않는 예외 (의존성 상태와 무관)
+_IGNORED_ERRORS = (DeadlineExceeded, asyncio.CancelledError, GeneratorExit, KeyboardInterrupt)
+
+
+class CircuitOpenError(Exception):
+    """circuit이 열려 있어 호출하지 않음"""
+
+    def __init__(self, dependency: str):
+        super().__init__(f"{dependency}을(를) 일시적으로 사용할 수 없습니다 (circuit open)")
+        self.dependency = dependency
+
+
+class CircuitBreaker:
+    """
+    연속 실패 기반 circuit breaker (스레드 안전)
+
+    Args:
+        name: 의존성 이름 (메트릭 label)
+        failure_threshold: circuit을 여는 연속 실패 횟수
+        open_seconds: open 유지 시간 (초)
+        half_open_probes: half-open 상태에서 동시에 허용할 호출 수
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        open_seconds: float = CIRCUIT_OPEN_SECONDS,
+        half_open_probes: int = CIRCUIT_HALF_OPEN_PROBES,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == STATE_OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(STATE_HALF_OPEN)
+        return self._state
+
+    def _transition(self, state: str) -> None:
+        # _lock 안에서 호출
+        if state == self._state:
+            return
+        self._state = state
+        self._probes = 0
+        if state == STATE_OPEN:
+            self._opened_at = time.monotonic()
+        CIRCUIT_TRANSITIONS.inc(dependency=self.name, state=state)
+        log = logger.warning if state == STATE_OPEN else logger.info
+        log("[Circuit] %s → %s (연속 실패 %d)", self.name, state, self._failures)
+
+    def allow(self) -> bool:
+        """호출해도 되는지 확인합니다. True를 받았으면 결과를 record_* 로 반드시 알려야 합니다."""
+        if not CIRCUIT_BREAKER_ENABLED:
+            return True
+        with self._lock:
+            state = self._current_state()
+            if state == STATE_CLOSED:
+                return True
+            if state == STATE_HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+        CIRCUIT_REJECTED.inc(dependency=self.name)
+        return False
+
+    def before_call(self) -> None:
+        """allow()가 False면 CircuitOpenError를 던집니다."""
+        if not self.allow():
+            raise CircuitOpenError(self.name)
+
+    def record_success(self) -> None:
+        """의존성이 응답함 (half-open이면 circuit을 닫음)"""
+        with self._lock:
+            self._failures = 0
+            if self._current_state() != STATE_CLOSED:
+                self._transition(STATE_CLOSED)
+
+    def record_failure(self) -> None:
+        """의존성 실패 (연속 실패가 기준에 도달하거나 half-open probe가 실패하면 circuit을 엶)"""
+        with self._lock:
+            self._failures += 1
+            state = self._current_state()
+            if state == STATE_HALF_OPEN or (state == STATE_CLOSED and self._failures >= self.failure_threshold):
+                self._transition(STATE_OPEN)
+
+    def release(self) -> None:
+        """결과와 무관하게 끝난 호출 (deadline 초과, 취소 등) - half-open probe 자리만 반납"""
+        with self._lock:
+            if self._state == STATE_HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_error(self, error: BaseException, is_failure: Optional[Callable[[BaseException], bool]] = None) -> bool:
+        """
+        예외로 끝난 호출을 기록합니다.
+
+        Args:
+            error: 발생한 예외
+            is_failure: 의존성 실패로 셀 예외인지 판단 (None이면 모든 예외).
+                실패가 아닌 예외(잘못된 요청 등)는 의존성이 응답한 것으로 봅니다.
+
+        Returns:
+            실패로 기록했으면 True
+        """
+        if isinstance(error, _IGNORED_ERRORS) or isinstance(error, CircuitOpenError):
+            self.release()
+            return False
+        if is_failure is None or is_failure(error):
+            self.record_failure()
+            return True
+        self.record_success()
+        return False
+
+    @contextmanager
+    def guard(self, is_failure: Optional[Callable[[BaseException], bool]] = None):
+        """
+        with 블록을 이 breaker로 보호합니다. circuit이 열려 있으면 CircuitOpenError를 던집니다.
+
+        Args:
+            is_failure: 실패로 셀 예외 판단 함수 (None이면 모든 예외)
+        """
+        self.before_call()
+        try:
+            yield
+        except BaseException as e:
+            self.record_error(e, is_failure)
+            raise
+        else:
+            self.record_success()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            return {
+                "state": state,
+                "failures": self._failures,
+                "open_for": round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1)
+                if state == STATE_OPEN else 0.0,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """의존성 이름별 CircuitBreaker (프로세스당 하나)"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(name)
+                _breakers[name] = breaker
+    return breaker
+
+
+def get_circuit_stats() -> Dict[str, Dict[str, Any]]:
+    """의존성별 circuit 상태 (state, 연속 실패 수, open 남은 시간)"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+
+def _circuit_collector():
+    for name, stats in get_circuit_stats().items():
+        yield (
+            "agent_circuit_state", "gauge", "Circuit breaker state (0=closed, 1=half_open, 2=open)",
+            {"dependency": name}, _STATE_VALUES[stats["state"]],
+        )
+
+
+# 워커 중 하나라도 open이면 open으로 표시
+register_collector(_circuit_collector, merge={"agent_circuit_state": "max"})
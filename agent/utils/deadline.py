@@ -0,0 +1,116 @@
+"""
+요청 단위 deadline (시간 예산)
+/invocations에서 정한 예산을 contextvars로 orchestrator → 하위 agent → tool → 외부 호출까지 전달하고,
+예산이 끝나면 더 이상 모델 / tool / 외부 호출을 시작하지 않습니다.
+
+    with deadline_scope(30):
+        ...
+        check_deadline("nova")                 # 남은 시간이 없으면 DeadlineExceeded
+        client.get(url, timeout=timeout_for(30))  # min(30, 남은 시간)
+
+- Strands agent: Agent(hooks=[DeadlineHook()])가 모델 호출 / tool 호출 직전에 확인합니다.
+- async 경로는 server가 asyncio.wait_for로 orchestrator task 자체를 취소합니다.
+- deadline_scope 밖(warm-up, 벤치마크 직접 호출 등)에서는 제한이 없습니다.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from .metrics import Counter
+
+try:
+    from strands.hooks import BeforeModelCallEvent, BeforeToolCallEvent, HookProvider, HookRegistry
+except ImportError:  # strands-agents < 1.10
+    from strands.experimental.hooks import (
+        BeforeModelInvocationEvent as BeforeModelCallEvent,
+        BeforeToolInvocationEvent as BeforeToolCallEvent,
+    )
+    from strands.hooks import HookProvider, HookRegistry
+
+logger = logging.getLogger(__name__)
+
+# 외부 호출 timeout 하한 (초) - 남은 시간이 아주 짧아도 0 timeout으로 호출하지 않음
+MIN_CALL_TIMEOUT = 0.5
+
+# stage: deadline을 넘겨 중단된 지점 (model / tool / api / bedrock / nova 등)
+DEADLINE_EXCEEDED = Counter(
+    "agent_deadline_exceeded_total", "Work skipped or cancelled because the request deadline passed", ("stage",)
+)
+
+# time.monotonic() 기준 절대 시각
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """요청 deadline이 지나 작업을 중단함"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"요청 처리 시간이 초과되었습니다 ({stage})")
+        self.stage = stage
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """
+    with 블록에 시간 예산을 설정합니다. 이미 더 이른 deadline이 있으면 그것을 유지합니다.
+
+    Args:
+        seconds: 예산 (초). None 또는 0 이하면 제한 없음
+    """
+    deadline = _deadline.get()
+    if seconds is not None and seconds > 0:
+        candidate = time.monotonic() + seconds
+        deadline = candidate if deadline is None else min(deadline, candidate)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """남은 시간 (초, 지났으면 0). deadline이 없으면 None"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def check_deadline(stage: str) -> None:
+    """deadline이 지났으면 DeadlineExceeded를 던집니다 (새 작업을 시작하기 직전에 호출)."""
+    left = remaining()
+    if left is not None and left <= 0:
+        DEADLINE_EXCEEDED.inc(stage=stage)
+        logger.warning("[Deadline] %s 호출 전 deadline 초과, 중단", stage)
+        raise DeadlineExceeded(stage)
+
+
+def timeout_for(default: float, stage: str = "call") -> float:
+    """
+    외부 호출 timeout: min(default, 남은 시간). deadline이 지났으면 DeadlineExceeded
+
+    Args:
+        default: 원래 timeout (초)
+        stage: 메트릭 / 오류 메시지에 남길 호출 이름
+    """
+    check_deadline(stage)
+    left = remaining()
+    if left is None:
+        return default
+    return max(MIN_CALL_TIMEOUT, min(default, left))
+
+
+class DeadlineHook(HookProvider):
+    """Strands agent의 모델 호출 / tool 호출 직전에 deadline을 확인하는 hook"""
+
+    def register_hooks(self, registry: HookRegistry, **kwargs) -> None:
+        registry.add_callback(BeforeModelCallEvent, self._before_model_call)
+        registry.add_callback(BeforeToolCallEvent, self._before_tool_call)
+
+    def _before_model_call(self, event) -> None:
+        check_deadline("model")
+
+    def _before_tool_call(self, event) -> None:
+        check_deadline("tool")
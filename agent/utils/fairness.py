@@ -0,0 +1,343 @@
+"""
+사용자별 공정성 / 동시 실행 quota
+orchestrator를 실행하기 전에 user_id별로 token bucket(요청 속도)과 동시 실행 수를 확인합니다.
+한 사용자가 이미지 미리보기나 리포트 생성을 반복해도 다른 사용자의 요청이 밀리지 않도록,
+한도를 넘은 요청은 deadline 안에서 잠시 대기시키거나 QuotaExceeded(429)로 거절합니다.
+
+    async with user_slot(user_id):
+        ...
+
+- 요청 속도: USER_RATE(초당 요청 수)로 채워지는 USER_BURST 크기의 token bucket
+  (token이 없으면 다음 token까지 기다리고, 그 시간이 USER_QUEUE_TIMEOUT / deadline보다 길면 거절)
+- 동시 실행: USER_CONCURRENCY, 넘으면 사용자별 대기열(USER_QUEUE_LIMIT)에서 대기
+- 사용자별 덮어쓰기: USER_QUOTAS (JSON, {"<user_id>": {"concurrency": 8, "rate": 5, "burst": 20, "weight": 2}})
+- weight는 lane 대기열의 weighted fair queuing 가중치로 사용됩니다 (utils/lanes.py).
+- user_id가 없는 요청은 제한하지 않습니다.
+
+멀티 워커(gunicorn) 모드:
+- token bucket은 USER_QUOTA_DB_PATH(SQLite)로 워커끼리 공유하므로 USER_RATE / USER_BURST는 서버 전체 한도입니다.
+- 동시 실행 slot과 대기열은 워커 프로세스마다 따로 세므로 USER_CONCURRENCY / USER_QUEUE_LIMIT을
+  워커 수로 나눠(올림, 최소 1) 워커별 한도로 사용합니다.
+
+서버 이벤트 루프(/invocations, job 워커)에서만 사용합니다.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from .deadline import DEADLINE_EXCEEDED, DeadlineExceeded, remaining
+from .metrics import Counter, Histogram, register_collector
+from .workers import get_worker_count
+
+logger = logging.getLogger(__name__)
+
+USER_CONCURRENCY = int(os.environ.get("USER_CONCURRENCY", "4"))
+USER_RATE = float(os.environ.get("USER_RATE", "2"))
+USER_BURST = float(os.environ.get("USER_BURST", "10"))
+USER_QUEUE_LIMIT = int(os.environ.get("USER_QUEUE_LIMIT", "20"))
+# token / 동시 실행 slot을 기다리는 최대 시간 (초, deadline이 더 짧으면 deadline까지)
+USER_QUEUE_TIMEOUT = float(os.environ.get("USER_QUEUE_TIMEOUT", "30"))
+# 이 수를 넘으면 유휴 사용자 상태를 정리
+USER_STATE_MAX = int(os.environ.get("USER_STATE_MAX", "10000"))
+WORKER_COUNT = get_worker_count()
+# 워커끼리 token bucket을 공유하는 SQLite 파일 (비어 있으면 워커 메모리, 멀티 워커 모드 기본값은 공유)
+USER_QUOTA_DB_PATH = os.environ.get("USER_QUOTA_DB_PATH", "/tmp/agent-user-quota.db" if WORKER_COUNT > 1 else "")
+
+# reason: rate / concurrency
+QUOTA_REJECTED = Counter("agent_user_quota_rejected_total", "Requests rejected by per-user quotas", ("reason",))
+QUOTA_WAIT = Histogram("agent_user_quota_wait_seconds", "Time spent waiting for per-user rate / concurrency quota")
+
+
+def _parse_user_quotas(raw: Optional[str]) -> Dict[str, Dict[str, float]]:
+    if not raw:
+        return {}
+    try:
+        quotas = json.loads(raw)
+        return {str(user): dict(quota) for user, quota in quotas.items()}
+    except (ValueError, TypeError, AttributeError) as e:
+        logger.warning("[Fairness] USER_QUOTAS 파싱 실패, 무시: %s", e)
+        return {}
+
+
+USER_QUOTAS = _parse_user_quotas(os.environ.get("USER_QUOTAS"))
+
+
+def _per_worker(limit: int) -> int:
+    # 동시 실행 slot / 대기열은 워커마다 따로 세므로 전체 한도를 워커 수로 나눔 (최소 1)
+    return max(1, math.ceil(limit / WORKER_COUNT))
+
+
+_QUEUE_LIMIT = _per_worker(USER_QUEUE_LIMIT)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_tokens (
+    user_id TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    full_at REAL NOT NULL
+);
+"""
+
+
+class QuotaExceeded(Exception):
+    """사용자 quota 초과로 요청을 거절함 (HTTP 429)"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"요청이 너무 많습니다. {retry_after:.0f}초 후 다시 시도해주세요 ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _UserState:
+    __slots__ = ("concurrency", "rate", "burst", "tokens", "updated", "active", "waiters")
+
+    def __init__(self, user_id: str):
+        quota = USER_QUOTAS.get(user_id, {})
+        self.concurrency = _per_worker(int(quota.get("concurrency", USER_CONCURRENCY)))
+        self.rate = float(quota.get("rate", USER_RATE))
+        self.burst = float(quota.get("burst", USER_BURST))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.active = 0
+        self.waiters: deque = deque()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def idle(self) -> bool:
+        return self.active == 0 and not self.waiters and self.tokens >= self.burst
+
+
+_users: Dict[str, _UserState] = {}
+_lock = threading.Lock()
+
+
+def _get_state(user_id: str) -> _UserState:
+    state = _users.get(user_id)
+    if state is None:
+        if len(_users) >= USER_STATE_MAX:
+            now = time.monotonic()
+            for key, other in list(_users.items()):
+                other.refill(now)
+                if other.idle():
+                    del _users[key]
+        state = _users[user_id] = _UserState(user_id)
+    return state
+
+
+def user_weight(user_id: Optional[str]) -> float:
+    """사용자의 fair queuing 가중치 (USER_QUOTAS의 weight, 기본 1)"""
+    if not user_id:
+        return 1.0
+    return float(USER_QUOTAS.get(user_id, {}).get("weight", 1.0))
+
+
+def _max_wait() -> float:
+    left = remaining()
+    return USER_QUEUE_TIMEOUT if left is None else min(USER_QUEUE_TIMEOUT, left)
+
+
+def _token_wait(tokens: float, rate: float) -> float:
+    if tokens >= 1:
+        return 0.0
+    return (1 - tokens) / rate if rate > 0 else USER_QUEUE_TIMEOUT
+
+
+# ----------------------------------------------------------------------
+# 워커 공유 token bucket (USER_QUOTA_DB_PATH)
+# ----------------------------------------------------------------------
+
+_db_executor: Optional[ThreadPoolExecutor] = None
+_db_local = threading.local()
+_db_last_cleanup = 0.0
+
+
+def _get_db_executor() -> ThreadPoolExecutor:
+    global _db_executor
+    if _db_executor is None:
+        with _lock:
+            if _db_executor is None:
+                _db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="user-quota-db")
+    return _db_executor
+
+
+def _db_conn() -> sqlite3.Connection:
+    conn = getattr(_db_local, "conn", None)
+    if conn is None:
+        directory = os.path.dirname(USER_QUOTA_DB_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(USER_QUOTA_DB_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _db_local.conn = conn
+    return conn
+
+
+def _reserve_token_db(user_id: str, rate: float, burst: float, max_wait: float) -> float:
+    """공유 bucket에서 token을 예약하고 기다릴 시간을 반환합니다 (max_wait보다 길면 예약하지 않음)."""
+    global _db_last_cleanup
+    # 워커 프로세스끼리 비교하므로 monotonic 대신 wall clock 사용
+    now = time.time()
+    conn = _db_conn()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute("SELECT tokens, updated FROM user_tokens WHERE user_id = ?", (user_id,)).fetchone()
+        tokens = burst if row is None else min(burst, row[0] + max(0.0, now - row[1]) * rate)
+        wait = _token_wait(tokens, rate)
+        if wait <= max_wait:
+            tokens -= 1
+            # 이 시각 이후에는 bucket이 가득 찬 상태와 같으므로 행을 지워도 됨
+            full_at = now + (burst - tokens) / rate if rate > 0 else float("inf")
+            conn.execute(
+                "INSERT INTO user_tokens (user_id, tokens, updated, full_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET "
+                "tokens = excluded.tokens, updated = excluded.updated, full_at = excluded.full_at",
+                (user_id, tokens, now, full_at),
+            )
+        if now - _db_last_cleanup > 60:
+            _db_last_cleanup = now
+            conn.execute("DELETE FROM user_tokens WHERE full_at < ?", (now,))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return wait
+
+
+def _reserve_token(state: _UserState, max_wait: float) -> float:
+    # _lock 안에서 호출: 워커 메모리 bucket
+    state.refill(time.monotonic())
+    wait = _token_wait(state.tokens, state.rate)
+    if wait <= max_wait:
+        state.tokens -= 1
+    return wait
+
+
+async def _take_token(user_id: str, state: _UserState) -> None:
+    # token을 먼저 예약하고(음수 허용) 부족한 만큼 기다림 → 동시에 온 요청도 순서대로 통과
+    max_wait = _max_wait()
+    wait = None
+    if USER_QUOTA_DB_PATH:
+        try:
+            wait = await asyncio.get_running_loop().run_in_executor(
+                _get_db_executor(), _reserve_token_db, user_id, state.rate, state.burst, max_wait
+            )
+        except sqlite3.Error as e:
+            logger.warning("[Fairness] quota DB 오류, 워커 메모리 bucket 사용: %s", e)
+    if wait is None:
+        with _lock:
+            wait = _reserve_token(state, max_wait)
+    if wait > max_wait:
+        QUOTA_REJECTED.inc(reason="rate")
+        raise QuotaExceeded("rate", wait)
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+
+async def _acquire_slot(state: _UserState) -> None:
+    with _lock:
+        if state.active < state.concurrency and not state.waiters:
+            state.active += 1
+            return
+        if len(state.waiters) >= _QUEUE_LIMIT:
+            QUOTA_REJECTED.inc(reason="concurrency")
+            raise QuotaExceeded("concurrency", 1.0)
+        future = asyncio.get_running_loop().create_future()
+        state.waiters.append(future)
+    try:
+        await asyncio.wait_for(asyncio.shield(future), _max_wait())
+    except BaseException as e:
+        with _lock:
+            if future.done() and not future.cancelled():
+                # slot이 이미 넘어옴 → 다음 대기자에게 넘김
+                _release_slot(state)
+            else:
+                future.cancel()
+                state.waiters.remove(future)
+        if isinstance(e, asyncio.TimeoutError):
+            left = remaining()
+            if left is not None and left <= 0:
+                DEADLINE_EXCEEDED.inc(stage="user_quota")
+                raise DeadlineExceeded("user_quota")
+            QUOTA_REJECTED.inc(reason="concurrency")
+            raise QuotaExceeded("concurrency", 1.0)
+        raise
+
+
+def _release_slot(state: _UserState) -> None:
+    # _lock 안에서 호출: 대기자가 있으면 slot을 그대로 넘김
+    while state.waiters:
+        future = state.waiters.popleft()
+        if not future.done():
+            future.set_result(None)
+            return
+    state.active -= 1
+
+
+@asynccontextmanager
+async def user_slot(user_id: Optional[str]):
+    """
+    user_id의 요청 속도 / 동시 실행 quota 안에서 with 블록을 실행합니다.
+
+    Raises:
+        QuotaExceeded: 기다려도 quota 안에 들어오지 못함 (HTTP 429)
+        DeadlineExceeded: 요청 deadline 안에 동시 실행 slot을 얻지 못함
+    """
+    if not user_id:
+        yield
+        return
+
+    with _lock:
+        state = _get_state(user_id)
+    start = time.perf_counter()
+    await _take_token(user_id, state)
+    await _acquire_slot(state)
+    QUOTA_WAIT.observe(time.perf_counter() - start)
+    try:
+        yield
+    finally:
+        with _lock:
+            _release_slot(state)
+
+
+def get_user_stats() -> Dict[str, Dict[str, Any]]:
+    """이 워커에서 실행 중이거나 대기 중인 사용자별 quota 상태"""
+    now = time.monotonic()
+    with _lock:
+        result = {}
+        for user_id, state in _users.items():
+            state.refill(now)
+            if state.active or state.waiters:
+                result[user_id] = {
+                    "active": state.active,
+                    "queued": len(state.waiters),
+                    "concurrency": state.concurrency,
+                }
+                # 공유 bucket 모드에서는 워커 메모리의 token이 의미 없으므로 생략
+                if not USER_QUOTA_DB_PATH:
+                    result[user_id]["tokens"] = round(state.tokens, 2)
+        return result
+
+
+def _fairness_collector():
+    stats = get_user_stats()
+    yield ("agent_user_quota_active_users", "gauge", "Users with running or queued requests", {}, len(stats))
+    yield (
+        "agent_user_quota_queued", "gauge", "Requests waiting for per-user concurrency quota", {},
+        sum(s["queued"] for s in stats.values()),
+    )
+
+
+register_collector(_fairness_collector)
@@ -0,0 +1,232 @@
+"""
+Hedged request (tail latency 완화)
+멱등한 호출이 최근 지연시간 백분위(HEDGE_PERCENTILE)보다 오래 걸리면 같은 호출을 한 번 더 보내고
+먼저 끝난 결과를 사용합니다.
+
+    result = hedged_call("prompt_builder", invoke_model_json, model_id, body)
+    result = await hedged_call_async("diary", summarize_async, content)
+
+- 대상: HEDGE_CALLS (쉼표 구분 호출 이름, "all" = 전체). 목록에 없으면 그대로 한 번만 호출합니다.
+- 예산: 일반 호출 1건마다 HEDGE_BUDGET개의 hedge 토큰이 쌓이고(최대 HEDGE_BUDGET_BURST) hedge 1건이 1개를 씁니다.
+  장애로 모든 호출이 느려져도 추가 부하는 호출량의 HEDGE_BUDGET 비율을 넘지 않습니다.
+- 기준 지연시간은 호출 이름별 최근 성공 샘플로 계산하고, 샘플이 HEDGE_MIN_SAMPLES보다 적으면 hedge하지 않습니다.
+- 첫 호출이 기준 시간 전에 실패하면 hedge 없이 그대로 오류를 던집니다 (지연이 아닌 오류는 hedge 대상 아님).
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import Counter, register_collector
+
+logger = logging.getLogger(__name__)
+
+HEDGE_CALLS = {
+    name.strip() for name in os.environ.get("HEDGE_CALLS", "").split(",") if name.strip()
+}
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", "95"))
+# 기준 지연시간 하한 (초) - 빠른 호출을 불필요하게 hedge하지 않도록
+HEDGE_MIN_DELAY = float(os.environ.get("HEDGE_MIN_DELAY", "0.5"))
+HEDGE_MIN_SAMPLES = int(os.environ.get("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_SAMPLE_SIZE = int(os.environ.get("HEDGE_SAMPLE_SIZE", "200"))
+HEDGE_BUDGET = float(os.environ.get("HEDGE_BUDGET", "0.05"))
+HEDGE_BUDGET_BURST = float(os.environ.get("HEDGE_BUDGET_BURST", "5"))
+# sync 호출(hedged_call)을 실행하는 스레드 수 (첫 호출 + hedge)
+HEDGE_THREADS = int(os.environ.get("HEDGE_THREADS", "32"))
+
+# outcome: primary(hedge 없음) / primary_won / hedge_won / no_budget(예산 부족) / failed(둘 다 실패)
+HEDGES = Counter("agent_hedge_calls_total", "Hedge-eligible calls by outcome", ("call", "outcome"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_lock = threading.Lock()
+_samples: Dict[str, deque] = {}
+_tokens: Dict[str, float] = {}
+
+
+def hedging_enabled(name: str) -> bool:
+    return "all" in HEDGE_CALLS or name in HEDGE_CALLS
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=HEDGE_THREADS, thread_name_prefix="hedge")
+    return _executor
+
+
+def hedge_delay(name: str) -> Optional[float]:
+    """hedge를 보낼 기준 시간 (초). 샘플이 부족하면 None"""
+    with _lock:
+        samples = sorted(_samples.get(name, ()))
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return None
+    index = min(len(samples) - 1, int(round(HEDGE_PERCENTILE / 100 * (len(samples) - 1))))
+    return max(HEDGE_MIN_DELAY, samples[index])
+
+
+def _record(name: str, elapsed: float) -> None:
+    with _lock:
+        samples = _samples.get(name)
+        if samples is None:
+            samples = _samples[name] = deque(maxlen=HEDGE_SAMPLE_SIZE)
+        samples.append(elapsed)
+
+
+def _earn(name: str) -> None:
+    with _lock:
+        _tokens[name] = min(HEDGE_BUDGET_BURST, _tokens.get(name, 0.0) + HEDGE_BUDGET)
+
+
+def _spend(name: str) -> bool:
+    with _lock:
+        if _tokens.get(name, 0.0) < 1.0:
+            return False
+        _tokens[name] -= 1.0
+        return True
+
+
+def _timed(name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    _record(name, time.perf_counter() - start)
+    return result
+
+
+def hedged_call(name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    func(*args, **kwargs)를 실행하고, 기준 시간 안에 끝나지 않으면 같은 호출을 한 번 더 보냅니다.
+    먼저 성공한 결과를 반환합니다 (늦게 끝난 쪽 결과는 버림, 실행 중인 스레드는 중단할 수 없음).
+
+    Args:
+        name: 호출 이름 (HEDGE_CALLS, 지연시간 샘플, 메트릭 label)
+        func: 멱등한 sync 함수
+
+    Raises:
+        두 호출이 모두 실패하면 첫 호출의 오류
+    """
+    if not hedging_enabled(name):
+        return func(*args, **kwargs)
+
+    _earn(name)
+    delay = hedge_delay(name)
+    if delay is None:
+        HEDGES.inc(call=name, outcome="primary")
+        return _timed(name, func, *args, **kwargs)
+
+    # worker 스레드에서도 trace / 로그 컨텍스트 / deadline / 사용량 집계가 이어지도록 contextvars 복사
+    executor = _get_executor()
+    primary = executor.submit(contextvars.copy_context().run, _timed, name, func, *args, **kwargs)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        HEDGES.inc(call=name, outcome="primary")
+        return primary.result()
+    if not _spend(name):
+        HEDGES.inc(call=name, outcome="no_budget")
+        return primary.result()
+
+    logger.debug("[Hedge] %s %.2fs 초과, hedge 호출", name, delay)
+    hedge = executor.submit(contextvars.copy_context().run, _timed, name, func, *args, **kwargs)
+    pending = {primary, hedge}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                HEDGES.inc(call=name, outcome="hedge_won" if future is hedge else "primary_won")
+                return future.result()
+    HEDGES.inc(call=name, outcome="failed")
+    return primary.result()
+
+
+async def hedged_call_async(name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    hedged_call의 async 버전. func는 coroutine 함수이며, 진 쪽 task는 취소합니다.
+
+    Args:
+        name: 호출 이름
+        func: 멱등한 coroutine 함수
+    """
+    if not hedging_enabled(name):
+        return await func(*args, **kwargs)
+
+    async def timed():
+        start = time.perf_counter()
+        result = await func(*args, **kwargs)
+        _record(name, time.perf_counter() - start)
+        return result
+
+    _earn(name)
+    delay = hedge_delay(name)
+    if delay is None:
+        HEDGES.inc(call=name, outcome="primary")
+        return await timed()
+
+    primary = asyncio.ensure_future(timed())
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            HEDGES.inc(call=name, outcome="primary")
+            return primary.result()
+        if not _spend(name):
+            HEDGES.inc(call=name, outcome="no_budget")
+            return await primary
+
+        logger.debug("[Hedge] %s %.2fs 초과, hedge 호출", name, delay)
+        hedge = asyncio.ensure_future(timed())
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        HEDGES.inc(call=name, outcome="hedge_won" if task is hedge else "primary_won")
+                        return task.result()
+        finally:
+            hedge.cancel()
+        HEDGES.inc(call=name, outcome="failed")
+        return primary.result()
+    finally:
+        primary.cancel()
+
+
+def get_hedge_stats() -> Dict[str, Dict[str, Any]]:
+    """호출 이름별 hedge 기준 시간 / 남은 예산 / 샘플 수"""
+    with _lock:
+        names = set(_samples) | set(_tokens)
+        counts = {name: len(_samples.get(name, ())) for name in names}
+        tokens = {name: _tokens.get(name, 0.0) for name in names}
+    result = {}
+    for name in names:
+        delay = hedge_delay(name)
+        result[name] = {
+            "delay_ms": round(delay * 1000, 1) if delay is not None else None,
+            "budget": round(tokens[name], 2),
+            "samples": counts[name],
+        }
+    return result
+
+
+def _hedge_collector():
+    for name, stats in get_hedge_stats().items():
+        if stats["delay_ms"] is not None:
+            yield (
+                "agent_hedge_delay_seconds", "gauge", "Latency after which a hedge call is sent",
+                {"call": name}, stats["delay_ms"] / 1000,
+            )
+        yield (
+            "agent_hedge_budget_tokens", "gauge", "Remaining hedge budget tokens",
+            {"call": name}, stats["budget"],
+        )
+
+
+# delay는 워커 평균, budget은 가장 적게 남은 워커 기준
+register_collector(
+    _hedge_collector, merge={"agent_hedge_delay_seconds": "avg", "agent_hedge_budget_tokens": "min"}
+)
@@ -0,0 +1,385 @@
+"""
+멱등 키(Idempotency-Key) 기반 결과 재사용
+Agent Core / 백엔드가 timeout 후 같은 요청을 재시도해도 이미지 생성, 리포트 생성이 다시 실행되지 않도록
+멱등 키별로 응답을 저장해 두고 반복 요청에는 저장된 응답을 돌려줍니다.
+같은 키의 요청이 아직 실행 중이면 새로 실행하지 않고 그 실행 결과를 함께 기다립니다.
+
+    status_code, content, replayed = await get_idempotency_store().run(key, fingerprint, execute, should_store)
+
+- 키: Idempotency-Key 헤더 또는 본문 idempotency_key, user_id별로 구분 (scoped_key)
+- 같은 키에 다른 요청 본문이 오면 IdempotencyConflict(422)
+- 저장소: 메모리 LRU(IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_TTL) + 선택적으로 SQLite 디스크 계층(IDEMPOTENCY_DB_PATH)
+  디스크 계층은 같은 파일을 쓰는 워커 프로세스끼리 공유되고 재시작 후에도 유지됩니다.
+  멀티 워커(gunicorn) 모드에서는 기본으로 공유 파일을 사용해 다른 워커로 간 재시도도 합류 / 재사용됩니다.
+  다른 워커에서 실행 중인 키는 실행 중 표시(lease)를 보고 결과가 저장될 때까지 polling합니다.
+- 2xx 응답 중 should_store가 허용한 것만 저장합니다. 오류 / timeout / 거절 응답과
+  HTTP 200으로 돌아온 하위 agent 실패(server.py는 is_failed_result로 제외)는 저장하지 않으므로 재시도하면 다시 실행됩니다.
+- IDEMPOTENCY_MAX_ENTRY_BYTES보다 큰 응답은 저장하지 않습니다 (실행 중 합류만 적용).
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .deadline import DEADLINE_EXCEEDED, DeadlineExceeded, remaining
+from .metrics import Counter, register_collector
+from .workers import get_worker_count
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_REPLAYED_HEADER = "Idempotent-Replayed"
+IDEMPOTENCY_MAX_ENTRIES = int(os.environ.get("IDEMPOTENCY_MAX_ENTRIES", "1000"))
+# 저장된 응답 보관 시간 (초)
+IDEMPOTENCY_TTL = float(os.environ.get("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_MAX_ENTRY_BYTES = int(os.environ.get("IDEMPOTENCY_MAX_ENTRY_BYTES", str(1024 * 1024)))
+IDEMPOTENCY_KEY_MAX_LENGTH = int(os.environ.get("IDEMPOTENCY_KEY_MAX_LENGTH", "255"))
+# 디스크 계층 SQLite 파일 (비어 있으면 메모리만 사용, 멀티 워커 모드 기본값은 워커끼리 공유)
+IDEMPOTENCY_DB_PATH = os.environ.get(
+    "IDEMPOTENCY_DB_PATH", "/tmp/agent-idempotency.db" if get_worker_count() > 1 else ""
+)
+# 실행 중 표시의 유효 시간 (초, deadline이 없을 때). 실행한 프로세스가 죽으면 이 시간 뒤 다른 요청이 다시 실행
+IDEMPOTENCY_LEASE = float(os.environ.get("IDEMPOTENCY_LEASE", "900"))
+# 다른 워커에서 실행 중인 키의 결과 확인 주기 (초)
+IDEMPOTENCY_POLL_INTERVAL = float(os.environ.get("IDEMPOTENCY_POLL_INTERVAL", "0.5"))
+
+# outcome: executed(새로 실행) / replayed(저장된 응답) / attached(실행 중인 요청에 합류) / conflict(본문 불일치)
+IDEMPOTENCY = Counter("agent_idempotency_requests_total", "Requests with an idempotency key by outcome", ("outcome",))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS idempotency (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    status INTEGER,
+    response TEXT,
+    expires_at REAL NOT NULL
+);
+"""
+
+# 디스크 계층 만료 행 정리 주기 (초)
+_CLEANUP_INTERVAL = 60.0
+
+
+class IdempotencyConflict(Exception):
+    """같은 멱등 키로 다른 요청 본문이 들어옴 (HTTP 422)"""
+
+    def __init__(self):
+        super().__init__("같은 Idempotency-Key로 다른 요청이 이미 처리되었습니다.")
+
+
+class IdempotencyInterrupted(Exception):
+    """합류한 원래 실행이 결과 없이 중단됨 (취소 등)"""
+
+    def __init__(self):
+        super().__init__("같은 Idempotency-Key의 원래 요청이 중단되었습니다. 다시 시도해주세요.")
+
+
+def scoped_key(user_id: Optional[str], key: str) -> str:
+    """사용자별 멱등 키 (다른 사용자가 같은 키를 써도 응답이 섞이지 않도록 user_id와 함께 hash)"""
+    return hashlib.sha256(f"{user_id or ''}\0{key}".encode("utf-8")).hexdigest()
+
+
+def request_fingerprint(payload: Dict[str, Any]) -> str:
+    """요청 본문 지문 (같은 키의 반복 요청이 같은 내용인지 확인)"""
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+async def _wait(awaitable):
+    left = remaining()
+    if left is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout=left)
+    except asyncio.TimeoutError:
+        DEADLINE_EXCEEDED.inc(stage="idempotency")
+        raise DeadlineExceeded("idempotency")
+
+
+class IdempotencyStore:
+    """
+    멱등 키별 응답 저장소 + 실행 중 요청 합류
+
+    Args:
+        max_entries: 메모리에 보관할 응답 수 (넘으면 오래 안 쓴 것부터 제거)
+        ttl: 응답 보관 시간 (초)
+        db_path: 디스크 계층 SQLite 파일 (None이면 메모리만)
+        max_entry_bytes: 저장할 응답의 최대 크기 (JSON 직렬화 기준)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = IDEMPOTENCY_MAX_ENTRIES,
+        ttl: float = IDEMPOTENCY_TTL,
+        db_path: Optional[str] = None,
+        max_entry_bytes: int = IDEMPOTENCY_MAX_ENTRY_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.max_entry_bytes = max_entry_bytes
+        self._lock = threading.Lock()
+        # key → (만료 시각, fingerprint, status code, 응답)
+        self._entries: "OrderedDict[str, Tuple[float, str, int, Dict[str, Any]]]" = OrderedDict()
+        # key → (fingerprint, 결과 future) - 이 프로세스에서 실행 중인 요청
+        self._inflight: Dict[str, Tuple[str, asyncio.Future]] = {}
+        self._local = threading.local()
+        self._db_executor: Optional[ThreadPoolExecutor] = None
+        self._last_cleanup = 0.0
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+            try:
+                conn.executescript(_SCHEMA)
+            finally:
+                conn.close()
+            self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="idempotency-db")
+
+    # ------------------------------------------------------------------
+    # 공개 API
+    # ------------------------------------------------------------------
+
+    async def run(
+        self,
+        key: str,
+        fingerprint: str,
+        execute: Callable[[], Awaitable[Tuple[int, Dict[str, Any]]]],
+        should_store: Optional[Callable[[int, Dict[str, Any]], bool]] = None,
+    ) -> Tuple[int, Dict[str, Any], bool]:
+        """
+        key의 저장된 응답이 있으면 그대로, 실행 중이면 그 결과를, 없으면 execute()를 실행해 반환합니다.
+
+        Args:
+            key: scoped_key로 만든 멱등 키
+            fingerprint: request_fingerprint로 만든 요청 지문
+            execute: 실제 처리 함수 async execute() -> (status code, 응답 본문)
+            should_store: 2xx 응답을 저장할지 판단 should_store(status code, 응답 본문) (None이면 2xx 모두 저장).
+                False면 실행 중 표시만 지우고, 같은 키의 다음 요청은 다시 실행합니다.
+
+        Returns:
+            (status code, 응답 본문, 저장된 / 합류한 결과이면 True)
+
+        Raises:
+            IdempotencyConflict: 같은 키에 다른 요청 본문
+            DeadlineExceeded: 실행 중인 요청의 결과를 deadline 안에 받지 못함
+            execute()가 던진 예외 (합류한 요청에도 같은 예외)
+        """
+        record = self._memory_get(key)
+        if record is not None:
+            return self._replay(fingerprint, *record)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._check(fingerprint, inflight[0])
+            IDEMPOTENCY.inc(outcome="attached")
+            logger.info("[Idempotency] 실행 중인 요청에 합류: %s", key[:12])
+            status_code, content = await _wait(asyncio.shield(inflight[1]))
+            return status_code, content, True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (fingerprint, future)
+        record = None
+        try:
+            if self._db_executor is not None:
+                try:
+                    record = await self._claim_disk(key, fingerprint)
+                except sqlite3.Error as e:
+                    logger.warning("[Idempotency] 디스크 계층 조회 실패, 그대로 실행: %s", e)
+                if record is not None:
+                    future.set_result(record)
+                    self._memory_put(key, fingerprint, *record)
+                    return self._replay(fingerprint, fingerprint, *record)
+
+            IDEMPOTENCY.inc(outcome="executed")
+            try:
+                status_code, content = await execute()
+            except BaseException:
+                if self._db_executor is not None:
+                    await asyncio.shield(self._db(self._delete, key))
+                raise
+
+            await self._save(key, fingerprint, status_code, content, should_store)
+            future.set_result((status_code, content))
+            return status_code, content, False
+        except BaseException as e:
+            if not future.done():
+                # 취소 등으로 끝나면 합류한 요청에는 IdempotencyInterrupted
+                future.set_exception(e if isinstance(e, Exception) else IdempotencyInterrupted())
+                # 합류한 요청이 없어도 "exception was never retrieved" 경고가 나지 않도록
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._entries)
+        return {"entries": entries, "inflight": len(self._inflight), "disk": bool(self._db_executor)}
+
+    # ------------------------------------------------------------------
+    # 메모리 계층
+    # ------------------------------------------------------------------
+
+    def _check(self, fingerprint: str, stored: str) -> None:
+        if fingerprint != stored:
+            IDEMPOTENCY.inc(outcome="conflict")
+            raise IdempotencyConflict()
+
+    def _replay(self, fingerprint: str, stored: str, status_code: int, content: Dict[str, Any]):
+        self._check(fingerprint, stored)
+        IDEMPOTENCY.inc(outcome="replayed")
+        return status_code, content, True
+
+    def _memory_get(self, key: str) -> Optional[Tuple[str, int, Dict[str, Any]]]:
+        with self._lock:
+            record = self._entries.get(key)
+            if record is None:
+                return None
+            if record[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return record[1:]
+
+    def _memory_put(self, key: str, fingerprint: str, status_code: int, content: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, fingerprint, status_code, content)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def _save(self, key: str, fingerprint: str, status_code: int, content: Dict[str, Any],
+                    should_store: Optional[Callable[[int, Dict[str, Any]], bool]] = None) -> None:
+        response = None
+        if 200 <= status_code < 300 and (should_store is None or should_store(status_code, content)):
+            response = json.dumps(content, ensure_ascii=False, default=str)
+            if len(response.encode("utf-8")) > self.max_entry_bytes:
+                logger.info("[Idempotency] 응답이 커서 저장하지 않음: %s (%d bytes)", key[:12], len(response))
+                response = None
+        if response is not None:
+            self._memory_put(key, fingerprint, status_code, content)
+        if self._db_executor is None:
+            return
+        try:
+            if response is None:
+                await self._db(self._delete, key)
+            else:
+                await self._db(self._complete, key, fingerprint, status_code, response)
+        except sqlite3.Error as e:
+            # 응답은 이미 만들어졌으므로 디스크 저장 실패로 요청을 실패시키지 않음 (메모리 계층만 적용)
+            logger.warning("[Idempotency] 디스크 계층 저장 실패: %s", e)
+
+    # ------------------------------------------------------------------
+    # 디스크 계층 (SQLite)
+    # ------------------------------------------------------------------
+
+    async def _db(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._db_executor, func, *args)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    async def _claim_disk(self, key: str, fingerprint: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """
+        디스크 계층에서 key를 확인합니다. 저장된 응답이 있으면 반환하고,
+        다른 워커가 실행 중이면 끝날 때까지 기다리며, 없으면 실행 중 표시를 남기고 None(직접 실행)을 반환합니다.
+        """
+        waited = False
+        while True:
+            left = remaining()
+            lease = IDEMPOTENCY_LEASE if left is None else left + 5.0
+            state, stored, status_code, content = await self._db(self._claim, key, fingerprint, lease)
+            if state == "owner":
+                return None
+            self._check(fingerprint, stored)
+            if state == "done":
+                return status_code, content
+            if not waited:
+                waited = True
+                IDEMPOTENCY.inc(outcome="attached")
+                logger.info("[Idempotency] 다른 워커에서 실행 중인 요청을 기다림: %s", key[:12])
+            await _wait(asyncio.sleep(IDEMPOTENCY_POLL_INTERVAL))
+
+    def _claim(self, key: str, fingerprint: str, lease: float):
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT fingerprint, status, response, expires_at FROM idempotency WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[3] <= now:
+                # 없음 / 만료 / 실행하던 프로세스의 lease 만료 → 이 요청이 실행
+                conn.execute(
+                    "INSERT OR REPLACE INTO idempotency (key, fingerprint, status, response, expires_at) "
+                    "VALUES (?, ?, NULL, NULL, ?)",
+                    (key, fingerprint, now + lease),
+                )
+                conn.execute("COMMIT")
+                return "owner", fingerprint, None, None
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        stored, status_code, response, _ = row
+        if status_code is None:
+            return "pending", stored, None, None
+        return "done", stored, status_code, json.loads(response)
+
+    def _complete(self, key: str, fingerprint: str, status_code: int, response: str) -> None:
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO idempotency (key, fingerprint, status, response, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (key, fingerprint, status_code, response, now + self.ttl),
+        )
+        if now - self._last_cleanup >= _CLEANUP_INTERVAL:
+            self._last_cleanup = now
+            conn.execute("DELETE FROM idempotency WHERE expires_at <= ?", (now,))
+
+    def _delete(self, key: str) -> None:
+        # 저장하지 않는 결과 / 실패: 실행 중 표시를 지워 다음 재시도가 바로 실행하도록
+        try:
+            self._conn().execute("DELETE FROM idempotency WHERE key = ? AND status IS NULL", (key,))
+        except sqlite3.Error as e:
+            logger.warning("[Idempotency] 실행 중 표시 삭제 실패 (lease 만료 후 정리됨): %s", e)
+
+
+_store: Optional[IdempotencyStore] = None
+_store_lock = threading.Lock()
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """프로세스당 하나의 IdempotencyStore (IDEMPOTENCY_DB_PATH가 있으면 디스크 계층 사용)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = IdempotencyStore(db_path=IDEMPOTENCY_DB_PATH or None)
+    return _store
+
+
+def _idempotency_collector():
+    if _store is None:
+        return
+    stats = _store.stats()
+    yield ("agent_idempotency_entries", "gauge", "Stored idempotent responses in memory", {}, stats["entries"])
+    yield ("agent_idempotency_inflight", "gauge", "Idempotent requests currently executing", {}, stats["inflight"])
+
+
+register_collector(_idempotency_collector)
@@ -0,0 +1,414 @@
+"""
+SQLite 기반 로컬 작업 큐
+이미지 생성 / 리포트처럼 수십 초 걸리는 요청을 HTTP 요청 밖에서 처리합니다.
+요청은 job을 SQLite에 기록하고 job id를 바로 돌려주며, 이벤트 루프의 워커 task가 job을 꺼내 실행합니다.
+
+- 같은 DB 파일을 쓰는 여러 프로세스(gunicorn 워커)가 함께 처리합니다 (BEGIN IMMEDIATE로 claim).
+- 실행 중인 job은 lease를 주기적으로 연장하고, 프로세스가 죽어 lease가 만료되면 다른 워커가 다시 가져갑니다.
+- 실패하면 backoff 후 재시도하고 max_attempts를 넘으면 failed로 남깁니다.
+- progress(job_id, stage)로 기록한 진행 단계는 lease 연장 시 함께 저장되어 상태 조회에 포함됩니다.
+
+status: queued → running → succeeded | failed (재시도 시 running → queued)
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+TERMINAL_STATUSES = (STATUS_SUCCEEDED, STATUS_FAILED)
+
+# status: enqueued / succeeded / retry / failed / recovered
+JOBS = Counter("agent_jobs_total", "Job queue events by status", ("status",))
+JOB_QUEUE_WAIT = Histogram("agent_job_queue_wait_seconds", "Time from enqueue to first run by job kind", ("kind",))
+JOB_DURATION = Histogram("agent_job_duration_seconds", "Job attempt duration by job kind and outcome", ("kind", "status"))
+
+# job당 보관하는 진행 단계 수
+MAX_PROGRESS_EVENTS = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    result TEXT,
+    error TEXT,
+    progress TEXT NOT NULL DEFAULT '[]',
+    worker TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    started_at REAL,
+    run_after REAL NOT NULL,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_run_after ON jobs (status, run_after);
+"""
+
+# 조회 응답에 포함하는 컬럼 (payload는 image_base64 등이 들어 있어 제외)
+_PUBLIC_COLUMNS = (
+    "id", "kind", "status", "attempts", "max_attempts", "result", "error", "progress",
+    "created_at", "updated_at", "started_at",
+)
+
+
+class JobQueue:
+    """
+    SQLite 작업 큐 + asyncio 워커
+
+    Args:
+        handler: job 실행 함수 async handler(job) -> result dict. 예외를 던지면 재시도
+        db_path: SQLite 파일 경로
+        workers: 프로세스당 워커 task 수
+        max_attempts: job당 기본 최대 시도 횟수
+        backoff: 재시도 대기 기본값 (초, 시도마다 2배)
+        lease: 실행 중 job의 lease 길이 (초, 만료되면 다른 워커가 다시 실행)
+        heartbeat: lease 연장 / progress 저장 주기 (초)
+        poll_interval: 큐가 비었을 때 DB 확인 주기 (초, 다른 프로세스가 넣은 job과 재시도 대기 job용)
+        result_ttl: 끝난 job 보관 시간 (초)
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        db_path: str,
+        workers: int = 4,
+        max_attempts: int = 3,
+        backoff: float = 2.0,
+        lease: float = 300.0,
+        heartbeat: float = 1.0,
+        poll_interval: float = 1.0,
+        result_ttl: float = 86400.0,
+    ):
+        self._handler = handler
+        self.db_path = db_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.lease = lease
+        self.heartbeat = heartbeat
+        self.poll_interval = poll_interval
+        self.result_ttl = result_ttl
+        self._local = threading.local()
+        # DB 작업 전용 스레드 (기본 executor를 쓰면 스레드마다 커넥션이 생김)
+        self._db_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="job-db")
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._progress: Dict[str, List[Dict[str, Any]]] = {}
+        self._progress_lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._running = 0
+        self._last_cleanup = 0.0
+        self._worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    # ------------------------------------------------------------------
+    # 공개 API
+    # ------------------------------------------------------------------
+
+    async def submit(self, kind: str, payload: Dict[str, Any], max_attempts: Optional[int] = None) -> str:
+        """job을 기록하고 job id를 반환합니다 (실행을 기다리지 않음)."""
+        job_id = uuid.uuid4().hex
+        await self._db(self._insert, job_id, kind, payload, max_attempts or self.max_attempts)
+        JOBS.inc(status="enqueued")
+        logger.info("[JobQueue] Enqueued: %s (kind=%s)", job_id, kind)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """job 상태 조회 (없으면 None). 실행 중인 job의 최근 progress는 heartbeat 주기만큼 늦을 수 있습니다."""
+        row = self._conn().execute(
+            f"SELECT {', '.join(_PUBLIC_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(_PUBLIC_COLUMNS, row))
+        job["job_id"] = job.pop("id")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["progress"] = json.loads(job["progress"])
+        return job
+
+    async def get_async(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self._db(self.get, job_id)
+
+    def counts(self) -> Dict[str, int]:
+        """status별 job 수 (전체 프로세스 공통)"""
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    async def counts_async(self) -> Dict[str, int]:
+        return await self._db(self.counts)
+
+    def progress(self, job_id: str, stage: str, **detail) -> None:
+        """
+        실행 중인 job의 진행 단계를 기록합니다 (스레드 안전, DB에는 다음 heartbeat에 저장).
+        실행 중이 아닌 job id는 무시합니다.
+        """
+        with self._progress_lock:
+            events = self._progress.get(job_id)
+            if events is not None:
+                events.append({"stage": stage, "at": round(time.time(), 3), **detail})
+
+    def start(self) -> None:
+        """현재 이벤트 루프에 워커 task를 시작합니다 (서버 lifespan에서 호출)."""
+        if self._tasks:
+            return
+        self._ensure_schema()
+        self._wakeup = asyncio.Event()
+        for i in range(self.workers):
+            self._tasks.append(asyncio.get_running_loop().create_task(self._run(i), name=f"job-worker-{i}"))
+        logger.info("[JobQueue] Started %d workers (db=%s)", self.workers, self.db_path)
+
+    async def stop(self) -> None:
+        """워커 task 종료 (실행 중이던 job은 lease 만료 후 다른 워커가 다시 실행)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def running(self) -> int:
+        return self._running
+
+    # ------------------------------------------------------------------
+    # SQLite
+    # ------------------------------------------------------------------
+
+    async def _db(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._db_executor, func, *args)
+
+    def _conn(self) -> sqlite3.Connection:
+        """스레드별 커넥션 (WAL 모드, 다른 프로세스의 쓰기와 경합 시 busy_timeout만큼 대기)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self._ensure_schema()
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _ensure_schema(self) -> None:
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            try:
+                conn.executescript(_SCHEMA)
+            finally:
+                conn.close()
+            self._schema_ready = True
+
+    def _insert(self, job_id: str, kind: str, payload: Dict[str, Any], max_attempts: int) -> None:
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO jobs (id, kind, payload, status, max_attempts, created_at, updated_at, run_after) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, json.dumps(payload, ensure_ascii=False), STATUS_QUEUED, max_attempts, now, now, now),
+        )
+
+    def _claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """
+        실행할 job 하나를 가져와 running으로 바꿉니다.
+        대기 중인 job과 lease가 만료된 running job(프로세스 종료 등)이 대상입니다.
+        """
+        conn = self._conn()
+        while True:
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id, kind, payload, status, attempts, max_attempts, created_at, error FROM jobs "
+                    "WHERE (status = ? AND run_after <= ?) OR (status = ? AND lease_until < ?) "
+                    "ORDER BY run_after LIMIT 1",
+                    (STATUS_QUEUED, now, STATUS_RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                job_id, kind, payload, status, attempts, max_attempts, created_at, error = row
+                if status == STATUS_RUNNING:
+                    JOBS.inc(status="recovered")
+                    logger.warning("[JobQueue] Lease expired, recovering: %s (attempt %d)", job_id, attempts)
+                    if attempts >= max_attempts:
+                        conn.execute(
+                            "UPDATE jobs SET status = ?, error = ?, lease_until = NULL, updated_at = ? WHERE id = ?",
+                            (STATUS_FAILED, error or "worker lease expired", now, job_id),
+                        )
+                        conn.execute("COMMIT")
+                        JOBS.inc(status="failed")
+                        continue
+                conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, worker = ?, lease_until = ?, "
+                    "started_at = COALESCE(started_at, ?), updated_at = ? WHERE id = ?",
+                    (STATUS_RUNNING, worker, now + self.lease, now, now, job_id),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            if attempts == 0:
+                JOB_QUEUE_WAIT.observe(now - created_at, kind=kind)
+            return {
+                "id": job_id,
+                "kind": kind,
+                "payload": json.loads(payload),
+                "attempts": attempts + 1,
+                "max_attempts": max_attempts,
+            }
+
+    def _heartbeat(self, job_id: str, worker: str) -> None:
+        """lease 연장 + 쌓인 progress 저장"""
+        with self._progress_lock:
+            events = list(self._progress.get(job_id, ()))
+        self._conn().execute(
+            "UPDATE jobs SET lease_until = ?, progress = ?, updated_at = ? WHERE id = ? AND worker = ?",
+            (time.time() + self.lease, json.dumps(events[-MAX_PROGRESS_EVENTS:], ensure_ascii=False),
+             time.time(), job_id, worker),
+        )
+
+    def _finish(
+        self,
+        job: Dict[str, Any],
+        worker: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> str:
+        """시도 결과 기록. 반환값: succeeded / queued(재시도) / failed"""
+        job_id = job["id"]
+        with self._progress_lock:
+            events = self._progress.get(job_id, [])
+            if error is not None and job["attempts"] < job["max_attempts"]:
+                status = STATUS_QUEUED
+                events.append({"stage": "retry", "at": round(time.time(), 3), "error": error})
+            else:
+                status = STATUS_FAILED if error is not None else STATUS_SUCCEEDED
+                events.append({"stage": status, "at": round(time.time(), 3)})
+            progress = json.dumps(events[-MAX_PROGRESS_EVENTS:], ensure_ascii=False)
+
+        now = time.time()
+        run_after = now + self.backoff * (2 ** (job["attempts"] - 1)) if status == STATUS_QUEUED else now
+        # lease가 만료되어 다른 워커가 가져간 job이면 결과를 덮어쓰지 않음
+        self._conn().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, progress = ?, run_after = ?, "
+            "lease_until = NULL, updated_at = ? WHERE id = ? AND worker = ?",
+            (status, json.dumps(result, ensure_ascii=False) if result is not None else None, error,
+             progress, run_after, now, job_id, worker),
+        )
+        return status
+
+    def _cleanup(self) -> None:
+        """result_ttl이 지난 끝난 job 삭제"""
+        now = time.time()
+        if now - self._last_cleanup < 60:
+            return
+        self._last_cleanup = now
+        deleted = self._conn().execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (*TERMINAL_STATUSES, now - self.result_ttl),
+        ).rowcount
+        if deleted:
+            logger.info("[JobQueue] Removed %d expired jobs", deleted)
+
+    # ------------------------------------------------------------------
+    # 워커
+    # ------------------------------------------------------------------
+
+    async def _run(self, index: int) -> None:
+        worker = f"{self._worker_prefix}:{index}"
+        while True:
+            try:
+                job = await self._db(self._claim, worker)
+                if job is None:
+                    await self._db(self._cleanup)
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._execute(job, worker)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("[JobQueue] Worker error: %s", e)
+                await asyncio.sleep(self.poll_interval)
+
+    async def _execute(self, job: Dict[str, Any], worker: str) -> None:
+        job_id = job["id"]
+        with self._progress_lock:
+            self._progress[job_id] = [{"stage": "running", "at": round(time.time(), 3), "attempt": job["attempts"]}]
+        heartbeat = asyncio.get_running_loop().create_task(self._keep_alive(job_id, worker))
+        self._running += 1
+        start = time.perf_counter()
+        result, error = None, None
+        try:
+            result = await self._handler(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            self._running -= 1
+            heartbeat.cancel()
+
+        try:
+            status = await self._db(self._finish, job, worker, result, error)
+        finally:
+            with self._progress_lock:
+                self._progress.pop(job_id, None)
+
+        JOB_DURATION.observe(time.perf_counter() - start, kind=job["kind"], status=status)
+        if status == STATUS_QUEUED:
+            JOBS.inc(status="retry")
+            logger.warning(
+                "[JobQueue] Job failed (attempt %d/%d), will retry: %s: %s",
+                job["attempts"], job["max_attempts"], job_id, error
+            )
+        elif status == STATUS_FAILED:
+            JOBS.inc(status="failed")
+            logger.error("[JobQueue] Job failed after %d attempts: %s (%s)", job["attempts"], job_id, error)
+        else:
+            JOBS.inc(status="succeeded")
+            logger.info("[JobQueue] Job succeeded: %s (attempt %d)", job_id, job["attempts"])
+
+    async def _keep_alive(self, job_id: str, worker: str) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            try:
+                await self._db(self._heartbeat, job_id, worker)
+            except Exception as e:
+                logger.warning("[JobQueue] Heartbeat failed for %s: %s", job_id, e)
+
+
+def running_jobs_collector(get_queue: Callable[[], Optional[JobQueue]]):
+    """이 프로세스에서 실행 중인 job 수를 /metrics로 내보내는 collector (워커 간 합산)"""
+
+    def collect():
+        queue = get_queue()
+        if queue is None:
+            return []
+        return [("agent_jobs_running", "gauge", "Jobs currently executing in this process", {}, queue.running())]
+
+    return collect
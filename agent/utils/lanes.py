@@ -0,0 +1,419 @@
+"""
+요청 타입별 실행 lane (priority lane)
+요청을 응답 type 기준 lane(data / answer / diary / image / report)으로 나누고 lane마다 동시 실행 수와 대기열을 둡니다.
+느린 image / report 요청이 몰려도 data / answer 요청은 자기 lane의 예약 slot으로 바로 실행됩니다.
+
+- 전체 동시 실행 수: LANE_CAPACITY
+- lane별 최대 동시 실행 수: LANE_LIMITS (JSON, 예: {"image": 4})
+- lane별 예약 slot: LANE_RESERVED (JSON) - 다른 lane이 쓰지 못하는 slot.
+  나머지(LANE_CAPACITY - 예약 합계)는 공유 slot이며 비면 LANES 순서(우선순위)대로 대기 요청에 배정합니다.
+- lane별 대기열 길이: LANE_QUEUE_LIMIT (넘으면 LaneFull)
+- 같은 lane 안의 대기 요청은 사용자별 weighted fair queuing(start-time fair queuing) 순서로 배정합니다.
+  요청마다 start tag = max(lane 가상 시각, 그 사용자의 이전 finish tag), finish tag = start + 1 / weight
+  이므로 한 사용자가 대기열을 채워도 다른 사용자의 요청이 그 뒤에 밀리지 않습니다 (weight: utils/fairness.py).
+
+    async with lane_slot(lane_for("image")):
+        ...
+
+request_type이 없는 AI 라우팅 요청은 data lane에서 시작하고, orchestrator가 하위 agent tool을 호출하면
+(LaneTool) data slot을 반납하고 그 하위 agent의 lane으로 옮겨 실행합니다.
+옮긴 slot은 tool이 끝나도 유지되고 요청(orchestrate_request)이 끝날 때 반납합니다.
+하위 agent tool이 동시에 실행되면 각 lane slot을 모두 잡고 요청이 끝날 때 함께 반납합니다.
+lane slot 대기는 요청 deadline 안에서만 하며, 대기는 이벤트 루프 / 스레드 어디서 해도 됩니다.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from strands.types.tools import AgentTool
+
+from .deadline import DEADLINE_EXCEEDED, DeadlineExceeded, remaining
+from .metrics import Counter, Histogram, register_collector
+
+logger = logging.getLogger(__name__)
+
+LANE_DATA = "data"
+LANE_ANSWER = "answer"
+LANE_DIARY = "diary"
+LANE_IMAGE = "image"
+LANE_REPORT = "report"
+# 공유 slot 배정 우선순위 순서
+LANES = (LANE_DATA, LANE_ANSWER, LANE_DIARY, LANE_IMAGE, LANE_REPORT)
+
+# request_type / 하위 agent 이름 → lane (그 외 / None은 data)
+ROUTE_LANES = {
+    "question": LANE_ANSWER,
+    "summarize": LANE_DIARY,
+    "image": LANE_IMAGE,
+    "report": LANE_REPORT,
+}
+
+DEFAULT_LANE_LIMITS = {LANE_DATA: 32, LANE_ANSWER: 32, LANE_DIARY: 16, LANE_IMAGE: 8, LANE_REPORT: 4}
+DEFAULT_LANE_RESERVED = {LANE_DATA: 4, LANE_ANSWER: 4, LANE_DIARY: 2}
+
+LANE_CAPACITY = int(os.environ.get("LANE_CAPACITY", "32"))
+LANE_QUEUE_LIMIT = int(os.environ.get("LANE_QUEUE_LIMIT", "100"))
+
+LANE_WAIT = Histogram("agent_lane_wait_seconds", "Time spent waiting for a lane slot", ("lane",))
+# reason: queue_full / deadline
+LANE_REJECTED = Counter("agent_lane_rejected_total", "Requests rejected while waiting for a lane slot", ("lane", "reason"))
+
+
+def _parse_lane_table(name: str, defaults: Dict[str, int]) -> Dict[str, int]:
+    raw = os.environ.get(name)
+    table = dict(defaults)
+    if not raw:
+        return table
+    try:
+        table.update({str(k): int(v) for k, v in json.loads(raw).items()})
+    except (ValueError, TypeError, AttributeError) as e:
+        logger.warning("[Lanes] %s 파싱 실패, 기본값 사용: %s", name, e)
+        return dict(defaults)
+    return table
+
+
+class LaneFull(Exception):
+    """lane 대기열이 가득 차서 요청을 받을 수 없음"""
+
+    def __init__(self, lane: str):
+        super().__init__(f"요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요 ({lane})")
+        self.lane = lane
+
+
+class LaneTicket:
+    """
+    요청이 잡고 있는 lane slot (contextvars로 하위 agent / tool까지 전달)
+    AI 라우팅에서 하위 agent tool이 동시에 실행되면(Strands ConcurrentToolExecutor) slot을 여러 개 잡을 수 있으므로
+    잡고 있는 lane을 모두 기록하고 요청이 끝날 때 한꺼번에 반납합니다.
+    """
+
+    __slots__ = ("lanes", "moved", "closed", "user_id", "weight", "lock")
+
+    def __init__(self, lane: str, user_id: Optional[str] = None, weight: float = 1.0):
+        # 잡고 있는 slot의 lane (같은 lane이 여러 번 있을 수 있음)
+        self.lanes = [lane]
+        # 시작 lane slot을 하위 agent lane으로 넘겼는지
+        self.moved = False
+        # 요청이 끝나 모두 반납했는지 (이후 얻은 slot은 바로 반납)
+        self.closed = False
+        self.user_id = user_id
+        self.weight = weight
+        self.lock = threading.Lock()
+
+    @property
+    def lane(self) -> Optional[str]:
+        """가장 최근에 잡은 slot의 lane"""
+        with self.lock:
+            return self.lanes[-1] if self.lanes else None
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "granted", "start")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, start: float):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+        self.start = start
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class LaneScheduler:
+    """
+    lane별 slot 배정기 (스레드 안전, 여러 이벤트 루프에서 대기 가능)
+
+    Args:
+        capacity: 전체 동시 실행 수
+        limits: lane별 최대 동시 실행 수
+        reserved: lane별 예약 slot 수
+        queue_limit: lane별 최대 대기 수
+    """
+
+    def __init__(self, capacity: int, limits: Dict[str, int], reserved: Dict[str, int], queue_limit: int):
+        self.limits = {lane: limits.get(lane, capacity) for lane in LANES}
+        self.reserved = {lane: min(reserved.get(lane, 0), self.limits[lane]) for lane in LANES}
+        self.shared = max(0, capacity - sum(self.reserved.values()))
+        self.queue_limit = queue_limit
+        self._lock = threading.Lock()
+        self._active = {lane: 0 for lane in LANES}
+        # lane별 (start tag, 순번, waiter) heap
+        self._queues = {lane: [] for lane in LANES}
+        self._seq = itertools.count()
+        # weighted fair queuing: lane별 가상 시각, (lane, user)별 마지막 finish tag
+        self._virtual = {lane: 0.0 for lane in LANES}
+        self._finish: Dict[tuple, float] = {}
+
+    def _shared_used(self) -> int:
+        return sum(max(0, self._active[lane] - self.reserved[lane]) for lane in LANES)
+
+    def _can_run(self, lane: str) -> bool:
+        active = self._active[lane]
+        if active >= self.limits[lane]:
+            return False
+        return active < self.reserved[lane] or self._shared_used() < self.shared
+
+    def _dispatch(self) -> None:
+        # _lock 안에서 호출: 우선순위 순서로 lane마다 FIFO 배정
+        for lane in LANES:
+            queue = self._queues[lane]
+            while queue and self._can_run(lane):
+                _, _, waiter = heapq.heappop(queue)
+                self._virtual[lane] = waiter.start
+                waiter.granted = True
+                self._active[lane] += 1
+                try:
+                    waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+                except RuntimeError:
+                    # 대기하던 루프가 이미 닫힘 → 배정 취소
+                    waiter.granted = False
+                    self._active[lane] -= 1
+
+    def _start_tag(self, lane: str, user_id: Optional[str], weight: float) -> float:
+        # _lock 안에서 호출
+        virtual = self._virtual[lane]
+        if not user_id:
+            return virtual
+        if len(self._finish) > 10000:
+            # 가상 시각이 지난 사용자는 다시 와도 virtual부터 시작하므로 정리
+            self._finish = {k: v for k, v in self._finish.items() if v > self._virtual[k[0]]}
+        start = max(virtual, self._finish.get((lane, user_id), 0.0))
+        self._finish[(lane, user_id)] = start + 1.0 / max(weight, 0.01)
+        return start
+
+    async def acquire(
+        self, lane: str, timeout: Optional[float] = None, user_id: Optional[str] = None, weight: float = 1.0
+    ) -> None:
+        """
+        lane slot을 얻을 때까지 기다립니다.
+
+        Args:
+            lane: lane 이름
+            timeout: 최대 대기 시간 (초, None이면 무제한)
+            user_id: fair queuing 기준 사용자 (None이면 도착 순서)
+            weight: 사용자 가중치 (클수록 대기열에서 자주 배정)
+
+        Raises:
+            LaneFull: 대기열이 가득 참
+            asyncio.TimeoutError: timeout 안에 slot을 얻지 못함
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            queue = self._queues[lane]
+            if len(queue) >= self.queue_limit:
+                raise LaneFull(lane)
+            waiter = _Waiter(loop, self._start_tag(lane, user_id, weight))
+            heapq.heappush(queue, (waiter.start, next(self._seq), waiter))
+            self._dispatch()
+            if waiter.granted:
+                return
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except BaseException:
+            with self._lock:
+                if waiter.granted:
+                    self._release_locked(lane)
+                else:
+                    queue = self._queues[lane]
+                    queue[:] = [item for item in queue if item[2] is not waiter]
+                    heapq.heapify(queue)
+            raise
+
+    def _release_locked(self, lane: str) -> None:
+        self._active[lane] -= 1
+        self._dispatch()
+
+    def release_lane(self, lane: str) -> None:
+        """lane slot 하나를 반납합니다."""
+        with self._lock:
+            self._release_locked(lane)
+
+    def release(self, ticket: LaneTicket) -> None:
+        """ticket이 잡고 있는 slot을 모두 반납합니다 (이미 반납했으면 무시)."""
+        with ticket.lock:
+            lanes, ticket.lanes = ticket.lanes, []
+            ticket.closed = True
+        with self._lock:
+            for lane in lanes:
+                self._release_locked(lane)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                lane: {
+                    "active": self._active[lane],
+                    "queued": len(self._queues[lane]),
+                    "limit": self.limits[lane],
+                    "reserved": self.reserved[lane],
+                    "saturation": round(self._active[lane] / self.limits[lane], 3) if self.limits[lane] else 1.0,
+                }
+                for lane in LANES
+            }
+
+
+_scheduler: Optional[LaneScheduler] = None
+_scheduler_lock = threading.Lock()
+_current_lane: ContextVar[Optional[LaneTicket]] = ContextVar("lane", default=None)
+
+
+def get_scheduler() -> LaneScheduler:
+    """프로세스 공용 LaneScheduler (LANE_* 환경변수로 첫 사용 시 생성)"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LaneScheduler(
+                    LANE_CAPACITY,
+                    _parse_lane_table("LANE_LIMITS", DEFAULT_LANE_LIMITS),
+                    _parse_lane_table("LANE_RESERVED", DEFAULT_LANE_RESERVED),
+                    LANE_QUEUE_LIMIT,
+                )
+                logger.info(
+                    "[Lanes] capacity=%d shared=%d limits=%s reserved=%s",
+                    LANE_CAPACITY, _scheduler.shared, _scheduler.limits, _scheduler.reserved
+                )
+                if _scheduler.shared == 0:
+                    starved = [lane for lane in LANES if _scheduler.reserved[lane] == 0]
+                    if starved:
+                        logger.warning("[Lanes] 공유 slot이 없어 예약 slot 없는 lane은 실행되지 않습니다: %s", starved)
+    return _scheduler
+
+
+def lane_for(name: Optional[str]) -> str:
+    """request_type 또는 하위 agent 이름의 lane (None / 알 수 없는 값은 data)"""
+    return ROUTE_LANES.get(name, LANE_DATA)
+
+
+def current_lane() -> Optional[str]:
+    ticket = _current_lane.get()
+    return ticket.lane if ticket is not None else None
+
+
+async def _acquire(scheduler: LaneScheduler, lane: str, user_id: Optional[str], weight: float) -> None:
+    start = time.perf_counter()
+    try:
+        await scheduler.acquire(lane, timeout=remaining(), user_id=user_id, weight=weight)
+    except LaneFull:
+        LANE_REJECTED.inc(lane=lane, reason="queue_full")
+        raise
+    except asyncio.TimeoutError:
+        LANE_REJECTED.inc(lane=lane, reason="deadline")
+        DEADLINE_EXCEEDED.inc(stage="lane")
+        raise DeadlineExceeded("lane")
+    LANE_WAIT.observe(time.perf_counter() - start, lane=lane)
+
+
+async def _move_ticket(scheduler: LaneScheduler, ticket: LaneTicket, lane: str) -> None:
+    """
+    요청 ticket에 lane slot을 추가합니다. 이미 그 lane slot을 잡고 있으면 그대로 사용하고,
+    처음 옮길 때는 시작 lane(data) slot을 먼저 반납합니다 (동시에 실행되는 tool끼리는 ticket.lock으로 구분).
+    """
+    with ticket.lock:
+        if lane in ticket.lanes:
+            return
+        origin = None
+        if not ticket.moved:
+            ticket.moved = True
+            origin = ticket.lanes.pop(0) if ticket.lanes else None
+    if origin is not None:
+        scheduler.release_lane(origin)
+
+    await _acquire(scheduler, lane, ticket.user_id, ticket.weight)
+    with ticket.lock:
+        if not ticket.closed:
+            ticket.lanes.append(lane)
+            return
+    # 기다리는 동안 요청이 끝남 (thread 모드에서 deadline 초과 등)
+    scheduler.release_lane(lane)
+
+
+@asynccontextmanager
+async def lane_slot(lane: str, user_id: Optional[str] = None, weight: float = 1.0):
+    """
+    with 블록 동안 lane slot을 잡습니다. 요청이 이미 ticket을 갖고 있으면 그 ticket에 lane slot을 추가합니다
+    (AI 라우팅 → 하위 agent, 사용자 / 가중치 유지, 같은 lane이면 그대로 사용).
+    추가한 slot은 블록이 끝나도 반납하지 않고, ticket을 처음 만든 바깥 lane_slot이 끝날 때 모두 반납합니다
+    (하위 agent 이후의 structured_output 호출도 slot 안에서 실행).
+
+    Args:
+        lane: lane 이름
+        user_id: fair queuing 기준 사용자
+        weight: 사용자 가중치
+
+    Raises:
+        LaneFull: 대기열이 가득 참
+        DeadlineExceeded: 요청 deadline 안에 slot을 얻지 못함
+    """
+    scheduler = get_scheduler()
+    ticket = _current_lane.get()
+    if ticket is not None:
+        await _move_ticket(scheduler, ticket, lane)
+        yield
+        return
+
+    await _acquire(scheduler, lane, user_id, weight)
+    new_ticket = LaneTicket(lane, user_id, weight)
+    token = _current_lane.set(new_ticket)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+        scheduler.release(new_ticket)
+
+
+class LaneTool(AgentTool):
+    """
+    하위 agent tool을 감싸 요청의 lane slot을 그 하위 agent의 lane으로 옮깁니다 (AI 라우팅용, 요청이 끝날 때 반납).
+    직접 호출(tool(...))은 그대로 전달합니다.
+    """
+
+    def __init__(self, tool: AgentTool, lane: str):
+        super().__init__()
+        self._tool = tool
+        self.lane = lane
+
+    @property
+    def tool_name(self) -> str:
+        return self._tool.tool_name
+
+    @property
+    def tool_spec(self):
+        return self._tool.tool_spec
+
+    @property
+    def tool_type(self) -> str:
+        return self._tool.tool_type
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        async with lane_slot(self.lane):
+            async for event in self._tool.stream(tool_use, invocation_state, **kwargs):
+                yield event
+
+    def __call__(self, *args, **kwargs):
+        return self._tool(*args, **kwargs)
+
+
+def _lane_collector():
+    if _scheduler is None:
+        return
+    for lane, stats in _scheduler.stats().items():
+        labels = {"lane": lane}
+        yield ("agent_lane_active", "gauge", "Requests running in each lane", labels, stats["active"])
+        yield ("agent_lane_queued", "gauge", "Requests waiting for a lane slot", labels, stats["queued"])
+        yield ("agent_lane_limit", "gauge", "Concurrency limit of each lane", labels, stats["limit"])
+        yield ("agent_lane_saturation", "gauge", "Lane active / limit", labels, stats["saturation"])
+
+
+# active / queued는 워커 합산, limit은 워커별 한도, saturation은 가장 포화된 워커 기준
+register_collector(_lane_collector, merge={"agent_lane_limit": "max", "agent_lane_saturation": "max"})
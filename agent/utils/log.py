@@ -0,0 +1,208 @@
+"""
+구조화 로깅 설정
+레벨 기반 로깅, JSON 출력, 대용량 payload 축약, DEBUG 샘플링, 비동기(Queue) 출력을 제공합니다.
+
+요청 처리 경로에서는 print 대신 logging을 사용하고 %-포맷 인자를 넘겨,
+레벨에서 걸러지는 로그는 문자열 생성 비용도 들지 않도록 합니다.
+
+    logger = logging.getLogger(__name__)
+    logger.debug("user_input: %s", summarize(user_input))
+
+환경변수:
+    LOG_LEVEL           루트 로그 레벨 (기본 INFO)
+    STRANDS_LOG_LEVEL   strands 로거 레벨 (기본 WARNING)
+    LOG_FORMAT          json | text (기본 json)
+    LOG_MAX_FIELD       로그 인자 문자열 최대 길이 (기본 200)
+    LOG_SAMPLE_RATE     DEBUG 로그 샘플링 비율 0.0~1.0 (기본 1.0)
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+LOG_MAX_FIELD = int(os.environ.get("LOG_MAX_FIELD", "200"))
+
+# 값 대신 길이만 남기는 필드 (base64 이미지 등)
+REDACTED_FIELDS = {"image_base64", "image", "password", "DB_PASSWORD", "SecretString"}
+
+# 로그 레코드에 자동으로 붙는 요청 컨텍스트 (request_id, user_id, trace_id 등)
+_log_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("log_context", default={})
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+# ============================================================================
+# payload 축약
+# ============================================================================
+
+def summarize(value: Any, limit: int = LOG_MAX_FIELD) -> Any:
+    """
+    로그용으로 값을 축약합니다. 긴 문자열은 앞부분과 전체 길이만 남깁니다.
+
+    Args:
+        value: 로그에 남길 값
+        limit: 문자열 최대 길이
+
+    Returns:
+        축약된 값 (문자열이 아니면 그대로)
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return f"<bytes len={len(value)}>"
+    if isinstance(value, str) and len(value) > limit:
+        return f"{value[:limit]}...<len={len(value)}>"
+    return value
+
+
+def redact_payload(payload: Dict[str, Any], limit: int = LOG_MAX_FIELD) -> Dict[str, Any]:
+    """
+    요청/응답 딕셔너리를 로그용으로 축약합니다 (전체를 직렬화하지 않음).
+
+    REDACTED_FIELDS에 해당하는 키는 값 대신 길이만 남기고,
+    나머지 문자열은 summarize로 자릅니다. 최상위 키만 처리합니다.
+    """
+    result = {}
+    for key, value in (payload or {}).items():
+        if key in REDACTED_FIELDS and value is not None:
+            size = len(value) if hasattr(value, "__len__") else "?"
+            result[key] = f"<redacted len={size}>"
+        elif isinstance(value, (dict, list)):
+            result[key] = f"<{type(value).__name__} len={len(value)}>"
+        else:
+            result[key] = summarize(value, limit)
+    return result
+
+
+# ============================================================================
+# 요청 컨텍스트
+# ============================================================================
+
+@contextmanager
+def log_context(**fields):
+    """
+    with 블록 안에서 남기는 모든 로그에 필드를 추가합니다.
+
+    Example:
+        with log_context(request_id=rid, user_id=user_id):
+            orchestrate_request(...)
+    """
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+def get_log_context() -> Dict[str, Any]:
+    """현재 요청 컨텍스트 필드를 반환합니다."""
+    return dict(_log_context.get())
+
+
+# ============================================================================
+# Filters / Formatters
+# ============================================================================
+
+class ContextFilter(logging.Filter):
+    """요청 컨텍스트 필드를 레코드에 붙이고, 긴 문자열 인자를 축약합니다."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.context = _log_context.get()
+        if record.args and isinstance(record.args, tuple):
+            record.args = tuple(summarize(arg) for arg in record.args)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """DEBUG 레코드를 비율에 따라 샘플링합니다. INFO 이상은 항상 통과합니다."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄 JSON으로 출력합니다 (CloudWatch Logs Insights에서 필드 조회 가능)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "context", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """사람이 읽기 쉬운 한 줄 텍스트 (로컬 개발용)."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s | %(name)s | %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        context = getattr(record, "context", None)
+        if context:
+            line += " | " + " ".join(f"{k}={v}" for k, v in context.items())
+        return line
+
+
+# ============================================================================
+# Setup
+# ============================================================================
+
+def setup_logging(level: Optional[str] = None) -> None:
+    """
+    루트 로거를 설정합니다. 여러 번 호출해도 한 번만 적용됩니다.
+
+    호출 스레드는 레코드를 Queue에 넣기만 하고,
+    포맷팅과 stdout 쓰기는 QueueListener 스레드가 처리합니다.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        level = (level or os.environ.get("LOG_LEVEL", "INFO")).upper()
+        formatter = TextFormatter() if os.environ.get("LOG_FORMAT", "json") == "text" else JsonFormatter()
+
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(formatter)
+
+        log_queue: queue.Queue = queue.Queue(-1)
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter(float(os.environ.get("LOG_SAMPLE_RATE", "1.0"))))
+        queue_handler.addFilter(ContextFilter())
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        logging.getLogger("strands").setLevel(os.environ.get("STRANDS_LOG_LEVEL", "WARNING").upper())
+        for noisy in ("botocore", "boto3", "urllib3", "httpx", "httpcore"):
+            logging.getLogger(noisy).setLevel(logging.WARNING)
+
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
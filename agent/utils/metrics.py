@@ -0,0 +1,450 @@
+"""
+Prometheus 형식 메트릭
+/metrics 엔드포인트에서 text exposition 형식(0.0.4)으로 출력합니다.
+
+별도 의존성 없이 Counter / Gauge / Histogram만 구현하며,
+Bedrock / KB retrieve / API 호출 지연시간은 tracing span 종료 시점에 함께 기록합니다.
+
+    REQUESTS.inc(type="answer")
+    with REQUEST_LATENCY.time(type="answer"):
+        ...
+
+멀티 워커(gunicorn) 모드에서는 METRICS_DIR에 워커별 스냅샷을 주기적으로 기록하고,
+/metrics를 받은 워커가 전체 워커의 스냅샷을 합산해서 출력합니다.
+counter / histogram은 합산하고, gauge는 metric마다 정한 방식(merge: sum / max / min / avg)으로 합칩니다.
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .tracing import Span, add_span_listener
+
+logger = logging.getLogger(__name__)
+
+# 지연시간 histogram bucket (초) - LLM 호출은 수 초 ~ 수십 초
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+_registry: List["_Metric"] = []
+_collectors: List[Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]] = []
+_registry_lock = threading.Lock()
+
+# 멀티 워커 합산 방식 (gauge). 워커마다 따로 세는 값(대기열, 실행 수)은 sum,
+# 워커마다 같은 설정 / 상태를 가진 값(한도, circuit 상태, hedge 지연시간 등)은 max / min / avg
+MERGE_MODES = ("sum", "max", "min", "avg")
+_merge_modes: Dict[str, str] = {}
+
+# 멀티 워커 모드: 워커별 스냅샷 디렉터리 (gunicorn_conf.py가 설정)
+METRICS_DIR = os.environ.get("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", "5"))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, description: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """직렬화 가능한 현재 값 (워커 간 합산용)"""
+        with self._lock:
+            values = [[list(key), value] for key, value in self._values.items()]
+        return {"type": self.type_name, "help": self.description, "labelnames": list(self.labelnames), "values": values}
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name, description, labelnames=()):
+        super().__init__(name, description, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name, description, labelnames=(), merge="sum"):
+        super().__init__(name, description, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        _set_merge_modes({name: merge})
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, description, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key → [bucket별 count..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = [0.0] * (len(self.buckets) + 2)
+                self._values[key] = data
+            data[index] += 1
+            data[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            values = [[list(key), list(data)] for key, data in self._values.items()]
+        return {
+            "type": self.type_name, "help": self.description, "labelnames": list(self.labelnames),
+            "buckets": list(self.buckets), "values": values,
+        }
+
+
+def _set_merge_modes(merge: Dict[str, str]) -> None:
+    for name, mode in merge.items():
+        if mode not in MERGE_MODES:
+            raise ValueError(f"알 수 없는 merge 방식: {mode} (가능: {', '.join(MERGE_MODES)})")
+    with _registry_lock:
+        _merge_modes.update(merge)
+
+
+def register_collector(
+    func: Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]],
+    merge: Optional[Dict[str, str]] = None,
+) -> None:
+    """
+    scrape 시점에 값을 계산하는 collector를 등록합니다 (커넥션 풀, 캐시 적중률 등).
+
+    Args:
+        func: (name, type, description, labels, value) 튜플을 반환하는 함수
+        merge: 멀티 워커 합산 방식 {metric 이름: sum / max / min / avg} (없으면 sum, *_ratio는 avg)
+    """
+    if merge:
+        _set_merge_modes(merge)
+    with _registry_lock:
+        _collectors.append(func)
+
+
+def collect_state() -> Dict[str, Dict[str, Any]]:
+    """이 프로세스의 전체 메트릭 값 (registry + collector)을 반환합니다."""
+    with _registry_lock:
+        metrics = list(_registry)
+        collectors = list(_collectors)
+
+    state = {metric.name: metric.snapshot() for metric in metrics}
+    for name, entry in state.items():
+        if entry["type"] == "gauge":
+            entry["merge"] = _merge_modes.get(name, "sum")
+    for collector in collectors:
+        try:
+            samples = list(collector())
+        except Exception:
+            continue
+        for name, type_name, description, labels, value in samples:
+            entry = state.setdefault(
+                name, {"type": type_name, "help": description, "labelnames": list(labels), "values": []}
+            )
+            if type_name == "gauge" and name in _merge_modes:
+                entry["merge"] = _merge_modes[name]
+            entry["values"].append([[str(labels.get(k, "")) for k in entry["labelnames"]], value])
+    return state
+
+
+def _merge_mode(name: str, entry: Dict[str, Any]) -> str:
+    if entry["type"] != "gauge":
+        return "sum"
+    # 비율 gauge는 합산 대신 워커 평균
+    return entry.get("merge") or ("avg" if name.endswith("_ratio") else "sum")
+
+
+def _merge_values(values: List[Any], mode: str) -> Any:
+    if isinstance(values[0], list):
+        # histogram: bucket별 합산
+        return [sum(column) for column in zip(*values)]
+    if mode == "max":
+        return max(values)
+    if mode == "min":
+        return min(values)
+    if mode == "avg":
+        return sum(values) / len(values)
+    return sum(values)
+
+
+def merge_states(states: Iterable[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """
+    여러 워커의 상태를 같은 series끼리 합칩니다.
+    counter / histogram(bucket별)은 합산, gauge는 metric의 merge 방식(기본 sum, *_ratio는 avg)을 따릅니다.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for state in states:
+        for name, entry in state.items():
+            target = merged.setdefault(name, {**entry, "values": {}})
+            for key, value in entry["values"]:
+                target["values"].setdefault(tuple(key), []).append(value)
+    for name, entry in merged.items():
+        mode = _merge_mode(name, entry)
+        entry["values"] = [[list(key), _merge_values(values, mode)] for key, values in entry["values"].items()]
+    return merged
+
+
+def format_state(state: Dict[str, Dict[str, Any]]) -> str:
+    """메트릭 상태를 Prometheus text 형식으로 변환합니다."""
+    lines: List[str] = []
+    for name, entry in state.items():
+        lines.append(f"# HELP {name} {entry['help']}")
+        lines.append(f"# TYPE {name} {entry['type']}")
+        for key, value in entry["values"]:
+            labels = dict(zip(entry["labelnames"], key))
+            if entry["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            cumulative = 0.0
+            for bound, count in zip(list(entry["buckets"]) + [float("inf")], value[:-1]):
+                cumulative += count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{name}_bucket{bucket_labels} {_format_value(cumulative)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-1])}")
+    return "\n".join(lines) + "\n"
+
+
+# ============================================================================
+# 멀티 워커 스냅샷
+# ============================================================================
+
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(METRICS_DIR, f"worker-{pid}.json")
+
+
+def write_worker_snapshot(state: Optional[Dict[str, Any]] = None) -> None:
+    """이 워커의 메트릭 상태를 METRICS_DIR에 기록합니다 (임시 파일 → rename으로 원자적 교체)."""
+    if not METRICS_DIR:
+        return
+    path = _snapshot_path(os.getpid())
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"pid": os.getpid(), "time": time.time(), "state": state or collect_state()}, f)
+    os.replace(tmp_path, path)
+
+
+def remove_worker_snapshot(pid: int) -> None:
+    """종료된 워커의 스냅샷을 삭제합니다 (gunicorn child_exit hook)."""
+    if not METRICS_DIR:
+        return
+    try:
+        os.remove(_snapshot_path(pid))
+    except FileNotFoundError:
+        pass
+
+
+def _read_worker_snapshots() -> List[Dict[str, Any]]:
+    snapshots = []
+    for filename in os.listdir(METRICS_DIR):
+        if not (filename.startswith("worker-") and filename.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(METRICS_DIR, filename), encoding="utf-8") as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def start_snapshot_writer() -> Optional[threading.Thread]:
+    """멀티 워커 모드에서 METRICS_FLUSH_INTERVAL마다 스냅샷을 기록하는 스레드를 시작합니다."""
+    if not METRICS_DIR:
+        return None
+
+    def _run():
+        while True:
+            try:
+                write_worker_snapshot()
+            except Exception as e:
+                logger.warning("[Metrics] 스냅샷 기록 실패: %s", e)
+            time.sleep(METRICS_FLUSH_INTERVAL)
+
+    thread = threading.Thread(target=_run, name="metrics-snapshot", daemon=True)
+    thread.start()
+    return thread
+
+
+def render_metrics() -> str:
+    """
+    전체 메트릭을 Prometheus text 형식으로 반환합니다.
+    멀티 워커 모드면 모든 워커의 스냅샷을 합산하고 워커별 in-flight / up을 추가합니다.
+    """
+    state = collect_state()
+    if not METRICS_DIR:
+        return format_state(state)
+
+    write_worker_snapshot(state)
+    snapshots = _read_worker_snapshots()
+    merged = merge_states(snapshot["state"] for snapshot in snapshots)
+
+    in_flight_name = IN_FLIGHT.name
+    merged["agent_worker_up"] = {
+        "type": "gauge", "help": "Workers that reported a metrics snapshot", "labelnames": ["worker"],
+        "values": [[[str(snapshot["pid"])], 1] for snapshot in snapshots],
+    }
+    merged["agent_worker_requests_in_flight"] = {
+        "type": "gauge", "help": "Requests in flight per worker", "labelnames": ["worker"],
+        "values": [
+            [[str(snapshot["pid"])], sum(v for _, v in snapshot["state"].get(in_flight_name, {}).get("values", []))]
+            for snapshot in snapshots
+        ],
+    }
+    return format_state(merged)
+
+
+# ============================================================================
+# 공통 메트릭
+# ============================================================================
+
+# 응답 type: data / answer / diary / image / report / error
+REQUESTS = Counter("agent_requests_total", "Total /invocations requests by routed type", ("type",))
+REQUEST_LATENCY = Histogram(
+    "agent_request_duration_seconds", "End-to-end /invocations latency by routed type", ("type",)
+)
+IN_FLIGHT = Gauge("agent_requests_in_flight", "Requests currently being processed")
+
+BEDROCK_LATENCY = Histogram(
+    "agent_bedrock_call_duration_seconds", "Bedrock runtime call latency by model id", ("model_id", "operation")
+)
+BEDROCK_ERRORS = Counter(
+    "agent_bedrock_call_errors_total", "Failed Bedrock runtime calls by model id", ("model_id", "operation")
+)
+KB_RETRIEVE_LATENCY = Histogram("agent_kb_retrieve_duration_seconds", "Knowledge Base retrieve latency")
+AWS_CALL_LATENCY = Histogram(
+    "agent_aws_call_duration_seconds", "Other AWS API call latency", ("service", "operation")
+)
+HTTP_LATENCY = Histogram(
+    "agent_http_request_duration_seconds", "Outgoing HTTP request latency", ("method", "status")
+)
+
+
+def _record_span(s: Span) -> None:
+    """tracing span 종료 시 외부 호출 지연시간 메트릭을 기록합니다."""
+    if s.duration_ms is None:
+        return
+    seconds = s.duration_ms / 1000
+    attrs = s.attributes
+    if s.name.startswith("aws."):
+        service, operation = attrs.get("service", ""), attrs.get("operation", "")
+        if service == "bedrock-runtime":
+            model_id = attrs.get("model_id", "unknown")
+            BEDROCK_LATENCY.observe(seconds, model_id=model_id, operation=operation)
+            if s.status == "error":
+                BEDROCK_ERRORS.inc(model_id=model_id, operation=operation)
+        elif service == "bedrock-agent-runtime" and operation == "Retrieve":
+            KB_RETRIEVE_LATENCY.observe(seconds)
+        else:
+            AWS_CALL_LATENCY.observe(seconds, service=service, operation=operation)
+    elif s.name == "http.request":
+        HTTP_LATENCY.observe(seconds, method=attrs.get("method", ""), status=attrs.get("status_code", "error"))
+
+
+add_span_listener(_record_span)
+
+
+def httpx_pool_collector(name: str, get_client: Callable[[], Optional[object]]):
+    """
+    httpx.Client 커넥션 풀 상태(idle/active 커넥션 수)를 보고하는 collector를 만듭니다.
+
+    Args:
+        name: 메트릭 label로 쓸 클라이언트 이름
+        get_client: 클라이언트를 반환하는 함수 (아직 생성 전이면 None)
+    """
+    def collect():
+        client = get_client()
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", None) or [])
+        idle = sum(1 for c in connections if c.is_idle())
+        return [
+            ("agent_http_pool_connections", "gauge", "HTTP client pool connections by state",
+             {"client": name, "state": "idle"}, idle),
+            ("agent_http_pool_connections", "gauge", "HTTP client pool connections by state",
+             {"client": name, "state": "active"}, len(connections) - idle),
+        ]
+    return collect
+
+
+def _prompt_cache_collector():
+    from .usage import get_usage_stats
+
+    for stats in get_usage_stats().values():
+        yield (
+            "agent_prompt_cache_hit_ratio", "gauge",
+            "Bedrock prompt cache read tokens / prompt tokens by route",
+            {"route": stats["route"], "model_id": stats["model_id"]}, stats["cache_hit_ratio"],
+        )
+
+
+register_collector(_prompt_cache_collector)
@@ -0,0 +1,259 @@
+"""
+라우트별 모델 티어링 설정
+라우팅 분류, 프롬프트 생성 같은 가벼운 작업은 작고 빠른 모델에,
+답변/리포트 생성은 큰 모델에 배치할 수 있도록 라우트별 모델 테이블을 제공합니다.
+
+설정 방법 (우선순위 순):
+1. 환경변수 BEDROCK_MODEL_<ROUTE> (예: BEDROCK_MODEL_ROUTING)
+2. Secret/환경변수의 BEDROCK_ROUTE_MODELS (JSON 객체)
+3. 기존 설정 키 기반 기본값 (ROUTE_DEFAULT_KEYS)
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from .metrics import Counter, Histogram
+from .secrets import get_config, normalize_model_id
+from .tracing import instrument_boto3, span
+
+logger = logging.getLogger(__name__)
+
+# 라우트 이름
+ROUTE_ROUTING = "routing"                # orchestrator AI 라우팅 분류
+ROUTE_PROMPT_BUILDER = "prompt_builder"  # 일기 → 이미지 프롬프트 변환
+ROUTE_ANSWER = "answer"                  # 질문 답변 (question agent)
+ROUTE_DIARY = "diary"                    # 일기 생성 (summarize agent)
+ROUTE_IMAGE = "image"                    # image generator agent 추론
+ROUTE_REPORT = "report"                  # weekly report agent 추론
+
+ROUTES = (
+    ROUTE_ROUTING,
+    ROUTE_PROMPT_BUILDER,
+    ROUTE_ANSWER,
+    ROUTE_DIARY,
+    ROUTE_IMAGE,
+    ROUTE_REPORT,
+)
+
+# 라우트별 기본값으로 사용할 기존 설정 키 (앞에서부터 먼저 있는 값 사용)
+# 빈 리스트는 Strands 기본 모델 사용을 의미
+ROUTE_DEFAULT_KEYS = {
+    ROUTE_ROUTING: ["BEDROCK_MODEL_ARN", "BEDROCK_CLAUDE_MODEL_ID"],
+    ROUTE_PROMPT_BUILDER: ["BEDROCK_LLM_MODEL_ID"],
+    ROUTE_ANSWER: [],
+    ROUTE_DIARY: [],
+    ROUTE_IMAGE: ["BEDROCK_CLAUDE_MODEL_ID"],
+    ROUTE_REPORT: ["BEDROCK_CLAUDE_MODEL_ID"],
+}
+
+# Bedrock prompt caching 지원 모델 (model ID 부분 문자열)
+# 미지원 모델에 cache point를 보내면 ValidationException이 발생하므로 허용 목록으로 관리
+PROMPT_CACHE_MODELS = (
+    "claude-3-7-sonnet",
+    "claude-3-5-haiku",
+    "claude-sonnet-4",
+    "claude-opus-4",
+    "claude-haiku-4-5",
+    "amazon.nova-micro",
+    "amazon.nova-lite",
+    "amazon.nova-pro",
+)
+
+_config = None
+_config_lock = threading.Lock()
+_models: Dict[str, Any] = {}
+_models_lock = threading.Lock()
+
+ROUTE_LATENCY = Histogram(
+    "agent_route_duration_seconds", "Route call latency by route and model id", ("route", "model_id")
+)
+ROUTE_ERRORS = Counter("agent_route_errors_total", "Failed route calls by route and model id", ("route", "model_id"))
+
+
+def _get_config() -> dict:
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                try:
+                    _config = get_config()
+                except Exception as e:
+                    logger.warning("[ModelRouting] 설정 로드 실패, 환경변수 사용: %s", e)
+                    _config = {}
+    return _config
+
+
+def get_route_model_id(route: str) -> Optional[str]:
+    """
+    라우트에 배정된 model ID를 반환합니다.
+
+    Args:
+        route: 라우트 이름 (ROUTES 중 하나)
+
+    Returns:
+        model ID (None이면 Strands 기본 모델 사용)
+    """
+    if route not in ROUTE_DEFAULT_KEYS:
+        raise ValueError(f"알 수 없는 라우트입니다: {route}")
+
+    env_value = os.environ.get(f"BEDROCK_MODEL_{route.upper()}", "").strip()
+    if env_value:
+        return normalize_model_id(env_value)
+
+    config = _get_config()
+    route_models = config.get("BEDROCK_ROUTE_MODELS") or {}
+    if route_models.get(route):
+        return route_models[route]
+
+    for key in ROUTE_DEFAULT_KEYS[route]:
+        value = config.get(key) or os.environ.get(key, "")
+        if value:
+            return normalize_model_id(value)
+    return None
+
+
+def get_route_model_table() -> Dict[str, Optional[str]]:
+    """전체 라우트 → model ID 테이블을 반환합니다 (/ready의 models 단계에 표시)."""
+    return {route: get_route_model_id(route) for route in ROUTES}
+
+
+def prompt_cache_enabled(model_id: Optional[str] = None) -> bool:
+    """
+    Bedrock prompt caching을 사용할지 여부를 반환합니다.
+
+    BEDROCK_PROMPT_CACHE (환경변수 또는 Secret, 기본 true)가 켜져 있고
+    모델이 caching을 지원할 때만 True입니다.
+    model_id가 None이면 Strands 기본 모델(Claude Sonnet 4 계열)로 간주합니다.
+    """
+    flag = os.environ.get("BEDROCK_PROMPT_CACHE") or str(_get_config().get("BEDROCK_PROMPT_CACHE", "true"))
+    if flag.strip().lower() in ("0", "false", "no", "off"):
+        return False
+    if model_id is None:
+        return True
+    return any(name in model_id for name in PROMPT_CACHE_MODELS)
+
+
+def anthropic_system_blocks(system_prompt: str, model_id: str):
+    """
+    invoke_model (Anthropic Messages API)용 system 값을 만듭니다.
+    caching 지원 모델이면 고정 system prompt 끝에 cache_control을 붙입니다.
+
+    Args:
+        system_prompt: 요청마다 동일한 system prompt
+        model_id: 호출할 model ID
+
+    Returns:
+        system 필드 값 (문자열 또는 content block 리스트)
+    """
+    if not prompt_cache_enabled(model_id):
+        return system_prompt
+    return [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+
+
+def get_route_model(route: str):
+    """
+    라우트에 배정된 BedrockModel을 반환합니다 (라우트별로 한 번만 생성).
+    caching 지원 모델이면 Strands CacheConfig로 system prompt와 tool spec 뒤에 cache point를 둡니다.
+
+    Args:
+        route: 라우트 이름
+
+    Returns:
+        BedrockModel 인스턴스 (model ID도 없고 caching도 끄면 None → Strands 기본 모델)
+    """
+    if route in _models:
+        return _models[route]
+
+    with _models_lock:
+        if route not in _models:
+            model_id = get_route_model_id(route)
+            use_cache = prompt_cache_enabled(model_id)
+            if model_id is None and not use_cache:
+                _models[route] = None
+            else:
+                # BEDROCK_MODEL_REGIONS에 리전 / inference profile 목록이 있으면 failover 모델
+                from strands.models import CacheConfig
+
+                from .bedrock_regions import build_bedrock_model
+
+                kwargs = {}
+                if use_cache:
+                    # system prompt / tool spec / 마지막 사용자 메시지 뒤에 cache point
+                    # 지원 여부는 PROMPT_CACHE_MODELS로 확인했으므로 strategy="anthropic"(모델 검사 없이 주입)
+                    # Nova는 tool cache point를 지원하지 않으므로 system / messages만
+                    kwargs["cache_config"] = CacheConfig(
+                        strategy="anthropic", tools_ttl=model_id is None or "amazon.nova" not in model_id
+                    )
+                _models[route] = build_bedrock_model(model_id, **kwargs)
+                # BedrockModel은 별도 boto3 Session을 만들므로 client에 직접 trace hook 등록
+                instrument_boto3(_models[route].client)
+            logger.info(
+                "[ModelRouting] %s → %s (prompt cache: %s)",
+                route, model_id or "Strands 기본 모델", "on" if use_cache else "off"
+            )
+    return _models[route]
+
+
+# ============================================================================
+# 라우트별 지연시간 기록
+# ============================================================================
+
+def record_route_latency(route: str, model_id: Optional[str], elapsed: float, success: bool = True) -> None:
+    """
+    라우트/모델별 호출 지연시간을 agent_route_duration_seconds로 기록합니다 (/metrics).
+
+    Args:
+        route: 라우트 이름
+        model_id: 사용한 model ID
+        elapsed: 소요 시간 (초)
+        success: 호출 성공 여부
+    """
+    labels = {"route": route, "model_id": model_id or "default"}
+    ROUTE_LATENCY.observe(elapsed, **labels)
+    if not success:
+        ROUTE_ERRORS.inc(**labels)
+
+
+@contextmanager
+def track_route_latency(route: str, model_id: Optional[str] = None):
+    """
+    with 블록의 실행 시간을 라우트 지연시간으로 기록합니다.
+
+    Example:
+        with track_route_latency(ROUTE_ANSWER, model_id):
+            response = agent(prompt)
+
+    실행 구간은 "route.<route>" span으로도 기록됩니다.
+    """
+    start = time.perf_counter()
+    success = True
+    try:
+        with span(f"route.{route}", model_id=model_id or "default"):
+            yield
+    except BaseException:
+        success = False
+        raise
+    finally:
+        record_route_latency(route, model_id, time.perf_counter() - start, success)
+
+
+def agent_model_latency(agent) -> Optional[float]:
+    """
+    Strands Agent가 누적한 모델 호출 지연시간(초)을 반환합니다.
+    tool 실행 시간(하위 agent 포함)은 제외됩니다.
+
+    Args:
+        agent: 호출이 끝난 strands Agent
+
+    Returns:
+        모델 호출 지연시간 (초), 측정값이 없으면 None
+    """
+    metrics = getattr(agent, "event_loop_metrics", None)
+    accumulated = getattr(metrics, "accumulated_metrics", None) or {}
+    latency_ms = accumulated.get("latencyMs")
+    if latency_ms is None:
+        return None
+    return latency_ms / 1000
@@ -3,6 +3,7 @@ AWS Secrets Manager에서 민감 정보를 가져오는 유틸리티
 """
 import json
 import os
+import threading
 import boto3
 from botocore.exceptions import ClientError
 
@@ -79,10 +80,188 @@ def get_secret(secret_name: str, region_name: str = None) -> dict:
         return json.loads(decoded_binary_secret)
 
 
-def get_config() -> dict:
+# cross-region inference profile ID 접두사 (geo / global)
+INFERENCE_PROFILE_PREFIXES = ('us.', 'eu.', 'apac.', 'global.', 'us-gov.', 'ca.', 'jp.', 'au.')
+
+
+def normalize_model_id(value: str) -> str:
+    """
+    Model ID를 정규화합니다.
+    cross-region inference profile ID(us. / global. 등)와 inference profile ARN은
+    Converse / InvokeModel에 그대로 전달할 수 있으므로 유지하고 공백만 제거합니다.
+    
+    Args:
+        value: model ID, inference profile ID 또는 ARN
+    
+    Returns:
+        정규화된 model ID
+    """
+    if not value:
+        return value
+    return value.strip()
+
+
+def base_model_id(value: str) -> str:
+    """
+    inference profile ID / ARN에서 기반 model ID를 추출합니다 (리전 설정 조회, 로그 비교용).
+    
+    Example:
+        arn:aws:bedrock:us-east-1:...:inference-profile/global.anthropic.claude-sonnet-4-5-20250929-v1:0
+        → anthropic.claude-sonnet-4-5-20250929-v1:0
+    """
+    if not value:
+        return value
+    # ARN 형식이면 리소스 이름만
+    if value.startswith('arn:aws:bedrock:') and '/' in value:
+        value = value.split('/')[-1]
+    for prefix in INFERENCE_PROFILE_PREFIXES:
+        if value.startswith(prefix):
+            return value[len(prefix):]
+    return value
+
+
+def parse_model_regions(raw) -> dict:
+    """
+    모델별 리전 / inference profile 목록을 파싱합니다.
+    
+    Secret 또는 환경변수의 BEDROCK_MODEL_REGIONS 값을 받습니다.
+    예: {"anthropic.claude-sonnet-4-5-20250929-v1:0": [
+             {"region": "us-east-1", "model_id": "us.anthropic.claude-sonnet-4-5-20250929-v1:0"},
+             "us-west-2"
+         ],
+         "*": ["us-east-1", "us-west-2"]}
+    문자열 항목은 리전 이름 (같은 model ID를 그 리전에서 호출)입니다.
+    
+    Args:
+        raw: JSON 문자열, dict 또는 None
+    
+    Returns:
+        {model ID 또는 "*": [{"region": ..., "model_id": ... 또는 None}]} (순서 유지)
+    """
+    if not raw:
+        return {}
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except json.JSONDecodeError as e:
+            print(f"⚠️  BEDROCK_MODEL_REGIONS JSON 파싱 실패: {str(e)}")
+            return {}
+    if not isinstance(raw, dict):
+        print(f"⚠️  BEDROCK_MODEL_REGIONS는 객체여야 합니다: {type(raw).__name__}")
+        return {}
+    
+    result = {}
+    for model_id, entries in raw.items():
+        if isinstance(entries, (str, dict)):
+            entries = [entries]
+        targets = []
+        for entry in entries or []:
+            if isinstance(entry, str) and entry.strip():
+                targets.append({"region": entry.strip(), "model_id": None})
+            elif isinstance(entry, dict) and entry.get("region"):
+                target_model = entry.get("model_id") or entry.get("profile")
+                targets.append({
+                    "region": str(entry["region"]).strip(),
+                    "model_id": normalize_model_id(str(target_model)) if target_model else None,
+                })
+            else:
+                print(f"⚠️  BEDROCK_MODEL_REGIONS 항목 무시 ({model_id}): {entry}")
+        if targets:
+            result[normalize_model_id(str(model_id))] = targets
+    return result
+
+
+def parse_route_models(raw) -> dict:
+    """
+    라우트별 모델 테이블을 파싱합니다.
+    
+    Secret 또는 환경변수의 BEDROCK_ROUTE_MODELS 값을 받습니다.
+    예: {"routing": "anthropic.claude-haiku-4-5-20251001-v1:0", "answer": "..."}
+    
+    Args:
+        raw: JSON 문자열, dict 또는 None
+    
+    Returns:
+        {route: model_id} 딕셔너리 (빈 값은 제외)
+    """
+    if not raw:
+        return {}
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except json.JSONDecodeError as e:
+            print(f"⚠️  BEDROCK_ROUTE_MODELS JSON 파싱 실패: {str(e)}")
+            return {}
+    if not isinstance(raw, dict):
+        print(f"⚠️  BEDROCK_ROUTE_MODELS는 객체여야 합니다: {type(raw).__name__}")
+        return {}
+    return {
+        str(route): normalize_model_id(str(model_id).strip())
+        for route, model_id in raw.items()
+        if model_id and str(model_id).strip()
+    }
+
+
+def parse_fallback_models(raw) -> dict:
+    """
+    모델별 fallback 모델 테이블을 파싱합니다.
+    
+    Secret 또는 환경변수의 BEDROCK_FALLBACK_MODELS 값을 받습니다.
+    circuit이 열려 있거나 모든 리전에서 실패하면 같은 요청을 fallback 모델로 보냅니다.
+    예: {"anthropic.claude-sonnet-4-5-20250929-v1:0": "anthropic.claude-haiku-4-5-20251001-v1:0"}
+    
+    Args:
+        raw: JSON 문자열, dict 또는 None
+    
+    Returns:
+        {model_id: fallback_model_id} 딕셔너리 (빈 값은 제외)
+    """
+    if not raw:
+        return {}
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except json.JSONDecodeError as e:
+            print(f"⚠️  BEDROCK_FALLBACK_MODELS JSON 파싱 실패: {str(e)}")
+            return {}
+    if not isinstance(raw, dict):
+        print(f"⚠️  BEDROCK_FALLBACK_MODELS는 객체여야 합니다: {type(raw).__name__}")
+        return {}
+    return {
+        normalize_model_id(str(model_id)): normalize_model_id(str(fallback))
+        for model_id, fallback in raw.items()
+        if fallback and str(fallback).strip()
+    }
+
+
+_config_cache = None
+_config_lock = threading.Lock()
+
+
+def get_config(refresh: bool = False) -> dict:
     """
     애플리케이션 설정을 가져옵니다.
-    Secrets Manager에서 가져옵니다.
+    프로세스당 한 번만 Secrets Manager를 호출하고 이후에는 캐시된 값을 반환합니다.
+    
+    Args:
+        refresh: True면 캐시를 무시하고 Secrets Manager에서 다시 가져옵니다
+    
+    Returns:
+        설정 딕셔너리
+    """
+    global _config_cache
+    if _config_cache is not None and not refresh:
+        return _config_cache
+    
+    with _config_lock:
+        if _config_cache is None or refresh:
+            _config_cache = _load_config()
+        return _config_cache
+
+
+def _load_config() -> dict:
+    """
+    Secrets Manager에서 애플리케이션 설정을 가져옵니다.
     
     Returns:
         설정 딕셔너리
@@ -128,25 +307,29 @@ def get_config() -> dict:
         if 'AWS_REGION' not in config or not config['AWS_REGION']:
             config['AWS_REGION'] = region_name
         
-        # Model ID에서 'us.' 접두사 제거 (cross-region inference profile 형식 정규화)
+        # Model ID 정규화 (cross-region inference profile ID / ARN은 그대로 유지)
         model_id_keys = ['BEDROCK_CLAUDE_MODEL_ID', 'BEDROCK_LLM_MODEL_ID', 'BEDROCK_MODEL_ARN']
         for key in model_id_keys:
             if key in config and config[key]:
                 original_value = config[key]
-                # ARN 형식이면 model ID만 추출
-                if original_value.startswith('arn:aws:bedrock:'):
-                    # arn:aws:bedrock:us-east-1:...:inference-profile/global.anthropic.claude-sonnet-4-5-20250929-v1:0
-                    # → anthropic.claude-sonnet-4-5-20250929-v1:0
-                    if '/global.' in original_value:
-                        config[key] = original_value.split('/global.')[-1]
-                        print(f"[Config] {key}: ARN에서 model ID 추출: {original_value} → {config[key]}")
-                    elif '/' in original_value:
-                        config[key] = original_value.split('/')[-1]
-                        print(f"[Config] {key}: ARN에서 model ID 추출: {original_value} → {config[key]}")
-                # us. 접두사 제거
-                elif config[key].startswith('us.'):
-                    config[key] = config[key].replace('us.', '', 1)
-                    print(f"[Config] {key}: 'us.' 접두사 제거: {original_value} → {config[key]}")
+                config[key] = normalize_model_id(original_value)
+                if config[key] != original_value:
+                    print(f"[Config] {key}: model ID 정규화: {original_value} → {config[key]}")
+        
+        # 라우트별 모델 테이블 (JSON 문자열 또는 dict)
+        config['BEDROCK_ROUTE_MODELS'] = parse_route_models(
+            config.get('BEDROCK_ROUTE_MODELS') or os.environ.get('BEDROCK_ROUTE_MODELS')
+        )
+        
+        # 모델별 리전 / inference profile failover 목록 (JSON 문자열 또는 dict)
+        config['BEDROCK_MODEL_REGIONS'] = parse_model_regions(
+            config.get('BEDROCK_MODEL_REGIONS') or os.environ.get('BEDROCK_MODEL_REGIONS')
+        )
+        
+        # 모델별 fallback 모델 (circuit open / 전체 리전 실패 시)
+        config['BEDROCK_FALLBACK_MODELS'] = parse_fallback_models(
+            config.get('BEDROCK_FALLBACK_MODELS') or os.environ.get('BEDROCK_FALLBACK_MODELS')
+        )
         
         # 누락된 키들에 대한 fallback 설정
         if 'BEDROCK_CLAUDE_MODEL_ID' not in config or not config['BEDROCK_CLAUDE_MODEL_ID']:
@@ -187,4 +370,7 @@ def get_config() -> dict:
             'BEDROCK_CLAUDE_MODEL_ID': os.environ.get('BEDROCK_CLAUDE_MODEL_ID', 'anthropic.claude-sonnet-4-5-20250929-v1:0'),
             'BEDROCK_NOVA_CANVAS_MODEL_ID': os.environ.get('BEDROCK_NOVA_CANVAS_MODEL_ID', 'amazon.nova-canvas-v1:0'),
             'BEDROCK_LLM_MODEL_ID': os.environ.get('BEDROCK_LLM_MODEL_ID', 'anthropic.claude-sonnet-4-20250514-v1:0'),
+            'BEDROCK_ROUTE_MODELS': parse_route_models(os.environ.get('BEDROCK_ROUTE_MODELS')),
+            'BEDROCK_MODEL_REGIONS': parse_model_regions(os.environ.get('BEDROCK_MODEL_REGIONS')),
+            'BEDROCK_FALLBACK_MODELS': parse_fallback_models(os.environ.get('BEDROCK_FALLBACK_MODELS')),
         }
@@ -0,0 +1,340 @@
+"""
+Span 기반 지연시간 추적
+/invocations 호출마다 trace를 만들고 라우팅, 하위 agent, boto3/httpx 호출을 span으로 기록합니다.
+
+    with start_trace("invocations", trace_id=header_trace_id):
+        with span("orchestrate", request_type=request_type):
+            ...
+
+- trace/span 컨텍스트는 contextvars로 전달되어 요청 단위로 분리됩니다.
+- boto3: instrument_boto3(session 또는 client)로 API 호출마다 span 생성
+- httpx: trace_event_hooks()로 span 생성 + traceparent / X-Trace-Id 헤더 전파
+- exporter: TRACE_EXPORTER=none | console | file (TRACE_FILE 경로), set_exporter로 교체 가능
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = "X-Trace-Id"
+
+
+@dataclass
+class Span:
+    """하나의 작업 구간"""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_time: float = field(default_factory=time.time)
+    duration_ms: Optional[float] = None
+    status: str = "ok"
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    _start: float = field(default_factory=time.perf_counter, repr=False)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if self.duration_ms is not None:
+            return
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 3)
+        if error is not None:
+            self.status = "error"
+            self.error = f"{type(error).__name__}: {error}"
+        _on_span_finished(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("_start", None)
+        return data
+
+
+# ============================================================================
+# Exporters
+# ============================================================================
+
+class SpanExporter:
+    """완료된 trace의 span 목록을 내보내는 인터페이스"""
+
+    def export(self, spans: List[Span]) -> None:
+        raise NotImplementedError
+
+
+class NoopExporter(SpanExporter):
+    def export(self, spans: List[Span]) -> None:
+        pass
+
+
+class ConsoleExporter(SpanExporter):
+    """trace 요약(span별 소요 시간)을 로그로 출력합니다."""
+
+    def export(self, spans: List[Span]) -> None:
+        if not spans:
+            return
+        summary = ", ".join(f"{s.name}={s.duration_ms:.1f}ms" for s in spans)
+        logger.info("[Trace] %s %s", spans[0].trace_id, summary)
+
+
+class FileExporter(SpanExporter):
+    """span을 JSON Lines 파일에 추가합니다 (오프라인 분석용)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        lines = "".join(json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n" for s in spans)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+
+EXPORTERS: Dict[str, Callable[[], SpanExporter]] = {
+    "none": NoopExporter,
+    "console": ConsoleExporter,
+    "file": lambda: FileExporter(os.environ.get("TRACE_FILE", "/tmp/traces.jsonl")),
+}
+
+_exporter: SpanExporter = EXPORTERS.get(os.environ.get("TRACE_EXPORTER", "none"), NoopExporter)()
+
+
+def set_exporter(exporter: SpanExporter) -> None:
+    """exporter를 교체합니다 (예: 테스트, OTLP 연동)."""
+    global _exporter
+    _exporter = exporter
+
+
+# ============================================================================
+# Context
+# ============================================================================
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+# trace_id → 완료된 span 목록 (root span이 끝나면 한 번에 export)
+_pending: Dict[str, List[Span]] = {}
+_roots: Dict[str, str] = {}
+_pending_lock = threading.Lock()
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+_span_listeners: List[Callable[[Span], None]] = []
+
+
+def add_span_listener(listener: Callable[[Span], None]) -> None:
+    """span이 끝날 때마다 호출할 함수를 등록합니다 (예: 지연시간 메트릭)."""
+    _span_listeners.append(listener)
+
+
+def _on_span_finished(s: Span) -> None:
+    for listener in _span_listeners:
+        try:
+            listener(s)
+        except Exception as e:
+            logger.debug("[Trace] span listener 실패: %s", e)
+
+    with _pending_lock:
+        root_id = _roots.get(s.trace_id)
+        if root_id is None:
+            # root가 이미 export된 뒤 끝난 span (백그라운드 작업 등)은 쌓지 않고 바로 export
+            spans = [s]
+        else:
+            spans = _pending.setdefault(s.trace_id, [])
+            spans.append(s)
+            if root_id != s.span_id:
+                return
+            _roots.pop(s.trace_id, None)
+            spans = _pending.pop(s.trace_id)
+    try:
+        _exporter.export(sorted(spans, key=lambda x: x.start_time))
+    except Exception as e:
+        logger.warning("[Trace] export 실패: %s", e)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    s = _current_span.get()
+    return s.trace_id if s else None
+
+
+def open_span(name: str, **attributes) -> Span:
+    """
+    현재 span의 자식 span을 만들되 현재 컨텍스트로 설정하지는 않습니다.
+    boto3/httpx hook처럼 시작과 종료가 다른 콜백에서 일어나는 경우에 사용합니다.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        s = Span(name=name, trace_id=uuid.uuid4().hex, span_id=_new_id(), attributes=attributes)
+        with _pending_lock:
+            _roots[s.trace_id] = s.span_id
+        return s
+    return Span(name=name, trace_id=parent.trace_id, span_id=_new_id(), parent_id=parent.span_id, attributes=attributes)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    with 블록을 span으로 기록합니다. 진행 중인 trace가 없으면 새 trace를 시작합니다.
+
+    Example:
+        with span("subagent.answer", user_id=user_id) as s:
+            s.set_attribute("tool_results", 2)
+    """
+    s = open_span(name, **attributes)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.finish(e)
+        raise
+    else:
+        s.finish()
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def start_trace(name: str, trace_id: Optional[str] = None, **attributes):
+    """
+    새 trace의 root span을 시작합니다 (요청 진입점용).
+
+    Args:
+        name: root span 이름
+        trace_id: 호출자가 전달한 trace id (없으면 새로 생성)
+    """
+    s = Span(name=name, trace_id=trace_id or uuid.uuid4().hex, span_id=_new_id(), attributes=attributes)
+    with _pending_lock:
+        _roots[s.trace_id] = s.span_id
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.finish(e)
+        raise
+    else:
+        s.finish()
+    finally:
+        _current_span.reset(token)
+
+
+def trace_id_from_headers(headers) -> Optional[str]:
+    """X-Trace-Id 또는 W3C traceparent 헤더에서 trace id를 읽습니다."""
+    trace_id = headers.get(TRACE_HEADER.lower()) or headers.get(TRACE_HEADER)
+    if trace_id:
+        return trace_id
+    traceparent = headers.get("traceparent")
+    if traceparent:
+        parts = traceparent.split("-")
+        if len(parts) >= 3:
+            return parts[1]
+    return None
+
+
+def propagation_headers() -> Dict[str, str]:
+    """외부 호출에 붙일 trace 헤더를 반환합니다."""
+    s = _current_span.get()
+    if s is None:
+        return {}
+    trace_id = s.trace_id if len(s.trace_id) == 32 else uuid.uuid5(uuid.NAMESPACE_OID, s.trace_id).hex
+    return {
+        TRACE_HEADER: s.trace_id,
+        "traceparent": f"00-{trace_id}-{s.span_id}-01",
+    }
+
+
+# ============================================================================
+# boto3 / httpx 계측
+# ============================================================================
+
+def _boto_before_call(model, params, context, **kwargs):
+    attributes = {"service": model.service_model.service_name, "operation": model.name}
+    if isinstance(params, dict) and params.get("modelId"):
+        attributes["model_id"] = params["modelId"]
+    context["trace_span"] = open_span(f"aws.{attributes['service']}.{model.name}", **attributes)
+
+
+def _boto_after_call(context, http_response=None, **kwargs):
+    s = context.pop("trace_span", None)
+    if s is not None:
+        status = getattr(http_response, "status_code", None)
+        s.set_attribute("status_code", status)
+        if status is not None and status >= 400:
+            s.status = "error"
+        s.finish()
+
+
+def _boto_after_call_error(context, exception=None, **kwargs):
+    s = context.pop("trace_span", None)
+    if s is not None:
+        s.finish(exception)
+
+
+def instrument_boto3(target=None) -> None:
+    """
+    boto3 session 또는 client의 모든 API 호출을 span으로 기록합니다.
+
+    Args:
+        target: boto3 client, boto3.Session 또는 None (None이면 boto3 기본 session;
+                기본 session으로 이후 생성되는 client에 적용)
+    """
+    if target is None:
+        import boto3
+
+        if boto3.DEFAULT_SESSION is None:
+            boto3.setup_default_session()
+        target = boto3.DEFAULT_SESSION
+
+    events = target.meta.events if hasattr(target, "meta") else target.events
+    events.register("before-call", _boto_before_call, unique_id="trace-before-call")
+    events.register("after-call", _boto_after_call, unique_id="trace-after-call")
+    events.register("after-call-error", _boto_after_call_error, unique_id="trace-after-call-error")
+
+
+def _httpx_request_hook(request):
+    request.headers.update(propagation_headers())
+    request.extensions["trace_span"] = open_span(
+        "http.request", method=request.method, url=str(request.url.copy_with(query=None))
+    )
+
+
+def _httpx_response_hook(response):
+    s = response.request.extensions.pop("trace_span", None)
+    if s is not None:
+        s.set_attribute("status_code", response.status_code)
+        if response.status_code >= 400:
+            s.status = "error"
+        s.finish()
+
+
+async def _httpx_request_hook_async(request):
+    _httpx_request_hook(request)
+
+
+async def _httpx_response_hook_async(response):
+    _httpx_response_hook(response)
+
+
+def trace_event_hooks(async_hooks: bool = False) -> Dict[str, List[Callable]]:
+    """
+    httpx.Client(event_hooks=...)에 전달할 trace hook을 반환합니다.
+    httpx.AsyncClient에는 async_hooks=True (AsyncClient는 coroutine hook만 지원)
+    """
+    if async_hooks:
+        return {"request": [_httpx_request_hook_async], "response": [_httpx_response_hook_async]}
+    return {"request": [_httpx_request_hook], "response": [_httpx_response_hook]}
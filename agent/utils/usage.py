@@ -0,0 +1,353 @@
+"""
+모델 토큰 사용량 / 비용 집계
+Strands Agent와 직접 invoke_model 호출의 usage를 공통 형식으로 정규화하고
+라우트/모델별, 사용자별, 요청별로 누적합니다.
+prompt caching의 cache read/write 토큰과 Nova Canvas 이미지 생성 수도 함께 기록합니다.
+
+요청 단위 집계는 track_request_usage()의 with 블록 안에서 기록된 usage를 모읍니다.
+
+    with track_request_usage(user_id=user_id) as request_usage:
+        result = orchestrate_request(...)
+    request_usage.totals()  # {input_tokens, ..., images, cost_usd}
+
+비용은 MODEL_PRICES 기준 추정치이며 BEDROCK_PRICING(JSON)으로 덮어쓸 수 있습니다.
+"""
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from .metrics import Counter, register_collector
+
+logger = logging.getLogger(__name__)
+
+# 공통 usage 키
+USAGE_KEYS = ("input_tokens", "output_tokens", "cache_read_tokens", "cache_write_tokens")
+
+# Strands(Bedrock Converse) / Anthropic Messages API 키 → 공통 키
+_KEY_ALIASES = {
+    "inputTokens": "input_tokens",
+    "outputTokens": "output_tokens",
+    "cacheReadInputTokens": "cache_read_tokens",
+    "cacheWriteInputTokens": "cache_write_tokens",
+    "input_tokens": "input_tokens",
+    "output_tokens": "output_tokens",
+    "cache_read_input_tokens": "cache_read_tokens",
+    "cache_creation_input_tokens": "cache_write_tokens",
+}
+
+# 모델별 단가 (USD, 1M 토큰당 input / output) - model ID 부분 문자열로 매칭
+# cache read는 input의 10%, cache write는 input의 125%로 계산
+MODEL_PRICES = {
+    "claude-opus-4": (15.0, 75.0),
+    "claude-sonnet-4": (3.0, 15.0),
+    "claude-3-7-sonnet": (3.0, 15.0),
+    "claude-haiku-4-5": (1.0, 5.0),
+    "claude-3-5-haiku": (0.8, 4.0),
+    "amazon.nova-pro": (0.8, 3.2),
+    "amazon.nova-lite": (0.06, 0.24),
+    "amazon.nova-micro": (0.035, 0.14),
+}
+# Strands 기본 모델(model ID 없음)에 적용할 단가
+DEFAULT_MODEL_PRICE = MODEL_PRICES["claude-sonnet-4"]
+CACHE_READ_RATE = 0.1
+CACHE_WRITE_RATE = 1.25
+
+# 이미지 1장당 단가 (USD) - Nova Canvas standard, 1024x1024 초과 해상도
+IMAGE_PRICES = {
+    "amazon.nova-canvas": 0.06,
+}
+# 1024x1024 이하 해상도 단가 (Nova Canvas는 해상도 구간별 과금 - 미리보기 티어)
+SMALL_IMAGE_PRICES = {
+    "amazon.nova-canvas": 0.04,
+}
+SMALL_IMAGE_MAX_PIXELS = 1024 * 1024
+
+# 사용자별 누적을 보관할 최대 사용자 수 (넘으면 가장 오래 요청이 없던 사용자부터 정리)
+USAGE_USER_STATS_MAX = int(os.environ.get("USAGE_USER_STATS_MAX", "10000"))
+# /metrics에 내보낼 사용자 수 (추정 비용 상위, label 수 제한)
+USAGE_TOP_USERS = int(os.environ.get("USAGE_TOP_USERS", "20"))
+
+_stats: Dict[tuple, Dict[str, int]] = {}
+_user_stats: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+_stats_lock = threading.Lock()
+
+TOKENS = Counter("agent_tokens_total", "Model tokens by route, model id and kind", ("route", "model_id", "kind"))
+IMAGES = Counter("agent_images_generated_total", "Generated images by route and model id", ("route", "model_id"))
+COST = Counter("agent_cost_usd_total", "Estimated model cost in USD by route", ("route",))
+
+
+def _load_price_overrides() -> None:
+    """BEDROCK_PRICING 환경변수로 단가를 덮어씁니다.
+
+    예: {"claude-sonnet-4": [3.0, 15.0], "amazon.nova-canvas": 0.04}
+    """
+    raw = os.environ.get("BEDROCK_PRICING")
+    if not raw:
+        return
+    try:
+        for key, value in json.loads(raw).items():
+            if isinstance(value, (list, tuple)):
+                MODEL_PRICES[key] = (float(value[0]), float(value[1]))
+            else:
+                IMAGE_PRICES[key] = float(value)
+    except Exception as e:
+        logger.warning("[Usage] BEDROCK_PRICING 파싱 실패: %s", e)
+
+
+_load_price_overrides()
+
+
+def estimate_cost(model_id: Optional[str], usage: Dict[str, int]) -> float:
+    """
+    usage의 추정 비용(USD)을 계산합니다.
+
+    Args:
+        model_id: 사용한 model ID (None이면 Strands 기본 모델 단가)
+        usage: normalize_usage 형식의 usage
+
+    Returns:
+        추정 비용 (단가를 모르는 모델이면 0.0)
+    """
+    price = DEFAULT_MODEL_PRICE if not model_id else next(
+        (value for name, value in MODEL_PRICES.items() if name in model_id), None
+    )
+    if price is None:
+        return 0.0
+    input_price, output_price = price
+    total = (
+        usage.get("input_tokens", 0) * input_price
+        + usage.get("cache_read_tokens", 0) * input_price * CACHE_READ_RATE
+        + usage.get("cache_write_tokens", 0) * input_price * CACHE_WRITE_RATE
+        + usage.get("output_tokens", 0) * output_price
+    )
+    return total / 1_000_000
+
+
+def estimate_image_cost(model_id: Optional[str], count: int, pixels: Optional[int] = None) -> float:
+    """이미지 생성 추정 비용(USD)을 계산합니다. pixels(width * height)가 작으면 저해상도 단가를 적용합니다."""
+    prices = SMALL_IMAGE_PRICES if pixels is not None and pixels <= SMALL_IMAGE_MAX_PIXELS else {}
+    price = next((value for name, value in prices.items() if name in (model_id or "")), None)
+    if price is None:
+        price = next((value for name, value in IMAGE_PRICES.items() if name in (model_id or "")), 0.0)
+    return price * count
+
+
+# ============================================================================
+# 요청 단위 집계
+# ============================================================================
+
+class RequestUsage:
+    """한 요청 동안 기록된 usage (하위 agent 스레드에서도 기록되므로 lock 사용)"""
+
+    def __init__(self, user_id: Optional[str] = None):
+        self.user_id = user_id
+        self.routes: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, route: str, usage: Dict[str, int], images: int = 0, cost: float = 0.0) -> None:
+        with self._lock:
+            stats = self.routes.setdefault(route, {**{k: 0 for k in USAGE_KEYS}, "images": 0, "cost_usd": 0.0})
+            for k in USAGE_KEYS:
+                stats[k] += usage.get(k, 0)
+            stats["images"] += images
+            stats["cost_usd"] += cost
+
+    def totals(self) -> Dict[str, Any]:
+        """요청 전체 합계와 라우트별 내역을 반환합니다 (응답 envelope용)."""
+        with self._lock:
+            routes = {route: dict(stats) for route, stats in self.routes.items()}
+        totals: Dict[str, Any] = {**{k: 0 for k in USAGE_KEYS}, "images": 0, "cost_usd": 0.0}
+        for stats in routes.values():
+            for k in totals:
+                totals[k] += stats[k]
+            stats["cost_usd"] = round(stats["cost_usd"], 6)
+        totals["cost_usd"] = round(totals["cost_usd"], 6)
+        totals["routes"] = routes
+        return totals
+
+
+_request_usage: ContextVar[Optional[RequestUsage]] = ContextVar("request_usage", default=None)
+
+
+@contextmanager
+def track_request_usage(user_id: Optional[str] = None):
+    """
+    with 블록 안에서 기록된 usage를 요청 단위로 모으고, 끝나면 사용자별 누적에 더합니다.
+
+    Args:
+        user_id: 요청 사용자 ID (없으면 "anonymous")
+    """
+    request_usage = RequestUsage(user_id)
+    token = _request_usage.set(request_usage)
+    try:
+        yield request_usage
+    finally:
+        _request_usage.reset(token)
+        totals = request_usage.totals()
+        key = user_id or "anonymous"
+        with _stats_lock:
+            stats = _user_stats.setdefault(
+                key, {"requests": 0, **{k: 0 for k in USAGE_KEYS}, "images": 0, "cost_usd": 0.0}
+            )
+            _user_stats.move_to_end(key)
+            stats["requests"] += 1
+            for k in USAGE_KEYS + ("images", "cost_usd"):
+                stats[k] += totals[k]
+            while len(_user_stats) > USAGE_USER_STATS_MAX:
+                _user_stats.popitem(last=False)
+
+
+def normalize_usage(raw: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    usage 딕셔너리를 공통 형식으로 변환합니다.
+
+    Args:
+        raw: Strands accumulated_usage 또는 Anthropic 응답의 usage
+
+    Returns:
+        {input_tokens, output_tokens, cache_read_tokens, cache_write_tokens}
+    """
+    usage = {key: 0 for key in USAGE_KEYS}
+    for key, value in (raw or {}).items():
+        target = _KEY_ALIASES.get(key)
+        if target and isinstance(value, (int, float)):
+            usage[target] += int(value)
+    return usage
+
+
+def agent_usage(agent) -> Dict[str, int]:
+    """
+    Strands Agent가 지금까지 누적한 usage를 반환합니다.
+    agent는 요청마다 새로 만들므로 한 번의 호출분입니다.
+    """
+    metrics = getattr(agent, "event_loop_metrics", None)
+    return normalize_usage(getattr(metrics, "accumulated_usage", None))
+
+
+def record_usage(route: str, model_id: Optional[str], usage: Dict[str, int]) -> None:
+    """
+    라우트/모델별 usage를 누적하고 cache read/write 토큰을 로그로 남깁니다.
+
+    Args:
+        route: 라우트 이름 (utils.model_routing.ROUTES)
+        model_id: 사용한 model ID
+        usage: normalize_usage 형식의 usage
+    """
+    key = (route, model_id or "default")
+    cost = estimate_cost(model_id, usage)
+    with _stats_lock:
+        stats = _stats.setdefault(key, _new_stats())
+        stats["calls"] += 1
+        for k in USAGE_KEYS:
+            stats[k] += usage.get(k, 0)
+        stats["cost_usd"] += cost
+
+    for k in USAGE_KEYS:
+        if usage.get(k):
+            TOKENS.inc(usage[k], route=route, model_id=key[1], kind=k[: -len("_tokens")])
+    COST.inc(cost, route=route)
+
+    request_usage = _request_usage.get()
+    if request_usage is not None:
+        request_usage.add(route, usage, cost=cost)
+
+    logger.info(
+        "[Usage] %s (%s) input=%d output=%d cache_read=%d cache_write=%d cost=$%.6f",
+        route,
+        model_id or "default",
+        usage.get("input_tokens", 0),
+        usage.get("output_tokens", 0),
+        usage.get("cache_read_tokens", 0),
+        usage.get("cache_write_tokens", 0),
+        cost,
+    )
+
+
+def record_images(route: str, model_id: Optional[str], count: int, pixels: Optional[int] = None) -> None:
+    """
+    이미지 생성 수를 기록합니다 (Nova Canvas는 토큰이 아닌 이미지 단위 과금).
+
+    Args:
+        route: 라우트 이름
+        model_id: 이미지 모델 ID
+        count: 생성된 이미지 수
+        pixels: 이미지 해상도 (width * height, 해상도별 단가 적용)
+    """
+    key = (route, model_id or "default")
+    cost = estimate_image_cost(model_id, count, pixels)
+    with _stats_lock:
+        stats = _stats.setdefault(key, _new_stats())
+        stats["calls"] += 1
+        stats["images"] += count
+        stats["cost_usd"] += cost
+
+    IMAGES.inc(count, route=route, model_id=key[1])
+    COST.inc(cost, route=route)
+
+    request_usage = _request_usage.get()
+    if request_usage is not None:
+        request_usage.add(route, {}, images=count, cost=cost)
+
+    logger.info("[Usage] %s (%s) images=%d cost=$%.6f", route, key[1], count, cost)
+
+
+def _new_stats() -> Dict[str, Any]:
+    return {"calls": 0, **{k: 0 for k in USAGE_KEYS}, "images": 0, "cost_usd": 0.0}
+
+
+def get_usage_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    라우트/모델별 누적 usage와 cache 적중률을 반환합니다.
+
+    Returns:
+        {"<route>:<model_id>": {calls, input_tokens, output_tokens, cache_read_tokens,
+                                 cache_write_tokens, images, cost_usd, cache_hit_ratio}}
+    """
+    with _stats_lock:
+        snapshot = {key: dict(stats) for key, stats in _stats.items()}
+
+    result = {}
+    for (route, model_id), stats in snapshot.items():
+        prompt_tokens = stats["input_tokens"] + stats["cache_read_tokens"] + stats["cache_write_tokens"]
+        stats["cache_hit_ratio"] = round(stats["cache_read_tokens"] / prompt_tokens, 4) if prompt_tokens else 0.0
+        stats["cost_usd"] = round(stats["cost_usd"], 6)
+        result[f"{route}:{model_id}"] = {"route": route, "model_id": model_id, **stats}
+    return result
+
+
+def get_user_usage_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    사용자별 누적 usage와 추정 비용을 반환합니다 (최근 요청한 USAGE_USER_STATS_MAX명).
+    /metrics에는 label 수를 제한하기 위해 추정 비용 상위 USAGE_TOP_USERS명만 내보냅니다.
+
+    Returns:
+        {user_id: {requests, input_tokens, output_tokens, cache_read_tokens,
+                   cache_write_tokens, images, cost_usd}}
+    """
+    with _stats_lock:
+        snapshot = {user_id: dict(stats) for user_id, stats in _user_stats.items()}
+    for stats in snapshot.values():
+        stats["cost_usd"] = round(stats["cost_usd"], 6)
+    return snapshot
+
+
+def _user_usage_collector():
+    users = sorted(get_user_usage_stats().items(), key=lambda item: item[1]["cost_usd"], reverse=True)
+    for user_id, stats in users[:USAGE_TOP_USERS]:
+        labels = {"user_id": user_id}
+        yield ("agent_user_requests", "gauge", "Requests of the top users by estimated cost", labels, stats["requests"])
+        yield ("agent_user_cost_usd", "gauge", "Estimated model cost in USD of the top users", labels, stats["cost_usd"])
+        for k in ("input_tokens", "output_tokens"):
+            yield (
+                "agent_user_tokens", "gauge", "Model tokens of the top users by estimated cost",
+                {**labels, "kind": k[: -len("_tokens")]}, stats[k],
+            )
+        yield ("agent_user_images", "gauge", "Generated images of the top users by estimated cost", labels, stats["images"])
+
+
+register_collector(_user_usage_collector)
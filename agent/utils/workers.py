@@ -0,0 +1,16 @@
+"""
+서버 워커 수 (SERVER_WORKERS)
+gunicorn_conf.py(워커 수), server.py(멀티 워커 모드 전환), 워커끼리 상태를 공유하는 모듈
+(fairness, idempotency)이 같은 값을 사용합니다.
+
+환경변수:
+    SERVER_WORKERS          워커 수 (auto = vCPU 수, 기본 1)
+"""
+import os
+
+
+def get_worker_count() -> int:
+    value = os.environ.get("SERVER_WORKERS", "1").strip().lower()
+    if value == "auto":
+        return os.cpu_count() or 1
+    return max(1, int(value))
@@ -0,0 +1,286 @@
+"""
+S3 write-behind 업로드
+S3 키와 URL은 업로드 전에 이미 정해지므로 응답은 바로 돌려주고, 실제 업로드는
+백그라운드 스레드가 재시도하며 처리합니다.
+
+업로드할 본문은 먼저 로컬 spool 디렉터리에 기록(fsync)한 뒤 큐에 넣으므로
+프로세스가 죽어도 다음 시작 시 남은 항목을 이어서 업로드합니다.
+
+spool 항목 (S3 키의 sha1을 파일명으로 사용):
+    {id}.data   업로드할 본문 (업로드 성공 시 삭제, 실패 시 확인용으로 남김)
+    {id}.json   상태 {key, content_type, size, status, attempts, error, created_at, updated_at}
+    {id}.lock   업로드 중인 워커가 잡는 flock (멀티 워커 / 재시작 복구 시 중복 업로드 방지)
+
+status: pending → uploading → uploaded | failed
+uploaded 상태 파일은 status_ttl 동안 남겨 두어 다른 워커나 재시작 후에도 조회할 수 있습니다.
+"""
+import fcntl
+import glob
+import hashlib
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+from .metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_UPLOADING = "uploading"
+STATUS_UPLOADED = "uploaded"
+STATUS_FAILED = "failed"
+
+# status: queued / retry / uploaded / failed / recovered
+UPLOADS = Counter("agent_write_behind_uploads_total", "Write-behind S3 upload events by status", ("status",))
+
+_COPY_CHUNK = 1024 * 1024
+
+
+def _write_json_atomic(path: str, data: Dict[str, Any]) -> None:
+    tmp = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class WriteBehindUploader:
+    """
+    spool 디렉터리 기반 백그라운드 업로더
+
+    Args:
+        put: 업로드 함수 put(fileobj, key, content_type). 실패 시 예외를 던지면 재시도
+        spool_dir: spool 디렉터리
+        workers: 업로드 스레드 수
+        max_attempts: 항목당 최대 시도 횟수 (넘으면 failed)
+        backoff: 재시도 대기 기본값 (초, 시도마다 2배)
+        status_ttl: uploaded 상태 파일 보관 시간 (초)
+    """
+
+    def __init__(
+        self,
+        put: Callable[[BinaryIO, str, str], None],
+        spool_dir: str,
+        workers: int = 2,
+        max_attempts: int = 5,
+        backoff: float = 1.0,
+        status_ttl: float = 86400.0,
+    ):
+        self._put = put
+        self.spool_dir = spool_dir
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.status_ttl = status_ttl
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._start_lock = threading.Lock()
+        self._started = False
+
+    # ------------------------------------------------------------------
+    # 공개 API
+    # ------------------------------------------------------------------
+
+    def submit(
+        self,
+        key: str,
+        data: Optional[bytes] = None,
+        fileobj: Optional[BinaryIO] = None,
+        content_type: str = "image/png",
+    ) -> Dict[str, Any]:
+        """
+        본문을 spool에 기록하고 업로드 큐에 넣습니다 (업로드 완료를 기다리지 않음).
+        data(bytes) 또는 fileobj(청크 단위로 복사) 중 하나를 전달합니다.
+        """
+        self.start()
+        data_path, meta_path, _ = self._paths(key)
+
+        tmp = f"{data_path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            if data is not None:
+                f.write(data)
+            else:
+                shutil.copyfileobj(fileobj, f, _COPY_CHUNK)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        os.replace(tmp, data_path)
+
+        now = time.time()
+        meta = {
+            "key": key,
+            "content_type": content_type,
+            "size": size,
+            "status": STATUS_PENDING,
+            "attempts": 0,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        _write_json_atomic(meta_path, meta)
+        self._queue.put(key)
+        UPLOADS.inc(status="queued")
+        logger.debug("[WriteBehind] Queued: %s (%d bytes)", key, size)
+        return meta
+
+    def status(self, key: str) -> Optional[Dict[str, Any]]:
+        """업로드 상태 조회 (spool에 기록이 없으면 None)"""
+        return _read_json(self._paths(key)[1])
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        """spool 디렉터리를 만들고 남은 항목을 복구한 뒤 업로드 스레드를 시작합니다."""
+        if self._started:
+            return
+        with self._start_lock:
+            if self._started:
+                return
+            os.makedirs(self.spool_dir, exist_ok=True)
+            recovered = self.recover()
+            if recovered:
+                logger.info("[WriteBehind] Recovered %d pending uploads from %s", recovered, self.spool_dir)
+            for i in range(self.workers):
+                threading.Thread(target=self._run, name=f"write-behind-{i}", daemon=True).start()
+            self._started = True
+
+    def recover(self) -> int:
+        """이전 프로세스가 끝내지 못한 pending / uploading 항목을 다시 큐에 넣습니다."""
+        count = 0
+        for meta_path in glob.glob(os.path.join(self.spool_dir, "*.json")):
+            meta = _read_json(meta_path)
+            if not meta or meta.get("status") not in (STATUS_PENDING, STATUS_UPLOADING):
+                continue
+            data_path, _, lock_path = self._paths(meta["key"])
+            if not os.path.exists(data_path) or self._is_locked(lock_path):
+                continue
+            self._queue.put(meta["key"])
+            UPLOADS.inc(status="recovered")
+            count += 1
+        return count
+
+    # ------------------------------------------------------------------
+    # 내부 구현
+    # ------------------------------------------------------------------
+
+    def _paths(self, key: str):
+        base = os.path.join(self.spool_dir, hashlib.sha1(key.encode("utf-8")).hexdigest())
+        return f"{base}.data", f"{base}.json", f"{base}.lock"
+
+    @staticmethod
+    def _is_locked(lock_path: str) -> bool:
+        if not os.path.exists(lock_path):
+            return False
+        fd = os.open(lock_path, os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        finally:
+            os.close(fd)
+        return False
+
+    def _update(self, meta_path: str, meta: Dict[str, Any], **fields) -> Dict[str, Any]:
+        meta = {**meta, **fields, "updated_at": time.time()}
+        _write_json_atomic(meta_path, meta)
+        return meta
+
+    def _run(self) -> None:
+        while True:
+            try:
+                key = self._queue.get(timeout=60)
+            except queue.Empty:
+                self._cleanup()
+                continue
+            try:
+                self._process(key)
+            except Exception as e:
+                logger.exception("[WriteBehind] Unexpected error for %s: %s", key, e)
+
+    def _process(self, key: str) -> None:
+        data_path, meta_path, lock_path = self._paths(key)
+        lock_fd = os.open(lock_path, os.O_CREAT | os.O_RDWR)
+        try:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # 다른 워커가 이미 업로드 중
+                return
+
+            meta = _read_json(meta_path)
+            if not meta or meta.get("status") not in (STATUS_PENDING, STATUS_UPLOADING):
+                return
+
+            while meta["attempts"] < self.max_attempts:
+                meta = self._update(meta_path, meta, status=STATUS_UPLOADING, attempts=meta["attempts"] + 1)
+                try:
+                    with open(data_path, "rb") as f:
+                        self._put(f, key, meta["content_type"])
+                except Exception as e:
+                    meta = self._update(meta_path, meta, status=STATUS_PENDING, error=f"{type(e).__name__}: {e}")
+                    if meta["attempts"] >= self.max_attempts:
+                        break
+                    delay = self.backoff * (2 ** (meta["attempts"] - 1))
+                    logger.warning(
+                        "[WriteBehind] Upload failed (attempt %d/%d), retrying in %.1fs: %s: %s",
+                        meta["attempts"], self.max_attempts, delay, key, e
+                    )
+                    UPLOADS.inc(status="retry")
+                    time.sleep(delay)
+                    continue
+
+                self._update(meta_path, meta, status=STATUS_UPLOADED, error=None)
+                os.remove(data_path)
+                UPLOADS.inc(status="uploaded")
+                logger.info("[S3] Uploaded (write-behind): %s", key)
+                return
+
+            # 본문은 확인 / 수동 재시도용으로 spool에 남김
+            self._update(meta_path, meta, status=STATUS_FAILED)
+            UPLOADS.inc(status="failed")
+            logger.error("[WriteBehind] Upload failed after %d attempts: %s (%s)", meta["attempts"], key, meta["error"])
+        finally:
+            fcntl.flock(lock_fd, fcntl.LOCK_UN)
+            os.close(lock_fd)
+
+    def _cleanup(self) -> None:
+        """status_ttl이 지난 uploaded 상태 파일 정리"""
+        cutoff = time.time() - self.status_ttl
+        for meta_path in glob.glob(os.path.join(self.spool_dir, "*.json")):
+            meta = _read_json(meta_path)
+            if not meta or meta.get("status") != STATUS_UPLOADED or meta.get("updated_at", 0) > cutoff:
+                continue
+            for path in (meta_path, meta_path[:-len(".json")] + ".lock"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def queue_depth_collector(get_uploader: Callable[[], Optional[WriteBehindUploader]]):
+    """업로드 큐 길이를 /metrics로 내보내는 collector"""
+
+    def collect():
+        uploader = get_uploader()
+        if uploader is None:
+            return []
+        return [(
+            "agent_write_behind_queue_depth", "gauge", "Write-behind uploads waiting for a worker",
+            {}, uploader.queue_depth(),
+        )]
+
+    return collect
@@ -0,0 +1,424 @@
+"""
+일괄 재처리(backfill) CLI
+가져온 사용자의 온보딩이나 프롬프트 변경 후, manifest에 적힌 사용자 / 날짜 / 작업(일기, 이미지, 리포트)을
+서버를 거치지 않고 이 프로세스에서 orchestrator로 직접 실행합니다.
+
+- 동시 실행 수(--concurrency)와 초당 시작 수(--rate)를 제한합니다.
+- 끝난 작업은 checkpoint 파일(JSON Lines)에 한 줄씩 기록하고, 다시 실행하면 기록된 작업을 건너뛰고 이어서 처리합니다.
+  (중단 시점에 실행 중이던 작업은 다시 실행되고, 실패로 기록된 작업은 --retry-failed로 다시 실행합니다)
+- 진행 중에는 --report-interval마다, 끝나면 전체 처리량 / 작업별 지연시간 / 토큰 사용량을 출력합니다.
+
+manifest 한 줄 형식 (JSON Lines):
+    {"user_id": "u1", "operation": "diary", "date": "2024-01-15", "content": "카페, 독서, 산책"}
+    {"user_id": "u1", "operation": "image", "date": "2024-01-15", "text": "오늘은 조용한 카페에서..."}
+    {"user_id": "u1", "operation": "report", "start_date": "2024-01-08", "end_date": "2024-01-14"}
+    {"user_ids": ["u1", "u2"], "operations": ["report"], "dates": ["2024-01-14", "2024-01-21"]}
+- user_id / user_ids, operation / operations, date / dates는 조합으로 펼쳐집니다.
+- report에 start_date가 없으면 date를 종료일로 하는 7일 구간을 만듭니다.
+- image는 미리보기가 아니라 최종 해상도로 렌더링해 히스토리(S3)에 저장합니다. seed / prompt가 없으면
+  text(일기 본문)로 프롬프트를 만들고 새 seed를 정해 렌더링합니다 (Claude 없이 만든 fallback 프롬프트는 실패로 재시도).
+- content, text, temperature, prompt, seed 등 나머지 필드는 /invocations 본문과 같은 의미로 그대로 전달됩니다.
+
+사용법:
+    python backfill.py manifest.jsonl --concurrency 4 --rate 1
+    python backfill.py manifest.jsonl --checkpoint runs/backfill.ckpt.jsonl --only diary,image --json summary.json
+    python backfill.py manifest.jsonl --dry-run
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# operation → request_type, 입력 문장이 없을 때 기본값
+OPERATIONS = {
+    "diary": ("summarize", None),
+    "image": ("image", "이미지 생성해줘"),
+    "report": ("report", "{start_date}부터 {end_date}까지 주간 리포트 만들어줘"),
+}
+
+# manifest에서 /invocations 본문으로 그대로 넘기는 필드 (server.py와 동일한 이름)
+PAYLOAD_FIELDS = ("content", "current_date", "temperature", "text", "image_base64", "prompt", "seed")
+
+
+def _as_list(entry: Dict[str, Any], single: str, plural: str) -> List[Any]:
+    values = entry.get(plural)
+    if values is None:
+        values = [entry.get(single)] if entry.get(single) is not None else []
+    return list(values)
+
+
+def _has_preview(payload: Dict[str, Any]) -> bool:
+    # seed / prompt가 있으면 orchestrator가 agent 추론 없이 최종 해상도로 렌더링해 히스토리에 저장
+    return payload.get("seed") is not None and bool(payload.get("prompt"))
+
+
+def _task_from(entry: Dict[str, Any], user_id: str, operation: str, date: Optional[str]) -> Dict[str, Any]:
+    if operation not in OPERATIONS:
+        raise ValueError(f"알 수 없는 operation: {operation} (가능: {', '.join(OPERATIONS)})")
+    request_type, default_input = OPERATIONS[operation]
+    payload = {field: entry[field] for field in PAYLOAD_FIELDS if entry.get(field) is not None}
+    payload.update(user_id=user_id, request_type=request_type)
+
+    if operation == "report":
+        end_date = entry.get("end_date") or date
+        start_date = entry.get("start_date")
+        if not end_date:
+            raise ValueError("report에는 date 또는 end_date가 필요합니다.")
+        if not start_date:
+            end = datetime.date.fromisoformat(end_date)
+            start_date = (end - datetime.timedelta(days=6)).isoformat()
+        payload.setdefault("content", default_input.format(start_date=start_date, end_date=end_date))
+        key = f"{start_date}~{end_date}"
+    else:
+        if not date:
+            raise ValueError(f"{operation}에는 date가 필요합니다.")
+        payload["record_date"] = date
+        if default_input:
+            payload.setdefault("content", default_input)
+        if operation == "image" and not payload.get("text") and not _has_preview(payload):
+            raise ValueError("image에는 text(일기 본문) 또는 seed와 prompt가 필요합니다.")
+        key = date
+    if not payload.get("content"):
+        raise ValueError(f"{operation}에는 content가 필요합니다.")
+    return {"id": f"{operation}:{user_id}:{key}", "operation": operation, "payload": payload}
+
+
+def load_manifest(path: str, only: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+    """manifest를 읽어 작업 목록으로 펼칩니다 (같은 작업 id는 처음 것만 사용)."""
+    tasks: Dict[str, Dict[str, Any]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                entry = json.loads(line)
+                users = _as_list(entry, "user_id", "user_ids")
+                operations = _as_list(entry, "operation", "operations")
+                dates = _as_list(entry, "date", "dates") or [None]
+                if not users or not operations:
+                    raise ValueError("user_id와 operation이 필요합니다.")
+                for user_id, operation, date in itertools.product(users, operations, dates):
+                    if only and operation not in only:
+                        continue
+                    task = _task_from(entry, str(user_id), operation, date)
+                    tasks.setdefault(task["id"], task)
+            except (ValueError, TypeError, AttributeError) as e:
+                raise ValueError(f"{path}:{line_no}: {e}") from e
+    return list(tasks.values())
+
+
+def load_checkpoint(path: str) -> Dict[str, Dict[str, Any]]:
+    """checkpoint에서 작업 id별 마지막 기록을 읽습니다 (파일이 없으면 빈 딕셔너리)."""
+    records: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # 중단 시점에 쓰다 만 마지막 줄
+                continue
+            records[record["id"]] = record
+    return records
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Progress:
+    """처리량 / 작업별 지연시간 / 사용량 집계"""
+
+    def __init__(self, total: int, skipped: int):
+        self.total = total
+        self.skipped = skipped
+        self.succeeded = 0
+        self.failed = 0
+        self.latencies: Dict[str, List[float]] = {}
+        self.usage = {"input_tokens": 0, "output_tokens": 0, "images": 0, "cost_usd": 0.0}
+        self.started = time.perf_counter()
+
+    @property
+    def done(self) -> int:
+        return self.succeeded + self.failed
+
+    def record(self, operation: str, ok: bool, elapsed: float, usage: Dict[str, Any]) -> None:
+        if ok:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        self.latencies.setdefault(operation, []).append(elapsed)
+        for key in self.usage:
+            self.usage[key] += usage.get(key, 0)
+
+    def line(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed if elapsed else 0.0
+        left = self.total - self.done
+        eta = f"{left / rate:.0f}s" if rate else "-"
+        return (f"[{self.done}/{self.total}] 성공 {self.succeeded} 실패 {self.failed} "
+                f"{rate:.2f} task/s ETA {eta} cost ${self.usage['cost_usd']:.4f}")
+
+    def summary(self) -> Dict[str, Any]:
+        wall = time.perf_counter() - self.started
+        return {
+            "total": self.total,
+            "skipped": self.skipped,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "wall_s": round(wall, 3),
+            "throughput_tps": round(self.done / wall, 3) if wall else 0.0,
+            "operations": {
+                operation: {
+                    "count": len(samples),
+                    "mean_ms": round(statistics.fmean(samples) * 1000, 1),
+                    "p50_ms": round(_percentile(samples, 50) * 1000, 1),
+                    "p95_ms": round(_percentile(samples, 95) * 1000, 1),
+                }
+                for operation, samples in sorted(self.latencies.items())
+            },
+            "usage": {**self.usage, "cost_usd": round(self.usage["cost_usd"], 6)},
+        }
+
+
+async def run_backfill(
+    tasks: List[Dict[str, Any]],
+    checkpoint_path: str,
+    progress: Progress,
+    concurrency: int = 4,
+    rate: Optional[float] = None,
+    timeout: float = 900.0,
+    retries: int = 2,
+    report_interval: float = 10.0,
+) -> None:
+    """
+    작업을 orchestrator로 실행하고 끝날 때마다 checkpoint에 기록합니다.
+
+    Args:
+        tasks: load_manifest 결과 중 실행할 작업
+        checkpoint_path: checkpoint 파일 (JSON Lines, 이어서 씀)
+        progress: 집계 객체
+        concurrency: 동시에 실행할 최대 작업 수
+        rate: 초당 작업 시작 수 (None이면 제한 없음)
+        timeout: 작업 1회 시간 예산 (초)
+        retries: 실패 시 재시도 횟수 (backoff 2, 4, 8...초)
+        report_interval: 진행 상황 출력 주기 (초)
+    """
+    from agent.orchestrator.orchestra_agent import is_failed_result, orchestrate_request_async
+    from agent.orchestrator.weekly_report.tools import close_async_http_client
+    from agent.utils.deadline import DeadlineExceeded, deadline_scope
+    from agent.utils.log import log_context
+    from agent.utils.usage import track_request_usage
+
+    # orchestrator의 boto3 호출 / Strands 스트림이 쓰는 기본 executor (server.py의 ASYNC_IO_THREADS와 동일)
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(
+        max_workers=int(os.environ.get("ASYNC_IO_THREADS", "128")), thread_name_prefix="asyncio-io"
+    ))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def build_preview(payload: Dict[str, Any]) -> Optional[str]:
+        """
+        seed / prompt가 없는 image 작업의 프롬프트를 만들고 seed를 정해 payload에 채웁니다.
+        (그대로 orchestrator에 넘기면 미리보기만 만들고 아무것도 저장하지 않음)
+        재시도할 때는 채운 값을 그대로 사용합니다. 실패하면 오류 메시지를 반환합니다.
+        """
+        from agent.orchestrator.image_generator.tools import ImageGeneratorTools
+
+        prompt_result = await ImageGeneratorTools().build_prompt_from_text(payload["text"])
+        if not prompt_result["success"]:
+            return prompt_result["error"]
+        if prompt_result.get("prompt_fallback"):
+            return "프롬프트 생성 실패 (일기 원문 기반 fallback 프롬프트는 저장하지 않음)"
+        payload["prompt"] = prompt_result["positive_prompt"]
+        payload["seed"] = random.randint(0, 2147483647)
+        return None
+
+    async def attempt(task: Dict[str, Any]) -> Dict[str, Any]:
+        payload = task["payload"]
+        with deadline_scope(timeout):
+            try:
+                if task["operation"] == "image" and not payload.get("image_base64") and not _has_preview(payload):
+                    error = await build_preview(payload)
+                    if error:
+                        return {"type": "error", "content": "", "message": error}
+                result = await orchestrate_request_async(
+                    user_input=payload["content"],
+                    user_id=payload["user_id"],
+                    current_date=payload.get("current_date") or payload.get("record_date"),
+                    request_type=payload["request_type"],
+                    temperature=payload.get("temperature"),
+                    text=payload.get("text"),
+                    image_base64=payload.get("image_base64"),
+                    record_date=payload.get("record_date"),
+                    seed=payload.get("seed"),
+                    image_prompt=payload.get("prompt"),
+                )
+            except DeadlineExceeded as e:
+                return {"type": "error", "content": "", "message": str(e)}
+            except Exception as e:
+                return {"type": "error", "content": "", "message": f"{type(e).__name__}: {e}"}
+        return result
+
+    async def run(task: Dict[str, Any], checkpoint) -> None:
+        try:
+            start = time.perf_counter()
+            with log_context(backfill_task=task["id"], user_id=task["payload"]["user_id"]), \
+                    track_request_usage(task["payload"]["user_id"]) as request_usage:
+                for attempt_no in range(1, retries + 2):
+                    result = await attempt(task)
+                    if not is_failed_result(result) or attempt_no > retries:
+                        break
+                    print(f"⚠️  {task['id']} 실패 ({result.get('message')}), "
+                          f"{2 ** attempt_no}s 후 재시도 {attempt_no}/{retries}", flush=True)
+                    await asyncio.sleep(2 ** attempt_no)
+                usage = request_usage.totals()
+            elapsed = time.perf_counter() - start
+            ok = not is_failed_result(result)
+            progress.record(task["operation"], ok, elapsed, usage)
+            record = {
+                "id": task["id"],
+                "status": "succeeded" if ok else "failed",
+                "attempts": attempt_no,
+                "type": result.get("type"),
+                "content": result.get("content") if ok else "",
+                "message": result.get("message"),
+                "elapsed_ms": round(elapsed * 1000, 1),
+                "cost_usd": usage["cost_usd"],
+                "at": round(time.time(), 3),
+            }
+            if task["operation"] == "image" and _has_preview(task["payload"]):
+                # 같은 이미지를 다시 렌더링할 수 있도록 사용한 seed / prompt도 기록
+                record.update(seed=task["payload"]["seed"], prompt=task["payload"]["prompt"])
+            checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+            checkpoint.flush()
+            if not ok:
+                print(f"❌ {task['id']}: {result.get('message')}", flush=True)
+        finally:
+            semaphore.release()
+
+    async def report() -> None:
+        while True:
+            await asyncio.sleep(report_interval)
+            print(progress.line(), flush=True)
+
+    directory = os.path.dirname(checkpoint_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    reporter = asyncio.create_task(report())
+    running = []
+    try:
+        with open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+            started = time.perf_counter()
+            for sent, task in enumerate(tasks):
+                if rate:
+                    # 일정 간격으로 작업 시작 (밀린 경우 바로 시작)
+                    delay = started + sent / rate - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                await semaphore.acquire()
+                running.append(asyncio.create_task(run(task, checkpoint)))
+            await asyncio.gather(*running)
+    finally:
+        reporter.cancel()
+        for task in running:
+            task.cancel()
+        await close_async_http_client()
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    print("=" * 60)
+    print(f"처리량: {summary['throughput_tps']} task/s ({summary['succeeded'] + summary['failed']}건, {summary['wall_s']}s)")
+    print(f"성공 {summary['succeeded']} / 실패 {summary['failed']} / 건너뜀(이미 완료) {summary['skipped']}")
+    print(f"{'operation':10s} {'count':>6s} {'mean':>9s} {'p50':>9s} {'p95':>9s}")
+    for operation, stats in summary["operations"].items():
+        print(f"{operation:10s} {stats['count']:6d} {stats['mean_ms']:8.1f}ms {stats['p50_ms']:8.1f}ms {stats['p95_ms']:8.1f}ms")
+    usage = summary["usage"]
+    print(f"tokens in {usage['input_tokens']} / out {usage['output_tokens']}, images {usage['images']}, "
+          f"추정 비용 ${usage['cost_usd']:.4f}")
+    print("=" * 60)
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="일기 / 이미지 / 리포트 일괄 재처리")
+    parser.add_argument("manifest", help="JSON Lines manifest (사용자 / 날짜 / 작업)")
+    parser.add_argument("--checkpoint", help="checkpoint 파일 (기본: <manifest>.checkpoint.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시에 실행할 최대 작업 수")
+    parser.add_argument("--rate", type=float, help="초당 작업 시작 수 (기본: 제한 없음)")
+    parser.add_argument("--timeout", type=float, default=float(os.environ.get("JOB_TIMEOUT", "900")),
+                        help="작업 1회 시간 예산 (초)")
+    parser.add_argument("--retries", type=int, default=2, help="실패 시 재시도 횟수")
+    parser.add_argument("--only", help="실행할 operation (쉼표 구분, 예: diary,image)")
+    parser.add_argument("--limit", type=int, help="이번 실행에서 처리할 최대 작업 수")
+    parser.add_argument("--retry-failed", action="store_true", help="checkpoint에 실패로 기록된 작업도 다시 실행")
+    parser.add_argument("--report-interval", type=float, default=10.0, help="진행 상황 출력 주기 (초)")
+    parser.add_argument("--dry-run", action="store_true", help="실행하지 않고 작업 수만 출력")
+    parser.add_argument("--json", dest="json_path", help="결과 요약 저장 경로")
+    args = parser.parse_args(argv)
+
+    only = {name.strip() for name in args.only.split(",") if name.strip()} if args.only else None
+    checkpoint_path = args.checkpoint or f"{args.manifest}.checkpoint.jsonl"
+    try:
+        tasks = load_manifest(args.manifest, only)
+    except (OSError, ValueError) as e:
+        print(f"❌ manifest 읽기 실패: {e}", file=sys.stderr)
+        return 1
+
+    done = load_checkpoint(checkpoint_path)
+    skip_statuses = ("succeeded",) if args.retry_failed else ("succeeded", "failed")
+    pending = [task for task in tasks if done.get(task["id"], {}).get("status") not in skip_statuses]
+    completed = len(tasks) - len(pending)
+    if args.limit is not None:
+        pending = pending[:args.limit]
+
+    counts: Dict[str, int] = {}
+    for task in pending:
+        counts[task["operation"]] = counts.get(task["operation"], 0) + 1
+    print(f"📋 작업 {len(tasks)}건 중 {completed}건 완료(checkpoint), 이번 실행 {len(pending)}건: "
+          + (", ".join(f"{op} {n}" for op, n in sorted(counts.items())) or "-"), flush=True)
+    print(f"   checkpoint: {checkpoint_path}", flush=True)
+    if args.dry_run or not pending:
+        return 0
+
+    from agent.utils.log import setup_logging
+    setup_logging()
+
+    progress = Progress(len(pending), completed)
+    interrupted = False
+    try:
+        asyncio.run(run_backfill(
+            pending, checkpoint_path, progress,
+            concurrency=max(1, args.concurrency), rate=args.rate, timeout=args.timeout,
+            retries=max(0, args.retries), report_interval=args.report_interval,
+        ))
+    except KeyboardInterrupt:
+        interrupted = True
+        print("\n⏸️  중단됨 - 같은 명령으로 다시 실행하면 checkpoint 이후부터 이어서 처리합니다.", flush=True)
+
+    summary = progress.summary()
+    print_summary(summary)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    if interrupted:
+        return 130
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
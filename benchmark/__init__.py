@@ -0,0 +1,3 @@
+"""
+오프라인 벤치마크 / 부하 도구 (운영 코드에서 import하지 않음)
+"""
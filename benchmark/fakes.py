@@ -0,0 +1,459 @@
+"""
+오프라인 벤치마크용 가짜 백엔드
+실제 AWS 없이 Bedrock(Converse / invoke_model), Knowledge Base retrieve, S3, Secrets Manager와
+weekly report API를 흉내 내서 서비스 자체의 오버헤드만 측정할 수 있게 합니다.
+
+boto3는 botocore.session.Session.create_client를 가로채서 가짜 client를 돌려주므로
+Strands BedrockModel, strands_tools.retrieve, image_generator/tools.py의 client 생성 코드를
+그대로 사용합니다. 가짜 client도 before-call / after-call 이벤트를 발생시켜 tracing/metrics가 동작합니다.
+(이벤트는 botocore 기본 handler가 없는 별도 emitter로 보냅니다. 기본 handler는 실제 OperationModel과
+직렬화된 요청을 기대하므로 가짜 호출에서는 실패합니다)
+
+    backends = FakeBackends(FakeLatency(model=0.05))
+    backends.install()      # agent 모듈 import 전에 호출
+    ...
+    backends.uninstall()
+"""
+import asyncio
+import base64
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+# 1x1 PNG (Nova Canvas 응답 이미지)
+FAKE_PNG_BASE64 = (
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+# 가짜 Secrets Manager가 돌려주는 설정
+FAKE_CONFIG = {
+    "AWS_REGION": "us-east-1",
+    "KNOWLEDGE_BASE_ID": "BENCHKB0001",
+    "KNOWLEDGE_BASE_BUCKET": "benchmark-bucket",
+    "BEDROCK_MODEL_ARN": "anthropic.claude-sonnet-4-5-20250929-v1:0",
+    "BEDROCK_CLAUDE_MODEL_ID": "anthropic.claude-sonnet-4-5-20250929-v1:0",
+    "BEDROCK_LLM_MODEL_ID": "anthropic.claude-haiku-4-5-20251001-v1:0",
+    "BEDROCK_NOVA_CANVAS_MODEL_ID": "amazon.nova-canvas-v1:0",
+}
+
+# 첫 턴에 호출할 tool 순서 (에이전트별 대표 흐름)
+SCRIPTED_TOOLS = ("retrieve", "generate_image_from_text", "get_diary_entries")
+
+
+@dataclass
+class FakeLatency:
+    """가짜 백엔드별 지연시간 (초). jitter는 비율 (0.2 = ±20%)"""
+
+    model: float = 0.05
+    model_per_token: float = 0.0
+    nova: float = 0.2
+    kb: float = 0.03
+    s3: float = 0.01
+    api: float = 0.01
+    jitter: float = 0.0
+
+    def _jittered(self, seconds: float) -> float:
+        if self.jitter:
+            seconds *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return seconds
+
+    def sleep(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        time.sleep(self._jittered(seconds))
+
+    async def sleep_async(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        await asyncio.sleep(self._jittered(seconds))
+
+
+class _ClientError(Exception):
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.response = {"Error": {"Code": code, "Message": message}}
+
+
+class FakeClient:
+    """가짜 boto3 client 공통 부분 (botocore 이벤트 발생, 호출 횟수 기록)"""
+
+    service_name = ""
+
+    def __init__(self, backends: "FakeBackends", events):
+        self._backends = backends
+        self.meta = SimpleNamespace(events=events, region_name="us-east-1", service_model=None)
+        self.calls: Dict[str, int] = {}
+
+    def _call(self, operation: str, params: Dict[str, Any], handler: Callable[[], Dict[str, Any]]):
+        model = SimpleNamespace(name=operation, service_model=SimpleNamespace(service_name=self.service_name))
+        context: Dict[str, Any] = {}
+        event = f"{self.service_name}.{operation}"
+        self.meta.events.emit(f"before-call.{event}", model=model, params=params, context=context)
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+        try:
+            result = handler()
+        except Exception as e:
+            self.meta.events.emit(f"after-call-error.{event}", exception=e, context=context)
+            raise
+        http_response = SimpleNamespace(status_code=200)
+        self.meta.events.emit(
+            f"after-call.{event}", http_response=http_response, parsed=result, model=model, context=context
+        )
+        return result
+
+
+# ============================================================================
+# Bedrock Runtime
+# ============================================================================
+
+def _sample_from_schema(schema: Dict[str, Any], name: str = "", text: str = "") -> Any:
+    """JSON schema에 맞는 값을 만듭니다. 문자열 필드는 사용자 메시지의 `name: value`를 우선 사용합니다."""
+    schema = schema.get("json", schema)
+    kind = schema.get("type")
+    if "enum" in schema:
+        return schema["enum"][0]
+    if kind == "object" or "properties" in schema:
+        properties = schema.get("properties", {})
+        required = schema.get("required", list(properties))
+        return {key: _sample_from_schema(properties[key], key, text) for key in required if key in properties}
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 0.5
+    if kind == "boolean":
+        return False
+    if kind == "array":
+        return []
+    match = re.search(rf"{re.escape(name)}\s*[:=]\s*(\S+)", text) if name else None
+    if match:
+        return match.group(1)
+    if name == "type":
+        return "data"
+    if name.endswith("_date"):
+        return "2025-01-01"
+    return f"benchmark {name}".strip()
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    return "\n".join(block.get("text", "") for block in message.get("content", []) if isinstance(block, dict))
+
+
+class FakeBedrockRuntime(FakeClient):
+    """Converse / ConverseStream / InvokeModel (Anthropic, Nova Canvas)"""
+
+    service_name = "bedrock-runtime"
+
+    # --- Converse 응답 생성 ---
+    def _respond(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        messages = params.get("messages", [])
+        tool_config = params.get("toolConfig") or {}
+        tools = [t["toolSpec"] for t in tool_config.get("tools", []) if "toolSpec" in t]
+        last = messages[-1] if messages else {}
+        user_text = "\n".join(_message_text(m) for m in messages if m.get("role") == "user")
+        has_tool_result = any("toolResult" in block for block in last.get("content", []) if isinstance(block, dict))
+
+        tool = None
+        choice = tool_config.get("toolChoice") or {}
+        if "tool" in choice:
+            tool = next((t for t in tools if t["name"] == choice["tool"]["name"]), None)
+        elif "any" in choice or (len(tools) == 1 and tools[0]["name"][:1].isupper()):
+            # structured_output: pydantic 모델 이름의 tool을 강제 호출
+            tool = tools[0] if tools else None
+        elif not has_tool_result:
+            names = {t["name"]: t for t in tools}
+            if "image_base64" in user_text and "upload_image_to_s3" in names:
+                tool = names["upload_image_to_s3"]
+            else:
+                tool = next((names[n] for n in SCRIPTED_TOOLS if n in names), None)
+
+        output_tokens = 40
+        self._backends.latency.sleep(self._backends.latency.model + output_tokens * self._backends.latency.model_per_token)
+
+        if tool is not None:
+            content = [{
+                "toolUse": {
+                    "toolUseId": f"tooluse_{uuid.uuid4().hex[:12]}",
+                    "name": tool["name"],
+                    "input": _sample_from_schema(tool.get("inputSchema", {}), text=user_text),
+                }
+            }]
+            stop_reason = "tool_use"
+        else:
+            content = [{"text": self._backends.model_reply(user_text)}]
+            stop_reason = "end_turn"
+
+        input_tokens = sum(len(_message_text(m)) for m in messages) // 4 + 50
+        return {
+            "output": {"message": {"role": "assistant", "content": content}},
+            "stopReason": stop_reason,
+            "usage": {"inputTokens": input_tokens, "outputTokens": output_tokens, "totalTokens": input_tokens + output_tokens},
+            "metrics": {"latencyMs": int(self._backends.latency.model * 1000)},
+        }
+
+    def converse(self, **params):
+        return self._call("Converse", params, lambda: self._respond(params))
+
+    def converse_stream(self, **params):
+        def handler():
+            response = self._respond(params)
+            return {"stream": list(self._stream_events(response))}
+        return self._call("ConverseStream", params, handler)
+
+    @staticmethod
+    def _stream_events(response: Dict[str, Any]):
+        yield {"messageStart": {"role": "assistant"}}
+        for index, block in enumerate(response["output"]["message"]["content"]):
+            if "toolUse" in block:
+                tool_use = block["toolUse"]
+                yield {"contentBlockStart": {"contentBlockIndex": index, "start": {
+                    "toolUse": {"toolUseId": tool_use["toolUseId"], "name": tool_use["name"]}
+                }}}
+                yield {"contentBlockDelta": {"contentBlockIndex": index, "delta": {
+                    "toolUse": {"input": json.dumps(tool_use["input"], ensure_ascii=False)}
+                }}}
+            else:
+                yield {"contentBlockDelta": {"contentBlockIndex": index, "delta": {"text": block["text"]}}}
+            yield {"contentBlockStop": {"contentBlockIndex": index}}
+        yield {"messageStop": {"stopReason": response["stopReason"]}}
+        yield {"metadata": {"usage": response["usage"], "metrics": response["metrics"]}}
+
+    # --- InvokeModel ---
+    def invoke_model(self, **params):
+        def handler():
+            body = json.loads(params.get("body") or "{}")
+            if "nova-canvas" in params.get("modelId", ""):
+                count = body.get("imageGenerationConfig", {}).get("numberOfImages", 1)
+                self._backends.latency.sleep(self._backends.latency.nova)
+                payload = {"images": [FAKE_PNG_BASE64] * count}
+            else:
+                self._backends.latency.sleep(self._backends.latency.model)
+                payload = {
+                    "content": [{"type": "text", "text": "A realistic photo of a quiet cafe table, natural light"}],
+                    "stop_reason": "end_turn",
+                    "usage": {"input_tokens": 800, "output_tokens": 60},
+                }
+            return {"body": io.BytesIO(json.dumps(payload).encode("utf-8")), "contentType": "application/json"}
+        return self._call("InvokeModel", params, handler)
+
+
+# ============================================================================
+# Knowledge Base / S3 / Secrets Manager
+# ============================================================================
+
+class FakeAgentRuntime(FakeClient):
+    """Knowledge Base retrieve"""
+
+    service_name = "bedrock-agent-runtime"
+
+    def retrieve(self, **params):
+        def handler():
+            self._backends.latency.sleep(self._backends.latency.kb)
+            return {"retrievalResults": [
+                {
+                    "content": {"text": f"2025-01-0{i + 1} 일기: 벤치마크용 기록 {i + 1}"},
+                    "location": {"type": "S3", "s3Location": {"uri": f"s3://benchmark-bucket/diary/{i}.txt"}},
+                    "score": 0.9 - i * 0.1,
+                    "metadata": {},
+                }
+                for i in range(3)
+            ]}
+        return self._call("Retrieve", params, handler)
+
+
+class FakeS3(FakeClient):
+    """메모리 내 S3 (bucket/key → bytes)"""
+
+    service_name = "s3"
+
+    def put_object(self, **params):
+        def handler():
+            self._backends.latency.sleep(self._backends.latency.s3)
+            body = params.get("Body", b"")
+            data = body.read() if hasattr(body, "read") else body
+            self._backends.s3_objects[(params["Bucket"], params["Key"])] = bytes(data)
+            return {"ETag": f'"{uuid.uuid4().hex}"'}
+        return self._call("PutObject", params, handler)
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, ExtraArgs=None, **kwargs):
+        self.put_object(Bucket=Bucket, Key=Key, Body=Fileobj, **(ExtraArgs or {}))
+
+    def get_object(self, **params):
+        def handler():
+            data = self._backends.s3_objects.get((params["Bucket"], params["Key"]))
+            if data is None:
+                raise _ClientError("NoSuchKey", params["Key"])
+            return {"Body": io.BytesIO(data), "ContentLength": len(data)}
+        return self._call("GetObject", params, handler)
+
+    def head_object(self, **params):
+        def handler():
+            data = self._backends.s3_objects.get((params["Bucket"], params["Key"]))
+            if data is None:
+                raise _ClientError("404", params["Key"])
+            return {"ContentLength": len(data)}
+        return self._call("HeadObject", params, handler)
+
+    def head_bucket(self, **params):
+        return self._call("HeadBucket", params, lambda: {})
+
+
+class FakeSecretsManager(FakeClient):
+    service_name = "secretsmanager"
+
+    def get_secret_value(self, **params):
+        return self._call(
+            "GetSecretValue", params, lambda: {"SecretString": json.dumps(self._backends.config)}
+        )
+
+
+FAKE_CLIENTS = {
+    "bedrock-runtime": FakeBedrockRuntime,
+    "bedrock-agent-runtime": FakeAgentRuntime,
+    "s3": FakeS3,
+    "secretsmanager": FakeSecretsManager,
+}
+
+
+# ============================================================================
+# Report API (httpx MockTransport)
+# ============================================================================
+
+def _report_api_response(request: "httpx.Request") -> "httpx.Response":
+    import httpx
+
+    path = request.url.path
+    user_id = request.url.params.get("user_id", "bench-user")
+    if path.startswith("/user/"):
+        body = {"user_id": path.rsplit("/", 1)[-1], "nickname": "벤치", "email": "bench@example.com"}
+    elif path == "/history":
+        body = {"items": [
+            {"record_date": f"2025-01-0{i + 1}", "content": f"벤치마크 일기 {i + 1}"} for i in range(5)
+        ]}
+    elif path == "/report/create":
+        body = {"report_id": 1, "status": "processing"}
+    elif path.startswith("/report/status/"):
+        body = {"report_id": 1, "status": "completed"}
+    elif path.startswith("/report/"):
+        body = {"report_id": 1, "user_id": user_id, "summary": "벤치마크 리포트"}
+    elif path == "/report":
+        body = {"reports": [{"report_id": 1, "status": "completed"}]}
+    else:
+        body = {"status": "ok"}
+    return httpx.Response(200, json=body)
+
+
+def _report_api_handler(backends: "FakeBackends"):
+    def handler(request: "httpx.Request") -> "httpx.Response":
+        backends.latency.sleep(backends.latency.api)
+        return _report_api_response(request)
+
+    return handler
+
+
+def _report_api_handler_async(backends: "FakeBackends"):
+    async def handler(request: "httpx.Request") -> "httpx.Response":
+        await backends.latency.sleep_async(backends.latency.api)
+        return _report_api_response(request)
+
+    return handler
+
+
+# ============================================================================
+# 설치 / 해제
+# ============================================================================
+
+class FakeBackends:
+    """가짜 백엔드 묶음. install()은 agent 모듈 import 전에 호출해야 합니다."""
+
+    def __init__(self, latency: Optional[FakeLatency] = None, config: Optional[Dict[str, Any]] = None,
+                 reply: Optional[Callable[[str], str]] = None):
+        self.latency = latency or FakeLatency()
+        self.config = {**FAKE_CONFIG, **(config or {})}
+        self.s3_objects: Dict[tuple, bytes] = {}
+        self.clients: List[FakeClient] = []
+        self._reply = reply
+        self._original_create_client = None
+        self._lock = threading.Lock()
+
+    def model_reply(self, user_text: str) -> str:
+        if self._reply is not None:
+            return self._reply(user_text)
+        return "벤치마크 응답입니다. 오늘은 조용한 카페에서 책을 읽으며 시간을 보냈습니다."
+
+    def install(self) -> None:
+        import os
+
+        import botocore.session
+
+        # 실제 자격 증명 / 리전 조회를 하지 않도록 기본값 설정
+        os.environ.setdefault("AWS_REGION", self.config["AWS_REGION"])
+        os.environ.setdefault("AWS_DEFAULT_REGION", self.config["AWS_REGION"])
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+        os.environ.setdefault("SECRET_NAME", "benchmark-secret")
+
+        backends = self
+        original = botocore.session.Session.create_client
+        self._original_create_client = original
+
+        def create_client(session, service_name, *args, **kwargs):
+            from botocore.hooks import HierarchicalEmitter
+
+            from agent.utils.tracing import instrument_boto3
+
+            factory = FAKE_CLIENTS.get(service_name)
+            if factory is None:
+                return original(session, service_name, *args, **kwargs)
+            # tracing / metrics handler만 등록된 emitter (server.py의 instrument_boto3와 같은 handler)
+            client = factory(backends, HierarchicalEmitter())
+            instrument_boto3(client)
+            with backends._lock:
+                backends.clients.append(client)
+            return client
+
+        botocore.session.Session.create_client = create_client
+
+    def install_report_api(self) -> None:
+        """weekly_report 공유 httpx 클라이언트(sync / async)를 stub API로 교체합니다."""
+        import httpx
+
+        from agent.orchestrator.weekly_report import tools as report_tools
+        from agent.utils.tracing import trace_event_hooks
+
+        report_tools._http_client = httpx.Client(
+            transport=httpx.MockTransport(_report_api_handler(self)),
+            event_hooks=trace_event_hooks(),
+        )
+        # 이후 이벤트 루프별로 만들어지는 AsyncClient에 적용
+        report_tools._async_transport = httpx.MockTransport(_report_api_handler_async(self))
+        report_tools._async_clients.clear()
+
+    def uninstall(self) -> None:
+        import botocore.session
+
+        if self._original_create_client is not None:
+            botocore.session.Session.create_client = self._original_create_client
+            self._original_create_client = None
+
+    def call_counts(self) -> Dict[str, int]:
+        """서비스.operation별 가짜 호출 횟수"""
+        counts: Dict[str, int] = {}
+        with self._lock:
+            clients = list(self.clients)
+        for client in clients:
+            for operation, count in client.calls.items():
+                key = f"{client.service_name}.{operation}"
+                counts[key] = counts.get(key, 0) + count
+        return counts
+
+
+def fake_image_base64(size: int = 256 * 1024) -> str:
+    """업로드 경로 측정용 base64 이미지 (size 바이트)"""
+    return base64.b64encode(b"\x89PNG\r\n\x1a\n" + random.randbytes(max(0, size - 8))).decode("ascii")
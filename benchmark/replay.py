@@ -0,0 +1,264 @@
+"""
+요청 로그 재생 부하 도구
+JSON Lines 요청 로그를 /invocations에 다시 보내고 라우트(응답 type)별 지연시간과 에러율, 처리량을 보고합니다.
+
+로그 한 줄 형식 (셋 중 하나):
+    {"content": "...", "user_id": "...", "request_type": "question"}    # /invocations 본문 그대로
+    {"payload": {...}}  또는  {"body": {...}}                              # 본문을 감싼 형태
+/invocations 본문으로 볼 수 없는 줄(content 등 입력 필드가 없는 줄)은 건너뜁니다.
+
+사용법:
+    python -m benchmark.replay run benchmark/sample_requests.jsonl --url http://localhost:8080 \\
+        --concurrency 16 --rate 20 --duration 60 --json run-a.json
+    python -m benchmark.replay compare run-a.json run-b.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# /invocations가 입력으로 받는 필드 (server.py와 동일)
+INPUT_FIELDS = ("content", "inputText", "input", "user_input")
+
+
+def load_requests(path: str) -> List[Dict[str, Any]]:
+    """요청 로그에서 /invocations 본문 목록을 읽습니다."""
+    payloads = []
+    skipped = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                skipped += 1
+                continue
+            payload = entry.get("payload") or entry.get("body") if isinstance(entry, dict) else None
+            if not isinstance(payload, dict):
+                payload = entry
+            if isinstance(payload, dict) and any(payload.get(key) for key in INPUT_FIELDS):
+                payloads.append(payload)
+            else:
+                skipped += 1
+    if skipped:
+        print(f"⚠️  /invocations 본문이 아닌 {skipped}줄을 건너뜀", file=sys.stderr)
+    return payloads
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summarize(samples: List[float], errors: int) -> Dict[str, Any]:
+    count = len(samples)
+    return {
+        "count": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "mean_ms": round(statistics.fmean(samples) * 1000, 1) if samples else 0.0,
+        "p50_ms": round(_percentile(samples, 50) * 1000, 1),
+        "p95_ms": round(_percentile(samples, 95) * 1000, 1),
+        "p99_ms": round(_percentile(samples, 99) * 1000, 1),
+    }
+
+
+async def replay(
+    payloads: List[Dict[str, Any]],
+    url: str,
+    concurrency: int = 8,
+    rate: Optional[float] = None,
+    duration: Optional[float] = None,
+    count: Optional[int] = None,
+    timeout: float = 120.0,
+) -> Dict[str, Any]:
+    """
+    요청 로그를 재생합니다.
+
+    Args:
+        payloads: /invocations 본문 목록 (순서대로 반복)
+        url: 서버 기본 URL (예: http://localhost:8080)
+        concurrency: 동시에 진행할 최대 요청 수
+        rate: 초당 요청 시작 수 (None이면 제한 없음)
+        duration: 재생 시간 (초). count와 둘 다 없으면 로그를 한 번 재생
+        count: 보낼 요청 수
+        timeout: 요청 timeout (초)
+
+    Returns:
+        전체 / 라우트별 결과 딕셔너리
+    """
+    import httpx
+
+    if not payloads:
+        raise ValueError("재생할 요청이 없습니다.")
+    if count is None and duration is None:
+        count = len(payloads)
+
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    statuses: Dict[str, int] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    endpoint = url.rstrip("/") + "/invocations"
+
+    async def send(client: "httpx.AsyncClient", payload: Dict[str, Any]) -> None:
+        start = time.perf_counter()
+        route, failed = "error", True
+        try:
+            response = await client.post(endpoint, json=payload)
+            status = str(response.status_code)
+            try:
+                route = response.json().get("type") or "unknown"
+            except ValueError:
+                route = "error"
+            failed = response.status_code != 200 or route == "error"
+        except Exception as e:
+            status = type(e).__name__
+        finally:
+            semaphore.release()
+        elapsed = time.perf_counter() - start
+        latencies.setdefault(route, []).append(elapsed)
+        errors[route] = errors.get(route, 0) + (1 if failed else 0)
+        statuses[status] = statuses.get(status, 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        tasks = []
+        started = time.perf_counter()
+        sent = 0
+        while True:
+            if count is not None and sent >= count:
+                break
+            if duration is not None and time.perf_counter() - started >= duration:
+                break
+            if rate:
+                # 일정 간격으로 요청 시작 (open-loop). 밀린 경우 바로 보냄
+                delay = started + sent / rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(send(client, payloads[sent % len(payloads)])))
+            sent += 1
+        await asyncio.gather(*tasks)
+        wall = time.perf_counter() - started
+
+    all_samples = [s for samples in latencies.values() for s in samples]
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "rate": rate,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(all_samples) / wall, 2) if wall else 0.0,
+        "total": _summarize(all_samples, sum(errors.values())),
+        "routes": {route: _summarize(samples, errors.get(route, 0)) for route, samples in sorted(latencies.items())},
+        "status_codes": statuses,
+    }
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    print(f"처리량: {result['throughput_rps']} req/s ({result['total']['count']}건, {result['wall_s']}s)")
+    print(f"{'route':10s} {'count':>6s} {'err%':>6s} {'p50':>9s} {'p95':>9s} {'p99':>9s}")
+    rows = list(result["routes"].items()) + [("TOTAL", result["total"])]
+    for route, stats in rows:
+        print(
+            f"{route:10s} {stats['count']:6d} {stats['error_rate'] * 100:5.1f}% "
+            f"{stats['p50_ms']:8.1f}ms {stats['p95_ms']:8.1f}ms {stats['p99_ms']:8.1f}ms"
+        )
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> Dict[str, Any]:
+    """두 실행 결과의 라우트별 지연시간 / 에러율 / 처리량 변화를 계산합니다."""
+    def delta(before: float, after: float) -> Dict[str, float]:
+        pct = round((after - before) / before * 100, 1) if before else 0.0
+        return {"before": before, "after": after, "change_pct": pct}
+
+    routes = {}
+    for route in sorted(set(baseline["routes"]) | set(candidate["routes"]) | {"total"}):
+        before = baseline["total"] if route == "total" else baseline["routes"].get(route)
+        after = candidate["total"] if route == "total" else candidate["routes"].get(route)
+        if not before or not after:
+            routes[route] = {"missing_in": "baseline" if not before else "candidate"}
+            continue
+        routes[route] = {
+            key: delta(before[key], after[key]) for key in ("p50_ms", "p95_ms", "p99_ms", "error_rate")
+        }
+    return {
+        "throughput_rps": delta(baseline["throughput_rps"], candidate["throughput_rps"]),
+        "routes": routes,
+    }
+
+
+def print_comparison(result: Dict[str, Any]) -> None:
+    t = result["throughput_rps"]
+    print(f"처리량: {t['before']} → {t['after']} req/s ({t['change_pct']:+.1f}%)")
+    for route, stats in result["routes"].items():
+        if "missing_in" in stats:
+            print(f"{route:10s} ({stats['missing_in']}에 없음)")
+            continue
+        parts = [
+            f"{key[:-3]} {v['before']:.1f}→{v['after']:.1f}ms ({v['change_pct']:+.1f}%)"
+            for key, v in stats.items() if key.endswith("_ms")
+        ]
+        err = stats["error_rate"]
+        parts.append(f"err {err['before'] * 100:.1f}%→{err['after'] * 100:.1f}%")
+        print(f"{route:10s} " + ", ".join(parts))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="요청 로그 재생 부하 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="요청 로그를 /invocations에 재생")
+    run.add_argument("log", help="JSON Lines 요청 로그")
+    run.add_argument("--url", default=os.environ.get("REPLAY_URL", "http://localhost:8080"))
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--rate", type=float, help="초당 요청 수 (기본: 제한 없음)")
+    run.add_argument("--duration", type=float, help="재생 시간 (초)")
+    run.add_argument("--count", type=int, help="보낼 요청 수 (기본: 로그 1회)")
+    run.add_argument("--timeout", type=float, default=120.0)
+    run.add_argument("--json", dest="json_path", help="결과 저장 경로 (compare 입력)")
+
+    cmp_parser = sub.add_parser("compare", help="두 실행 결과 비교")
+    cmp_parser.add_argument("baseline")
+    cmp_parser.add_argument("candidate")
+    cmp_parser.add_argument("--max-p95-regression", type=float,
+                            help="전체 p95가 이 비율(%%) 이상 나빠지면 exit 1")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        payloads = load_requests(args.log)
+        result = asyncio.run(replay(
+            payloads, args.url, concurrency=args.concurrency, rate=args.rate,
+            duration=args.duration, count=args.count, timeout=args.timeout,
+        ))
+        print_result(result)
+        if args.json_path:
+            with open(args.json_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)
+    result = compare(baseline, candidate)
+    print_comparison(result)
+    if args.max_p95_regression is not None:
+        change = result["routes"]["total"]["p95_ms"]["change_pct"]
+        if change > args.max_p95_regression:
+            print(f"❌ p95 {change:+.1f}% (허용 {args.max_p95_regression}%)", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
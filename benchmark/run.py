@@ -0,0 +1,273 @@
+"""
+오프라인 벤치마크
+가짜 백엔드(benchmark/fakes.py) 위에서 orchestrate_request와 FastAPI 앱(/invocations)을
+라우트별로 실행하고 단계별 지연시간, 처리량, 메모리를 보고합니다.
+
+사용법:
+    python -m benchmark.run
+    python -m benchmark.run --mode app --iterations 50 --concurrency 8 --model-latency 0.2
+    python -m benchmark.run --routes answer,image --json results.json
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark.fakes import FakeBackends, FakeLatency, fake_image_base64
+
+# 라우트별 대표 요청 (/invocations 본문 형식)
+BENCH_USER_ID = "bench-user"
+
+ROUTE_PAYLOADS: Dict[str, Dict[str, Any]] = {
+    "data": {"content": "오늘 점심에 김치찌개를 먹었다", "user_id": BENCH_USER_ID},
+    "answer": {
+        "content": "지난주에 뭐 먹었어?", "user_id": BENCH_USER_ID,
+        "current_date": "2025-01-08", "request_type": "question",
+    },
+    "diary": {"content": "카페, 독서, 산책", "user_id": BENCH_USER_ID, "request_type": "summarize", "temperature": 0.5},
+    "image": {
+        "content": "이미지 생성해줘", "user_id": BENCH_USER_ID, "request_type": "image",
+        "text": "오늘은 조용한 카페에서 책을 읽었다.",
+    },
+    "upload": {
+        "content": "히스토리에 추가해줘", "user_id": BENCH_USER_ID, "request_type": "image",
+        "record_date": "2025-01-08",
+    },
+    # 미리보기 seed / prompt로 최종 해상도 렌더링 후 업로드 (agent 추론 없음)
+    "history": {
+        "content": "히스토리에 추가해줘", "user_id": BENCH_USER_ID, "request_type": "image",
+        "record_date": "2025-01-08", "seed": 12345, "prompt": "A realistic photo of a quiet cafe, natural light",
+    },
+    "report": {"content": "이번 주 리포트 만들어줘", "user_id": BENCH_USER_ID, "request_type": "report"},
+}
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 2) if samples else 0.0,
+        "p50_ms": round(_percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(_percentile(samples, 95) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2) if samples else 0.0,
+    }
+
+
+class SpanCollector:
+    """벤치마크 중 완료된 span을 모으는 exporter"""
+
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def export(self, spans) -> None:
+        with self._lock:
+            for s in spans:
+                name = s.name
+                if s.attributes.get("model_id") and name.startswith("aws.bedrock-runtime"):
+                    name = f"{name}[{s.attributes['model_id']}]"
+                self.durations.setdefault(name, []).append(s.duration_ms / 1000)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.durations.clear()
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: _summary(samples) for name, samples in sorted(self.durations.items())}
+
+
+def _run_load(call: Callable[[], Any], iterations: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one():
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            ok = call()
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(iterations):
+            pool.submit(one)
+    wall = time.perf_counter() - wall_start
+
+    return {
+        **_summary(latencies),
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+    }
+
+
+def _memory_mb() -> float:
+    # Linux: ru_maxrss는 KB 단위
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="가짜 백엔드 기반 오프라인 벤치마크")
+    parser.add_argument("--mode", choices=("orchestrator", "app", "both"), default="both")
+    parser.add_argument("--routes", default=",".join(ROUTE_PAYLOADS), help="쉼표로 구분한 라우트 목록")
+    parser.add_argument("--iterations", type=int, default=20, help="라우트별 요청 수")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=2, help="측정 전 라우트별 warm-up 요청 수")
+    parser.add_argument("--model-latency", type=float, default=0.05, help="가짜 모델 응답 지연 (초)")
+    parser.add_argument("--nova-latency", type=float, default=0.2)
+    parser.add_argument("--kb-latency", type=float, default=0.03)
+    parser.add_argument("--s3-latency", type=float, default=0.01)
+    parser.add_argument("--api-latency", type=float, default=0.01)
+    parser.add_argument("--jitter", type=float, default=0.0, help="지연시간 변동 비율 (0.2 = ±20%%)")
+    parser.add_argument("--image-size", type=int, default=256 * 1024, help="upload 라우트 이미지 크기 (바이트)")
+    parser.add_argument("--tracemalloc", action="store_true", help="Python 힙 최대 사용량 측정 (오버헤드 있음)")
+    parser.add_argument("--json", dest="json_path", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("SUBAGENT_WARMUP", "false")
+    # 벤치마크 사용자는 fairness 제한(USER_RATE 등)에 걸리지 않도록 전용 quota 부여
+    os.environ.setdefault("USER_QUOTAS", json.dumps({
+        BENCH_USER_ID: {"concurrency": args.concurrency, "rate": 1e6, "burst": 1e6},
+    }))
+
+    backends = FakeBackends(FakeLatency(
+        model=args.model_latency, nova=args.nova_latency, kb=args.kb_latency,
+        s3=args.s3_latency, api=args.api_latency, jitter=args.jitter,
+    ))
+    backends.install()
+
+    memory_before = _memory_mb()
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    from agent.utils.log import setup_logging
+    from agent.utils.tracing import instrument_boto3, set_exporter, start_trace
+
+    setup_logging()
+    instrument_boto3()
+    collector = SpanCollector()
+    set_exporter(collector)
+
+    import_start = time.perf_counter()
+    from agent.orchestrator.orchestra_agent import is_failed_result, orchestrate_request
+    from agent.orchestrator.registry import warm_up
+
+    warm_up()
+    backends.install_report_api()
+    import_seconds = time.perf_counter() - import_start
+
+    routes = [r.strip() for r in args.routes.split(",") if r.strip()]
+    payloads = {}
+    for route in routes:
+        payload = dict(ROUTE_PAYLOADS[route])
+        if route == "upload":
+            payload["image_base64"] = fake_image_base64(args.image_size)
+        payloads[route] = payload
+
+    results: Dict[str, Any] = {
+        "config": vars(args),
+        "import_ms": round(import_seconds * 1000, 1),
+        "modes": {},
+    }
+
+    def orchestrator_call(payload):
+        def call():
+            with start_trace("benchmark", route=payload.get("request_type") or "data"):
+                result = orchestrate_request(
+                    user_input=payload["content"],
+                    user_id=payload.get("user_id"),
+                    current_date=payload.get("current_date") or payload.get("record_date"),
+                    request_type=payload.get("request_type"),
+                    temperature=payload.get("temperature"),
+                    text=payload.get("text"),
+                    image_base64=payload.get("image_base64"),
+                    record_date=payload.get("record_date"),
+                    seed=payload.get("seed"),
+                    image_prompt=payload.get("prompt"),
+                )
+            return not is_failed_result(result)
+        return call
+
+    def app_call(client, payload):
+        def call():
+            response = client.post("/invocations", json=payload)
+            return response.status_code == 200 and not is_failed_result(response.json())
+        return call
+
+    modes = ("orchestrator", "app") if args.mode == "both" else (args.mode,)
+    client = None
+    if "app" in modes:
+        from fastapi.testclient import TestClient
+
+        from agent.server import app
+
+        # lifespan(백그라운드 warm-up)은 실행하지 않음
+        client = TestClient(app)
+
+    for mode in modes:
+        mode_result = {}
+        for route in routes:
+            call = orchestrator_call(payloads[route]) if mode == "orchestrator" else app_call(client, payloads[route])
+            for _ in range(args.warmup):
+                call()
+            collector.reset()
+            load = _run_load(call, args.iterations, args.concurrency)
+            mode_result[route] = {"latency": load, "stages": collector.report()}
+            print(
+                f"[{mode}] {route:7s} p50={load['p50_ms']:8.1f}ms p95={load['p95_ms']:8.1f}ms "
+                f"rps={load['throughput_rps']:7.2f} errors={load['errors']}",
+                flush=True,
+            )
+        results["modes"][mode] = mode_result
+
+    results["memory"] = {"rss_before_mb": memory_before, "rss_max_mb": _memory_mb()}
+    if args.tracemalloc:
+        current, peak = tracemalloc.get_traced_memory()
+        results["memory"]["python_heap_peak_mb"] = round(peak / 1024 / 1024, 1)
+        tracemalloc.stop()
+    results["fake_calls"] = backends.call_counts()
+
+    print()
+    print(f"모듈 로드: {results['import_ms']}ms, 메모리(max RSS): {results['memory']['rss_max_mb']}MB")
+    for mode, mode_result in results["modes"].items():
+        for route, data in mode_result.items():
+            print(f"\n[{mode}] {route} 단계별 지연시간")
+            for name, stats in data["stages"].items():
+                print(f"  {name:60s} n={stats['count']:4d} p50={stats['p50_ms']:8.1f}ms p95={stats['p95_ms']:8.1f}ms")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.json_path}")
+
+    backends.uninstall()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
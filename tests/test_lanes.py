@@ -0,0 +1,101 @@
+"""utils/lanes.py: AI 라우팅 중 하위 agent tool이 동시에 lane을 옮길 때 slot 반납 확인"""
+import asyncio
+
+import pytest
+
+from agent.utils import lanes
+from agent.utils.lanes import LANE_ANSWER, LANE_DATA, LANE_IMAGE, LaneScheduler, lane_slot
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    scheduler = LaneScheduler(
+        capacity=8,
+        limits={LANE_ANSWER: 1, LANE_IMAGE: 1},
+        reserved={},
+        queue_limit=10,
+    )
+    monkeypatch.setattr(lanes, "_scheduler", scheduler)
+    return scheduler
+
+
+def _active(scheduler):
+    return {lane: stats["active"] for lane, stats in scheduler.stats().items() if stats["active"]}
+
+
+async def _tool(lane, started, finish):
+    # LaneTool.stream과 같이 요청 ticket 안에서 lane_slot을 잡고 실행
+    async with lane_slot(lane):
+        started.append(lane)
+        await finish.wait()
+
+
+def test_concurrent_moves_hold_each_slot_until_request_ends(scheduler):
+    async def main():
+        started, finish = [], asyncio.Event()
+        async with lane_slot(LANE_DATA, "user", 1.0):
+            tools = asyncio.gather(_tool(LANE_ANSWER, started, finish), _tool(LANE_IMAGE, started, finish))
+            while len(started) < 2:
+                await asyncio.sleep(0)
+            assert _active(scheduler) == {LANE_ANSWER: 1, LANE_IMAGE: 1}
+            finish.set()
+            await tools
+            # tool이 끝나도 요청(structured_output)이 끝날 때까지 유지
+            assert _active(scheduler) == {LANE_ANSWER: 1, LANE_IMAGE: 1}
+        assert _active(scheduler) == {}
+
+    asyncio.run(main())
+
+
+def test_concurrent_moves_into_busy_lanes_release_everything(scheduler):
+    async def main():
+        busy_started, busy_finish = [], asyncio.Event()
+        # 다른 요청이 answer / image slot을 잡고 있음
+        busy = [
+            asyncio.create_task(_run_request(lane, busy_started, busy_finish))
+            for lane in (LANE_ANSWER, LANE_IMAGE)
+        ]
+        while len(busy_started) < 2:
+            await asyncio.sleep(0)
+
+        started, finish = [], asyncio.Event()
+        async with lane_slot(LANE_DATA, "user", 1.0):
+            tools = asyncio.gather(_tool(LANE_ANSWER, started, finish), _tool(LANE_IMAGE, started, finish))
+            await asyncio.sleep(0.01)
+            assert started == []
+            busy_finish.set()
+            await asyncio.gather(*busy)
+            while len(started) < 2:
+                await asyncio.sleep(0)
+            finish.set()
+            await tools
+        assert _active(scheduler) == {}
+
+    asyncio.run(main())
+
+
+async def _run_request(lane, started, finish):
+    async with lane_slot(lane, "other", 1.0):
+        started.append(lane)
+        await finish.wait()
+
+
+def test_slot_acquired_after_request_ended_is_released(scheduler):
+    async def main():
+        ticket_holder = {}
+
+        async with lane_slot(LANE_DATA, "user", 1.0):
+            ticket_holder["ticket"] = lanes._current_lane.get()
+        ticket = ticket_holder["ticket"]
+        assert ticket.closed
+
+        # thread 모드에서 요청이 끝난 뒤 tool이 slot을 얻은 경우
+        token = lanes._current_lane.set(ticket)
+        try:
+            async with lane_slot(LANE_IMAGE):
+                pass
+        finally:
+            lanes._current_lane.reset(token)
+        assert _active(scheduler) == {}
+
+    asyncio.run(main())
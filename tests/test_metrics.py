@@ -0,0 +1,46 @@
+"""utils/metrics.py: 멀티 워커 스냅샷 합산 방식 확인"""
+from agent.utils.metrics import merge_states
+
+
+def _gauge(values, merge=None):
+    entry = {"type": "gauge", "help": "", "labelnames": ["lane"], "values": values}
+    if merge:
+        entry["merge"] = merge
+    return entry
+
+
+def test_merge_states_uses_each_gauge_merge_mode():
+    workers = [
+        {
+            "agent_lane_active": _gauge([[["image"], 1]], "sum"),
+            "agent_lane_limit": _gauge([[["image"], 4]], "max"),
+            "agent_hedge_budget_tokens": _gauge([[["image"], 3]], "min"),
+            "agent_hedge_delay_seconds": _gauge([[["image"], 1.0]], "avg"),
+            "agent_prompt_cache_hit_ratio": _gauge([[["image"], 0.2]]),
+        },
+        {
+            "agent_lane_active": _gauge([[["image"], 2]], "sum"),
+            "agent_lane_limit": _gauge([[["image"], 4]], "max"),
+            "agent_hedge_budget_tokens": _gauge([[["image"], 7]], "min"),
+            "agent_hedge_delay_seconds": _gauge([[["image"], 3.0]], "avg"),
+            "agent_prompt_cache_hit_ratio": _gauge([[["image"], 0.6]]),
+        },
+    ]
+
+    merged = merge_states(workers)
+
+    values = {name: entry["values"][0][1] for name, entry in merged.items()}
+    assert values["agent_lane_active"] == 3
+    assert values["agent_lane_limit"] == 4
+    assert values["agent_hedge_budget_tokens"] == 3
+    assert values["agent_hedge_delay_seconds"] == 2.0
+    assert round(values["agent_prompt_cache_hit_ratio"], 6) == 0.4
+
+
+def test_merge_states_sums_histogram_buckets():
+    entry = {"type": "histogram", "help": "", "labelnames": [], "buckets": [1.0], "values": [[[], [1, 0, 0.5]]]}
+    other = {**entry, "values": [[[], [0, 2, 4.0]]]}
+
+    merged = merge_states([{"h": entry}, {"h": other}])
+
+    assert merged["h"]["values"] == [[[], [1, 2, 4.5]]]
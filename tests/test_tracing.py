@@ -0,0 +1,31 @@
+"""utils/tracing.py: root span이 export된 뒤 끝난 span이 _pending에 남지 않는지 확인"""
+import pytest
+
+from agent.utils import tracing
+
+
+class _ListExporter(tracing.SpanExporter):
+    def __init__(self):
+        self.exported = []
+
+    def export(self, spans):
+        self.exported.append([s.name for s in spans])
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = _ListExporter()
+    monkeypatch.setattr(tracing, "_exporter", exporter)
+    return exporter
+
+
+def test_span_finished_after_root_is_exported_alone(exporter):
+    with tracing.start_trace("invocations") as root:
+        late = tracing.open_span("job")
+        with tracing.span("orchestrate"):
+            pass
+    late.finish()
+
+    assert exporter.exported == [["invocations", "orchestrate"], ["job"]]
+    assert root.trace_id not in tracing._pending
+    assert root.trace_id not in tracing._roots